@@ -0,0 +1,123 @@
+import hashlib
+import os
+import tempfile
+import threading
+
+
+class AlmacenSegmentos:
+    """
+    Almacén de segmentos preprocesados en un directorio de spool (apto para
+    tmpfs). La clave combina ruta, tamaño y mtime del original con los
+    parámetros de ffmpeg, así que un segmento solo se reutiliza si la fuente
+    y la cadena de filtros son idénticas. Expulsa por LRU al superar max_megabytes.
+    Los anexos de un segmento (p. ej. su mapa de tiempos) se expulsan con él.
+    """
+
+    ANEXOS = (".mapa.json",)
+
+    def __init__(self, directorio=None, max_megabytes=2048):
+        self.directorio = directorio or os.path.join(tempfile.gettempdir(), "transcriptor_medico_segmentos")
+        self.max_bytes = int(max_megabytes * 1024 * 1024)
+
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+
+        self._lock = threading.Lock()
+        os.makedirs(self.directorio, exist_ok=True)
+        self._bytes_totales = sum(tamaño for _, _, tamaño in self._entradas())
+
+    def clave(self, archivo_original, parametros):
+        """
+        Clave del segmento a partir de la identidad del original y los parámetros de ffmpeg
+        """
+        info = os.stat(archivo_original)
+        identidad = f"{os.path.abspath(archivo_original)}|{info.st_size}|{info.st_mtime_ns}|{parametros}"
+        return hashlib.sha256(identidad.encode("utf-8")).hexdigest()
+
+    def ruta(self, clave, extension="wav"):
+        return os.path.join(self.directorio, f"{clave}.{extension}")
+
+    def ruta_temporal(self, clave, extension="wav"):
+        """
+        Ruta donde ffmpeg escribe antes de publicar el segmento con registrar()
+        """
+        return os.path.join(self.directorio, f".{clave}.{os.getpid()}.{threading.get_ident()}.{extension}")
+
+    def obtener(self, clave, extension="wav"):
+        """
+        Ruta del segmento si ya existe, o None
+        """
+        ruta = self.ruta(clave, extension)
+        try:
+            os.utime(ruta)  # mtime = último uso, base del LRU
+        except FileNotFoundError:
+            with self._lock:
+                self.fallos += 1
+            return None
+
+        with self._lock:
+            self.aciertos += 1
+        return ruta
+
+    def registrar(self, clave, temporal, extension="wav"):
+        """
+        Publicar de forma atómica un segmento recién creado y expulsar si hace falta
+        """
+        ruta = self.ruta(clave, extension)
+        os.replace(temporal, ruta)
+
+        with self._lock:
+            self._bytes_totales += os.path.getsize(ruta)
+            if self._bytes_totales > self.max_bytes:
+                self._expulsar(conservar=ruta)
+        return ruta
+
+    def _entradas(self):
+        """
+        (ruta, mtime, tamaño) de cada segmento publicado
+        """
+        with os.scandir(self.directorio) as entradas:
+            for entrada in entradas:
+                if entrada.name.startswith(".") or entrada.name.endswith(self.ANEXOS) or not entrada.is_file():
+                    continue
+                try:
+                    info = entrada.stat()
+                except FileNotFoundError:
+                    continue
+                yield entrada.path, info.st_mtime, info.st_size
+
+    def _expulsar(self, conservar):
+        """
+        Borrar los segmentos usados hace más tiempo hasta bajar del 90% del límite
+        """
+        objetivo = self.max_bytes * 0.9
+        entradas = sorted(self._entradas(), key=lambda entrada: entrada[1])
+        self._bytes_totales = sum(tamaño for _, _, tamaño in entradas)
+
+        for ruta, _, tamaño in entradas:
+            if self._bytes_totales <= objetivo:
+                break
+            if ruta == conservar:
+                continue
+            for archivo in (ruta, *(f"{ruta}{anexo}" for anexo in self.ANEXOS)):
+                try:
+                    os.remove(archivo)
+                except FileNotFoundError:
+                    pass
+            self._bytes_totales -= tamaño
+            self.expulsiones += 1
+
+    def estadisticas(self):
+        """
+        Contadores de uso del almacén
+        """
+        consultas = self.aciertos + self.fallos
+        return {
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+            "expulsiones": self.expulsiones,
+            "megabytes": self._bytes_totales / (1024 * 1024),
+            "directorio": self.directorio
+        }
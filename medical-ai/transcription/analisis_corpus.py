@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Análisis de vocabulario médico a escala de todo el archivo de sesiones
+
+Construye una matriz dispersa sesiones × términos (categorías de
+vocabulario_medico) a partir de los resultados guardados (.jsonl o reportes
+.txt) y calcula los agregados de la clínica en bloque con NumPy/SciPy:
+totales por término y categoría, sesiones que mencionan cada término y
+tendencias mes a mes. La ingesta se reparte entre procesos y solo procesa
+archivos nuevos o modificados: la matriz se amplía, no se reconstruye.
+
+Uso:
+    python analisis_corpus.py actualizar "salidas/*.jsonl" "transcripcion_medica_optimizada_*.txt"
+    python analisis_corpus.py resumen
+    python analisis_corpus.py tendencia --categoria SÍNTOMAS_PSICOLÓGICOS
+    python analisis_corpus.py tendencias --top 10
+"""
+
+import argparse
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+from scipy import sparse
+
+from analisis_texto import BuscadorTerminos
+from indice_transcripciones import leer_reporte
+
+# Buscador de cada proceso de ingesta, creado una vez en el initializer
+_buscador_proceso = None
+
+
+def _iniciar_proceso(categorias):
+    global _buscador_proceso
+    _buscador_proceso = BuscadorTerminos(categorias)
+
+
+def _leer_resultado(ruta):
+    """
+    (transcripción, timestamp ISO) de un resultado .jsonl o un reporte .txt
+    """
+    if ruta.endswith(".jsonl"):
+        with open(ruta, "r", encoding="utf-8") as f:
+            sesion = json.loads(f.readline())
+        return sesion["transcript"], sesion.get("timestamp")
+
+    reporte = leer_reporte(ruta)
+    return reporte["transcript"], reporte["timestamp"]
+
+
+def _contar_archivo(ruta, columnas):
+    """
+    Fila dispersa de un archivo: (ruta, mtime_ns, timestamp, índices de columna, conteos)
+    """
+    mtime_ns = os.stat(ruta).st_mtime_ns
+    transcript, timestamp = _leer_resultado(ruta)
+    if not timestamp:
+        timestamp = datetime.fromtimestamp(mtime_ns / 1e9).isoformat()
+
+    indices, conteos = [], []
+    for categoria, terminos in _buscador_proceso.contar(transcript).items():
+        for termino, cantidad in terminos.items():
+            indices.append(columnas[(categoria, termino)])
+            conteos.append(cantidad)
+
+    return ruta, mtime_ns, timestamp, indices, conteos
+
+
+def _contar_lote(rutas, columnas):
+    return [_contar_archivo(ruta, columnas) for ruta in rutas]
+
+
+class CorpusTerminos:
+    """
+    Matriz sesiones × términos persistida en disco (matriz.npz + sesiones.json)
+    """
+
+    def __init__(self, vocabulario, directorio=None):
+        self.directorio = directorio or os.path.expanduser("~/.cache/transcriptor_medico/corpus")
+        self.vocabulario = {categoria: list(terminos) for categoria, terminos in vocabulario.items()}
+
+        # Una columna por (categoría, término), en el orden del vocabulario
+        self.terminos = [(categoria, termino) for categoria, terminos in self.vocabulario.items() for termino in terminos]
+        self._columnas = {clave: i for i, clave in enumerate(self.terminos)}
+
+        self.sesiones = []  # [{"ruta", "mtime_ns", "timestamp"}], una por fila
+        self.matriz = sparse.csr_matrix((0, len(self.terminos)), dtype=np.int32)
+        self._pendientes_reconstruccion = []
+        self._cargar()
+
+    def _rutas_persistencia(self):
+        return os.path.join(self.directorio, "matriz.npz"), os.path.join(self.directorio, "sesiones.json")
+
+    def _cargar(self):
+        ruta_matriz, ruta_sesiones = self._rutas_persistencia()
+        if not (os.path.exists(ruta_matriz) and os.path.exists(ruta_sesiones)):
+            return
+
+        with open(ruta_sesiones, "r", encoding="utf-8") as f:
+            guardado = json.load(f)
+
+        if guardado["vocabulario"] != self.vocabulario:
+            # Otro vocabulario: las columnas no coinciden, se re-ingieren los mismos archivos
+            self._pendientes_reconstruccion = [s["ruta"] for s in guardado["sesiones"]]
+            return
+
+        self.sesiones = guardado["sesiones"]
+        self.matriz = sparse.load_npz(ruta_matriz).tocsr()
+
+    def guardar(self):
+        os.makedirs(self.directorio, exist_ok=True)
+        ruta_matriz, ruta_sesiones = self._rutas_persistencia()
+
+        sparse.save_npz(ruta_matriz + ".tmp.npz", self.matriz)
+        os.replace(ruta_matriz + ".tmp.npz", ruta_matriz)
+
+        temporal = ruta_sesiones + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump({"vocabulario": self.vocabulario, "sesiones": self.sesiones}, f, ensure_ascii=False)
+        os.replace(temporal, ruta_sesiones)
+
+    def actualizar(self, rutas, procesos=None, tamano_lote=64):
+        """
+        Ingerir los archivos nuevos o modificados (en paralelo) y guardar;
+        devuelve (añadidas, actualizadas)
+        """
+        rutas = set(rutas) | set(self._pendientes_reconstruccion)
+        self._pendientes_reconstruccion = []
+
+        conocidas = {sesion["ruta"]: (i, sesion["mtime_ns"]) for i, sesion in enumerate(self.sesiones)}
+        pendientes = []
+        reemplazadas = set()
+        for ruta in sorted(os.path.abspath(r) for r in rutas):
+            if not os.path.exists(ruta):
+                continue
+            previa = conocidas.get(ruta)
+            if previa is None:
+                pendientes.append(ruta)
+            elif previa[1] != os.stat(ruta).st_mtime_ns:
+                pendientes.append(ruta)
+                reemplazadas.add(previa[0])
+
+        if not pendientes:
+            return 0, 0
+
+        lotes = [pendientes[i:i + tamano_lote] for i in range(0, len(pendientes), tamano_lote)]
+        filas = []
+        if len(lotes) == 1 or procesos == 1:
+            _iniciar_proceso(self.vocabulario)
+            for lote in lotes:
+                filas.extend(_contar_lote(lote, self._columnas))
+        else:
+            with ProcessPoolExecutor(procesos, initializer=_iniciar_proceso, initargs=(self.vocabulario,)) as pool:
+                for resultado in pool.map(_contar_lote, lotes, [self._columnas] * len(lotes)):
+                    filas.extend(resultado)
+
+        # Filas nuevas en formato COO -> CSR y se apilan debajo de las existentes
+        filas_coo = np.repeat(np.arange(len(filas)), [len(f[3]) for f in filas])
+        columnas_coo = np.fromiter((i for f in filas for i in f[3]), dtype=np.int64, count=len(filas_coo))
+        valores_coo = np.fromiter((c for f in filas for c in f[4]), dtype=np.int32, count=len(filas_coo))
+        nuevas = sparse.csr_matrix((valores_coo, (filas_coo, columnas_coo)), shape=(len(filas), len(self.terminos)))
+
+        if reemplazadas:
+            conservar = np.setdiff1d(np.arange(len(self.sesiones)), sorted(reemplazadas))
+            self.matriz = self.matriz[conservar]
+            self.sesiones = [self.sesiones[i] for i in conservar]
+
+        self.matriz = sparse.vstack([self.matriz, nuevas], format="csr")
+        self.sesiones.extend({"ruta": f[0], "mtime_ns": f[1], "timestamp": f[2]} for f in filas)
+        self.guardar()
+
+        return len(filas) - len(reemplazadas), len(reemplazadas)
+
+    def _indicadora_categorias(self):
+        """
+        Matriz términos × categorías con un 1 donde el término pertenece a la categoría
+        """
+        categorias = list(self.vocabulario)
+        columnas = [categorias.index(categoria) for categoria, _ in self.terminos]
+        return categorias, sparse.csr_matrix(
+            (np.ones(len(self.terminos), dtype=np.int32), (np.arange(len(self.terminos)), columnas)),
+            shape=(len(self.terminos), len(categorias))
+        )
+
+    def totales_por_termino(self):
+        totales = np.asarray(self.matriz.sum(axis=0)).ravel()
+        return {f"{categoria}:{termino}": int(total) for (categoria, termino), total in zip(self.terminos, totales)}
+
+    def totales_por_categoria(self):
+        categorias, indicadora = self._indicadora_categorias()
+        totales = np.asarray((self.matriz @ indicadora).sum(axis=0)).ravel()
+        return dict(zip(categorias, totales.tolist()))
+
+    def sesiones_por_termino(self):
+        """
+        Número de sesiones que mencionan cada término al menos una vez
+        """
+        presencia = np.diff(self.matriz.tocsc().indptr)
+        return {f"{categoria}:{termino}": int(n) for (categoria, termino), n in zip(self.terminos, presencia)}
+
+    def _por_mes(self, matriz):
+        """
+        (meses ordenados, sesiones por mes, matriz meses × columnas sumada)
+        """
+        meses, grupo = np.unique([sesion["timestamp"][:7] for sesion in self.sesiones], return_inverse=True)
+        agrupadora = sparse.csr_matrix(
+            (np.ones(len(grupo), dtype=np.int32), (grupo, np.arange(len(grupo)))),
+            shape=(len(meses), len(grupo))
+        )
+        sesiones_mes = np.bincount(grupo, minlength=len(meses))
+        return meses.tolist(), sesiones_mes, np.asarray((agrupadora @ matriz).todense())
+
+    def tendencia_mensual(self, categoria=None, termino=None):
+        """
+        {mes: {"sesiones", "apariciones", "por_sesion"}} de una categoría, un
+        término ("CATEGORÍA:término" o solo el término) o de todo el vocabulario
+        """
+        if not self.sesiones:
+            return {}
+
+        if termino:
+            columnas = [i for i, (cat, ter) in enumerate(self.terminos) if termino in (ter, f"{cat}:{ter}")]
+        elif categoria:
+            columnas = [i for i, (cat, _) in enumerate(self.terminos) if cat == categoria]
+        else:
+            columnas = list(range(len(self.terminos)))
+
+        meses, sesiones_mes, por_mes = self._por_mes(self.matriz[:, columnas])
+        apariciones = por_mes.sum(axis=1)
+
+        return {
+            mes: {"sesiones": int(n), "apariciones": int(a), "por_sesion": float(a / n)}
+            for mes, n, a in zip(meses, sesiones_mes, apariciones)
+        }
+
+    def tendencias(self, top=10):
+        """
+        Términos cuya frecuencia por sesión más crece mes a mes (pendiente de
+        una recta ajustada a todos los términos a la vez por mínimos cuadrados)
+        """
+        meses, sesiones_mes, por_mes = self._por_mes(self.matriz)
+        if len(meses) < 2:
+            return []
+
+        tasas = por_mes / sesiones_mes[:, None]
+        x = np.arange(len(meses), dtype=float)
+        diseño = np.column_stack([x, np.ones_like(x)])
+        pendientes = np.linalg.lstsq(diseño, tasas, rcond=None)[0][0]
+
+        orden = np.argsort(pendientes)[::-1][:top]
+        return [
+            {"termino": f"{self.terminos[i][0]}:{self.terminos[i][1]}", "pendiente_por_mes": float(pendientes[i]),
+             "primer_mes": float(tasas[0, i]), "ultimo_mes": float(tasas[-1, i])}
+            for i in orden if pendientes[i] > 0
+        ]
+
+
+def vocabulario_por_defecto():
+    """
+    vocabulario_medico de TranscriptorMedico
+    """
+    from transcriptor_medico_final import TranscriptorMedico
+    return TranscriptorMedico(usar_cache=False, reutilizar_segmentos=False, indexar=False).vocabulario_medico
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Análisis de vocabulario médico sobre todas las sesiones")
+    parser.add_argument("--directorio", help="Directorio de la matriz persistida")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    actualizar = subparsers.add_parser("actualizar", help="Ingerir resultados nuevos o modificados")
+    actualizar.add_argument("patrones", nargs="*", default=["transcripcion_medica_optimizada_*.jsonl",
+                                                            "transcripcion_medica_optimizada_*.txt"])
+    actualizar.add_argument("--procesos", type=int, help="Procesos de ingesta (por defecto, uno por CPU)")
+
+    subparsers.add_parser("resumen", help="Totales por categoría y términos más frecuentes")
+
+    tendencia = subparsers.add_parser("tendencia", help="Evolución mensual")
+    tendencia.add_argument("--categoria")
+    tendencia.add_argument("--termino")
+
+    tendencias = subparsers.add_parser("tendencias", help="Términos que más crecen")
+    tendencias.add_argument("--top", type=int, default=10)
+
+    args = parser.parse_args()
+    corpus = CorpusTerminos(vocabulario_por_defecto(), args.directorio)
+
+    if args.comando == "actualizar":
+        rutas = {ruta for patron in args.patrones for ruta in glob.glob(patron)}
+        # Un .jsonl y un .txt del mismo resultado contarían la sesión dos veces
+        rutas = {ruta for ruta in rutas if not (ruta.endswith(".txt") and ruta[:-4] + ".jsonl" in rutas)}
+        añadidas, actualizadas = corpus.actualizar(rutas, args.procesos)
+        print(f"✅ {añadidas} sesiones nuevas, {actualizadas} actualizadas ({len(corpus.sesiones)} en total)")
+
+    elif args.comando == "resumen":
+        print(f"📚 {len(corpus.sesiones)} sesiones")
+        print("\n📊 APARICIONES POR CATEGORÍA:")
+        for categoria, total in corpus.totales_por_categoria().items():
+            print(f"  • {categoria}: {total}")
+
+        presencia = corpus.sesiones_por_termino()
+        print("\n🔍 TÉRMINOS MÁS FRECUENTES:")
+        totales = sorted(corpus.totales_por_termino().items(), key=lambda item: item[1], reverse=True)
+        for termino, total in totales[:15]:
+            if total:
+                print(f"  • {termino}: {total} ({presencia[termino]} sesiones)")
+
+    elif args.comando == "tendencia":
+        for mes, datos in corpus.tendencia_mensual(args.categoria, args.termino).items():
+            print(f"  {mes}: {datos['apariciones']:>6} en {datos['sesiones']:>5} sesiones ({datos['por_sesion']:.2f}/sesión)")
+
+    else:
+        for tendencia in corpus.tendencias(args.top):
+            print(f"📈 {tendencia['termino']}: {tendencia['primer_mes']:.2f} → {tendencia['ultimo_mes']:.2f} por sesión "
+                  f"({tendencia['pendiente_por_mes']:+.3f}/mes)")
+
+
+if __name__ == "__main__":
+    main()
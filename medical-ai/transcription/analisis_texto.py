@@ -0,0 +1,87 @@
+import re
+from collections import Counter
+
+_TOKEN = re.compile(r"\w+")
+
+# Quita tildes y diéresis pero conserva la ñ ("año" no debe confundirse con "ano")
+_SIN_TILDES = str.maketrans("áéíóúüàèìòù", "aeiouuaeiou")
+
+
+def normalizar(texto):
+    """
+    Minúsculas y sin tildes, para comparar términos
+    """
+    return texto.lower().translate(_SIN_TILDES)
+
+
+def tokenizar(texto):
+    return _TOKEN.findall(normalizar(texto))
+
+
+class BuscadorTerminos:
+    """
+    Buscador de términos en una sola pasada: tabla hash de tokens normalizados
+    construida una vez por vocabulario. Respeta límites de palabra ("mal" no
+    cuenta dentro de "normal"), ignora tildes, admite plurales simples y
+    términos de varias palabras, y su coste no crece con el tamaño del vocabulario.
+    """
+
+    def __init__(self, categorias):
+        # primer token -> [(tokens del término, [(orden, categoría, término original)])]
+        self._indice = {}
+        self._orden_categorias = list(categorias)
+
+        orden = 0
+        por_tokens = {}
+        for categoria, terminos in categorias.items():
+            for termino in terminos:
+                tokens = tuple(tokenizar(termino))
+                if not tokens:
+                    continue
+                por_tokens.setdefault(tokens, []).append((orden, categoria, termino))
+                orden += 1
+
+        for tokens, destinos in por_tokens.items():
+            self._indice.setdefault(tokens[0], []).append((tokens, destinos))
+
+        # Los términos más largos primero: "dolor de cabeza" gana a "dolor"
+        for candidatos in self._indice.values():
+            candidatos.sort(key=lambda candidato: len(candidato[0]), reverse=True)
+
+    def _candidatos(self, token):
+        candidatos = self._indice.get(token)
+        if candidatos is None and token.endswith("s"):
+            # Plurales simples: pastillas -> pastilla, meses -> mes
+            candidatos = self._indice.get(token[:-1])
+            if candidatos is None and token.endswith("es"):
+                candidatos = self._indice.get(token[:-2])
+        return candidatos
+
+    def contar(self, texto):
+        """
+        {categoría: {término: apariciones}} con las categorías y términos en el
+        orden del vocabulario; solo incluye los términos encontrados
+        """
+        tokens = tokenizar(texto)
+        conteos = Counter()
+
+        i = 0
+        total = len(tokens)
+        while i < total:
+            candidatos = self._candidatos(tokens[i])
+            avance = 1
+            if candidatos:
+                for terminos, destinos in candidatos:
+                    largo = len(terminos)
+                    if largo == 1 or tuple(tokens[i + 1:i + largo]) == terminos[1:]:
+                        for destino in destinos:
+                            conteos[destino] += 1
+                        avance = largo
+                        break
+            i += avance
+
+        resultado = {}
+        for (_, categoria, termino), cantidad in sorted(conteos.items()):
+            resultado.setdefault(categoria, {})[termino] = cantidad
+
+        return {categoria: resultado[categoria] for categoria in self._orden_categorias if categoria in resultado}
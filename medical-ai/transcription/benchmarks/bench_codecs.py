@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Benchmark de codificaciones de subida: WAV, FLAC y Opus
+
+Para cada codificación crea el segmento con ffmpeg (filtrado y codificación
+en la misma pasada), lo sube y mide:
+
+- bytes subidos y proporción frente al WAV
+- tiempo de ffmpeg
+- tiempo de subida + respuesta; con --subida-mbps el envío se limita a ese
+  ancho de banda para simular el enlace de la clínica
+- confianza media, diferencia con el WAV y proporción de palabras que cambian
+  respecto a la transcripción del WAV (solo tiene sentido contra la API real:
+  el mock devuelve siempre la misma respuesta)
+
+Sin --api-url arranca un mock interno. Sin --audio genera una señal de voz
+sintética; para medir compresión y confianza reales usa una grabación.
+Los resultados se añaden a benchmarks/resultados/codecs.jsonl.
+
+Uso:
+    python benchmarks/bench_codecs.py --segundos 300 --subida-mbps 5
+    python benchmarks/bench_codecs.py --audio consulta.wav --api-url https://api.deepgram.com/v1 --api-key $DEEPGRAM_API_KEY
+"""
+
+import argparse
+import asyncio
+import contextlib
+import difflib
+import os
+import statistics
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cliente_http import cerrar_clientes
+from transcriptor_medico_final import TranscriptorMedico, CODIFICACIONES
+
+from registro import guardar_ejecucion
+
+NOMBRE = "codecs"
+API_KEY_MOCK = "0" * 40
+
+
+def crear_voz_sintetica(ruta, segundos, frecuencia=16000, semilla=0):
+    """
+    WAV mono 16-bit con sílabas sonoras (armónicos de un tono que varía),
+    ruido de fricativas y pausas: se comprime como la voz, no como un tono puro
+    """
+    aleatorio = np.random.default_rng(semilla)
+    t = np.arange(int(segundos * frecuencia)) / frecuencia
+
+    tono = 140 + 40 * np.sin(2 * np.pi * 0.3 * t) + 20 * np.sin(2 * np.pi * 2.1 * t)
+    fase = 2 * np.pi * np.cumsum(tono) / frecuencia
+    sonoro = sum(np.sin(k * fase) / k for k in range(1, 12))
+
+    silabas = np.clip(np.sin(2 * np.pi * 4 * t), 0, None) ** 2
+    frases = (np.sin(2 * np.pi * 0.15 * t + aleatorio.uniform(0, np.pi)) > -0.3).astype(float)
+    ruido = aleatorio.normal(0, 0.3, t.size) * (silabas < 0.1)
+
+    senal = (sonoro * silabas + ruido * 0.5) * frases + aleatorio.normal(0, 0.01, t.size)
+    muestras = (senal / np.abs(senal).max() * 12000).astype("<i2")
+
+    with wave.open(ruta, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(frecuencia)
+        w.writeframes(muestras.tobytes())
+
+
+async def bloques_limitados(ruta, mbps, tamano_bloque=64 * 1024):
+    """
+    Leer el archivo en bloques sin superar `mbps` megabits por segundo
+    """
+    bytes_por_segundo = mbps * 1_000_000 / 8
+    inicio = time.perf_counter()
+    enviados = 0
+    with open(ruta, "rb") as f:
+        while True:
+            bloque = f.read(tamano_bloque)
+            if not bloque:
+                return
+            enviados += len(bloque)
+            adelanto = enviados / bytes_por_segundo - (time.perf_counter() - inicio)
+            if adelanto > 0:
+                await asyncio.sleep(adelanto)
+            yield bloque
+
+
+def _alternativa(response):
+    return response["results"]["channels"][0]["alternatives"][0]
+
+
+async def medir_codificacion(args, codificacion, audio, directorio):
+    transcriptor = TranscriptorMedico(
+        api_key=args.api_key or API_KEY_MOCK,
+        api_url=args.api_url,
+        usar_cache=False,
+        directorio_segmentos=directorio,
+        silencioso=True,
+        indexar=False,
+        codificacion=codificacion,
+        bitrate_opus=args.bitrate_opus
+    )
+
+    inicio = time.perf_counter()
+    segmento = await asyncio.to_thread(transcriptor.crear_segmento_optimizado, audio, args.segundos)
+    tiempo_ffmpeg = time.perf_counter() - inicio
+    if not segmento:
+        raise RuntimeError(f"ffmpeg no pudo crear el segmento {codificacion}")
+
+    mimetype = CODIFICACIONES[codificacion][3]
+    tiempos = []
+    response = None
+    for _ in range(args.repeticiones):
+        if args.subida_mbps:
+            source = {"buffer": bloques_limitados(segmento, args.subida_mbps), "mimetype": mimetype}
+            inicio = time.perf_counter()
+            response = await transcriptor._llamar_api(source)
+        else:
+            with open(segmento, "rb") as f:
+                inicio = time.perf_counter()
+                response = await transcriptor._llamar_api({"buffer": f, "mimetype": mimetype})
+        tiempos.append(time.perf_counter() - inicio)
+
+    alternativa = _alternativa(response)
+    return {
+        "codificacion": codificacion,
+        "bytes": os.path.getsize(segmento),
+        "tiempo_ffmpeg_segundos": tiempo_ffmpeg,
+        "tiempo_subida_segundos": statistics.median(tiempos),
+        "confianza": alternativa.get("confidence"),
+        "palabras": [p["word"] for p in alternativa.get("words", [])]
+    }
+
+
+async def principal(args):
+    servidor = None
+    if not args.api_url:
+        from servidor_mock import ServidorMock
+
+        # Respuesta de tamaño fijo: el mock no debe deducir la duración de los bytes comprimidos
+        mock = ServidorMock(latencia=args.latencia_mock, minutos_respuesta=args.segundos / 60)
+        servidor = await mock.iniciar(puerto=args.puerto_mock)
+        args.api_url = f"http://127.0.0.1:{args.puerto_mock}/v1"
+
+    try:
+        with tempfile.TemporaryDirectory() as temporal:
+            audio = args.audio
+            if not audio:
+                audio = os.path.join(temporal, "voz_sintetica.wav")
+                crear_voz_sintetica(audio, args.segundos)
+
+            mediciones = []
+            with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+                for codificacion in args.codificaciones:
+                    mediciones.append(await medir_codificacion(args, codificacion, audio, temporal))
+            return mediciones
+    finally:
+        await cerrar_clientes()
+        if servidor:
+            await servidor.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de codificaciones de subida")
+    parser.add_argument("--audio", help="Grabación a usar (por defecto voz sintética)")
+    parser.add_argument("--segundos", type=int, default=120, help="Duración del segmento")
+    parser.add_argument("--codificaciones", nargs="+", default=list(CODIFICACIONES), choices=list(CODIFICACIONES))
+    parser.add_argument("--bitrate-opus", default="24k")
+    parser.add_argument("--subida-mbps", type=float, help="Limitar el envío a este ancho de banda")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--api-url", help="URL base (sin ella se arranca un mock interno)")
+    parser.add_argument("--api-key", help="API key para la URL indicada")
+    parser.add_argument("--puerto-mock", type=int, default=8788)
+    parser.add_argument("--latencia-mock", default="fija:0.3")
+    parser.add_argument("--no-guardar", action="store_true")
+    args = parser.parse_args()
+
+    enlace = f"{args.subida_mbps:g} Mbps" if args.subida_mbps else "sin límite"
+    print(f"🎚️ CODIFICACIONES: segmento de {args.segundos}s, subida {enlace}")
+    print("=" * 40)
+
+    mediciones = asyncio.run(principal(args))
+    referencia = next((m for m in mediciones if m["codificacion"] == "wav"), mediciones[0])
+
+    print(f"{'codec':<6} {'MB':>7} {'vs ' + referencia['codificacion']:>7} {'ffmpeg':>8} {'subida':>8} "
+          f"{'confianza':>10} {'Δ conf.':>8} {'palabras ≠':>11}")
+    for m in mediciones:
+        m["proporcion_bytes"] = m["bytes"] / referencia["bytes"]
+        m["delta_confianza"] = (m["confianza"] - referencia["confianza"]
+                                if m["confianza"] is not None and referencia["confianza"] is not None else None)
+        m["palabras_distintas"] = 1 - difflib.SequenceMatcher(None, referencia["palabras"], m["palabras"]).ratio()
+        delta = f"{m['delta_confianza']:+.4f}" if m["delta_confianza"] is not None else "-"
+        print(f"{m['codificacion']:<6} {m['bytes'] / 1024 ** 2:>7.2f} {m['proporcion_bytes']:>7.1%} "
+              f"{m['tiempo_ffmpeg_segundos']:>7.2f}s {m['tiempo_subida_segundos']:>7.2f}s "
+              f"{m['confianza'] or 0:>10.4f} {delta:>8} {m['palabras_distintas']:>11.1%}")
+
+    for m in mediciones:
+        del m["palabras"]
+
+    if not args.no_guardar:
+        parametros = {k: v for k, v in vars(args).items() if k not in ("api_key", "no_guardar")}
+        ruta = guardar_ejecucion(NOMBRE, mediciones, parametros)
+        print(f"\n💾 Resultados añadidos a {ruta}")
+
+
+if __name__ == "__main__":
+    main()
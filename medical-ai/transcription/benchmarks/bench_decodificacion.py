@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Benchmark del preprocesado: ffmpeg por segmento frente a decodificación interna
+
+Prepara los mismos N archivos cortos por los dos caminos del pipeline de
+lotes, con el mismo número de workers:
+
+- ffmpeg: crear_segmento_optimizado (un proceso y un WAV temporal por archivo)
+- interna: preparar_en_memoria (PyAV/soundfile + filtros SciPy en el propio
+  proceso, WAV en un buffer reutilizable)
+
+Mide archivos por segundo, factor de tiempo real y CPU consumida (propia y
+de los subprocesos), y compara el audio resultante de ambos caminos (SNR).
+No sube nada: solo mide la etapa de preprocesado.
+Los resultados se añaden a benchmarks/resultados/decodificacion.jsonl.
+
+Uso:
+    python benchmarks/bench_decodificacion.py --archivos 200 --segundos 30
+    python benchmarks/bench_decodificacion.py --formato mp3 --canales 2 --workers 4
+"""
+
+import argparse
+import contextlib
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from transcriptor_medico_final import TranscriptorMedico
+
+from bench_codecs import crear_voz_sintetica
+from registro import guardar_ejecucion
+
+NOMBRE = "decodificacion"
+
+
+def crear_archivos(directorio, cantidad, segundos, frecuencia, canales, formato):
+    """
+    Una grabación sintética convertida al formato pedido y copiada `cantidad` veces
+    """
+    base = os.path.join(directorio, "base.wav")
+    crear_voz_sintetica(base, segundos, frecuencia)
+
+    fuente = os.path.join(directorio, f"fuente.{formato}")
+    subprocess.run(
+        ['ffmpeg', '-loglevel', 'error', '-i', base, '-ac', str(canales), '-y', fuente],
+        check=True
+    )
+
+    archivos = []
+    for i in range(cantidad):
+        ruta = os.path.join(directorio, f"grabacion_{i:05d}.{formato}")
+        shutil.copyfile(fuente, ruta)
+        archivos.append(ruta)
+    return archivos
+
+
+def _cpu():
+    propio = resource.getrusage(resource.RUSAGE_SELF)
+    hijos = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return propio.ru_utime + propio.ru_stime, hijos.ru_utime + hijos.ru_stime
+
+
+def preparar_ffmpeg(transcriptor, archivo, segundos):
+    segmento = transcriptor.crear_segmento_optimizado(archivo, segundos)
+    if not segmento:
+        raise RuntimeError(f"ffmpeg no pudo preparar {archivo}")
+    os.remove(segmento)  # Como tras subirlo en el pipeline
+
+
+def preparar_interna(transcriptor, archivo, segundos):
+    audio = transcriptor.preparar_en_memoria(archivo, segundos)
+    if not audio:
+        raise RuntimeError(f"No se pudo decodificar {archivo}")
+    audio.liberar()  # Como tras subirlo en el pipeline
+
+
+def medir(camino, transcriptor, archivos, segundos, workers):
+    preparar = preparar_ffmpeg if camino == "ffmpeg" else preparar_interna
+    cpu_propia, cpu_hijos = _cpu()
+    inicio = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda archivo: preparar(transcriptor, archivo, segundos), archivos))
+
+    transcurrido = time.perf_counter() - inicio
+    fin_propia, fin_hijos = _cpu()
+    audio_segundos = len(archivos) * segundos
+
+    return {
+        "camino": camino,
+        "archivos": len(archivos),
+        "tiempo_segundos": transcurrido,
+        "archivos_por_segundo": len(archivos) / transcurrido,
+        "factor_tiempo_real": audio_segundos / transcurrido,
+        "cpu_proceso_segundos": fin_propia - cpu_propia,
+        "cpu_subprocesos_segundos": fin_hijos - cpu_hijos,
+        "cpu_por_hora_audio_segundos": ((fin_propia - cpu_propia) + (fin_hijos - cpu_hijos)) * 3600 / audio_segundos
+    }
+
+
+def comparar_salidas(transcriptor_ffmpeg, transcriptor_interno, archivo, segundos):
+    """
+    SNR en dB del audio interno respecto al de ffmpeg y diferencia de muestras
+    """
+    segmento = transcriptor_ffmpeg.crear_segmento_optimizado(archivo, segundos)
+    with wave.open(segmento, "rb") as w:
+        referencia = np.frombuffer(w.readframes(w.getnframes()), dtype="<i2").astype(np.float64)
+    os.remove(segmento)
+
+    audio = transcriptor_interno.preparar_en_memoria(archivo, segundos)
+    interno = np.frombuffer(audio.vista[44:], dtype="<i2").astype(np.float64)
+    audio.liberar()
+
+    n = min(referencia.size, interno.size)
+    error = np.sum((interno[:n] - referencia[:n]) ** 2)
+    snr = 10 * np.log10(np.sum(referencia[:n] ** 2) / error) if error else float("inf")
+    return {"snr_db": snr, "muestras_ffmpeg": int(referencia.size), "muestras_interna": int(interno.size)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de preprocesado: ffmpeg frente a decodificación interna")
+    parser.add_argument("--archivos", type=int, default=100)
+    parser.add_argument("--segundos", type=int, default=30, help="Duración de cada archivo")
+    parser.add_argument("--frecuencia", type=int, default=44100, help="Frecuencia de las grabaciones")
+    parser.add_argument("--canales", type=int, default=2)
+    parser.add_argument("--formato", default="wav", help="Extensión de las grabaciones (wav, flac, mp3, m4a...)")
+    parser.add_argument("--workers", type=int, default=2, help="Hilos de preprocesado (workers_ffmpeg del pipeline)")
+    parser.add_argument("--no-guardar", action="store_true")
+    args = parser.parse_args()
+
+    print(f"🎛️ PREPROCESADO: {args.archivos} archivos {args.formato} de {args.segundos}s "
+          f"({args.frecuencia} Hz, {args.canales} canales), {args.workers} workers")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as temporal:
+        archivos = crear_archivos(temporal, args.archivos, args.segundos, args.frecuencia, args.canales, args.formato)
+        comunes = dict(usar_cache=False, reutilizar_segmentos=False, silencioso=True, indexar=False)
+        transcriptor_ffmpeg = TranscriptorMedico(**comunes)
+        transcriptor_interno = TranscriptorMedico(decodificacion="interna", **comunes)
+
+        with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+            # Calentar: importaciones de PyAV/SciPy y primer buffer fuera de la medición
+            preparar_interna(transcriptor_interno, archivos[0], args.segundos)
+            mediciones = [
+                medir("ffmpeg", transcriptor_ffmpeg, archivos, args.segundos, args.workers),
+                medir("interna", transcriptor_interno, archivos, args.segundos, args.workers)
+            ]
+            comparacion = comparar_salidas(transcriptor_ffmpeg, transcriptor_interno, archivos[0], args.segundos)
+
+    print(f"{'camino':<8} {'tiempo':>8} {'arch/s':>8} {'x real':>8} {'CPU propia':>11} {'CPU hijos':>10} {'CPU/h audio':>12}")
+    for m in mediciones:
+        print(f"{m['camino']:<8} {m['tiempo_segundos']:>7.2f}s {m['archivos_por_segundo']:>8.1f} "
+              f"{m['factor_tiempo_real']:>7.0f}x {m['cpu_proceso_segundos']:>10.2f}s "
+              f"{m['cpu_subprocesos_segundos']:>9.2f}s {m['cpu_por_hora_audio_segundos']:>11.1f}s")
+
+    ffmpeg, interna = mediciones
+    print(f"\n🚀 Interna: {interna['archivos_por_segundo'] / ffmpeg['archivos_por_segundo']:.1f}x archivos/s, "
+          f"{interna['cpu_por_hora_audio_segundos'] / ffmpeg['cpu_por_hora_audio_segundos']:.0%} de la CPU de ffmpeg")
+    print(f"🔬 Diferencia con ffmpeg: SNR {comparacion['snr_db']:.1f} dB "
+          f"({comparacion['muestras_interna']} vs {comparacion['muestras_ffmpeg']} muestras)")
+    print(f"♻️ Buffers: {transcriptor_interno.procesador.estadisticas()}")
+
+    if not args.no_guardar:
+        parametros = {k: v for k, v in vars(args).items() if k != "no_guardar"}
+        ruta = guardar_ejecucion(NOMBRE, {"caminos": mediciones, "comparacion": comparacion}, parametros)
+        print(f"\n💾 Resultados añadidos a {ruta}")
+
+
+if __name__ == "__main__":
+    main()
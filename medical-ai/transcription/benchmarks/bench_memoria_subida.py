@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memoria al subir grabaciones grandes
+
+Sube el mismo WAV de varios GB al mock con tres estrategias y mide el pico
+de memoria residente (ru_maxrss) de cada una, en un proceso aparte para que
+los picos no se mezclen:
+
+- leer_todo: `f.read()` del archivo completo y subida del buffer (lo que
+  hacía scripts_node/transcripcion/transcriptor_deepgram.py)
+- bloques: el archivo abierto, leído en bloques de tamaño fijo por el cliente
+  compartido y enviado con transferencia chunked
+- mmap: igual, pero entregando vistas de un mmap y descartando las páginas ya
+  enviadas
+
+Se informa el RSS antes de subir (intérprete + módulos) y el pico durante la
+subida. El WAV se crea disperso (cabecera + ceros), así que no ocupa disco.
+Los resultados se añaden a benchmarks/resultados/memoria_subida.jsonl.
+
+Uso:
+    python benchmarks/bench_memoria_subida.py --gigas 2
+    python benchmarks/bench_memoria_subida.py --gigas 4 --modos bloques mmap --tamano-bloque-kb 1024
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from registro import guardar_ejecucion
+
+NOMBRE = "memoria_subida"
+MODOS = ("leer_todo", "bloques", "mmap")
+API_KEY_MOCK = "0" * 40
+
+
+def crear_wav_disperso(ruta, gigas):
+    """
+    WAV 16 kHz mono con `gigas` GB de silencio, sin escribir los datos en disco
+    """
+    from procesado_audio import cabecera_wav
+
+    bytes_pcm = int(gigas * 1024 ** 3) // 2 * 2
+    with open(ruta, "wb") as f:
+        f.write(cabecera_wav(min(bytes_pcm, 0xFFFFFFFF - 36)))
+        f.truncate(44 + bytes_pcm)
+
+
+def _rss_mb():
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maximo / 1024 ** 2 if sys.platform == "darwin" else maximo / 1024
+
+
+async def subir(modo, ruta, api_url, tamano_bloque):
+    """
+    Proceso hijo: una subida con la estrategia indicada; devuelve sus mediciones
+    """
+    from cliente_http import ClienteDeepgram
+
+    cliente = ClienteDeepgram(API_KEY_MOCK, api_url, tamano_bloque=tamano_bloque, mapear_archivos=modo == "mmap")
+    rss_base = _rss_mb()
+    inicio = time.perf_counter()
+
+    with open(ruta, "rb") as f:
+        if modo == "leer_todo":
+            await cliente.prerecorded({"buffer": f.read(), "mimetype": "audio/wav"})
+        else:
+            await cliente.prerecorded({"buffer": f, "mimetype": "audio/wav"})
+
+    transcurrido = time.perf_counter() - inicio
+    await cliente.cerrar()
+    megabytes = os.path.getsize(ruta) / 1024 ** 2
+
+    return {
+        "modo": modo,
+        "megabytes": megabytes,
+        "tiempo_segundos": transcurrido,
+        "mb_por_segundo": megabytes / transcurrido,
+        "rss_base_mb": rss_base,
+        "rss_pico_mb": _rss_mb(),
+    }
+
+
+async def principal(args):
+    from servidor_mock import ServidorMock
+
+    servidor = await ServidorMock(latencia="fija:0", minutos_respuesta=1).iniciar(puerto=args.puerto_mock)
+    api_url = f"http://127.0.0.1:{args.puerto_mock}/v1"
+
+    try:
+        with tempfile.TemporaryDirectory() as temporal:
+            ruta = args.audio
+            if not ruta:
+                ruta = os.path.join(temporal, "grabacion_larga.wav")
+                crear_wav_disperso(ruta, args.gigas)
+
+            mediciones = []
+            for modo in args.modos:
+                # Proceso aparte por modo: ru_maxrss es el pico de toda la vida del proceso
+                proceso = await asyncio.create_subprocess_exec(
+                    sys.executable, os.path.abspath(__file__), "--hijo", modo, "--audio", ruta,
+                    "--api-url", api_url, "--tamano-bloque-kb", str(args.tamano_bloque_kb),
+                    stdout=asyncio.subprocess.PIPE
+                )
+                salida, _ = await proceso.communicate()
+                if proceso.returncode != 0:
+                    raise RuntimeError(f"La subida en modo {modo} falló (código {proceso.returncode})")
+                mediciones.append(json.loads(salida))
+            return mediciones
+    finally:
+        await servidor.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de memoria al subir grabaciones grandes")
+    parser.add_argument("--gigas", type=float, default=2, help="Tamaño del WAV sintético")
+    parser.add_argument("--audio", help="Grabación a subir (por defecto un WAV disperso de --gigas GB)")
+    parser.add_argument("--modos", nargs="+", default=list(MODOS), choices=MODOS)
+    parser.add_argument("--tamano-bloque-kb", type=int, default=256)
+    parser.add_argument("--puerto-mock", type=int, default=8789)
+    parser.add_argument("--no-guardar", action="store_true")
+    parser.add_argument("--hijo", choices=MODOS, help=argparse.SUPPRESS)
+    parser.add_argument("--api-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        medicion = asyncio.run(subir(args.hijo, args.audio, args.api_url, args.tamano_bloque_kb * 1024))
+        print(json.dumps(medicion))
+        return
+
+    print(f"🧠 MEMORIA EN SUBIDA: {args.audio or f'WAV de {args.gigas:g} GB'}, bloques de {args.tamano_bloque_kb} KB")
+    print("=" * 40)
+
+    mediciones = asyncio.run(principal(args))
+
+    print(f"{'modo':<10} {'MB':>8} {'tiempo':>8} {'MB/s':>8} {'RSS base':>9} {'RSS pico':>9}")
+    for m in mediciones:
+        print(f"{m['modo']:<10} {m['megabytes']:>8.0f} {m['tiempo_segundos']:>7.2f}s {m['mb_por_segundo']:>8.0f} "
+              f"{m['rss_base_mb']:>7.0f}MB {m['rss_pico_mb']:>7.0f}MB")
+
+    if not args.no_guardar:
+        parametros = {k: v for k, v in vars(args).items() if k not in ("no_guardar", "hijo", "api_url")}
+        ruta = guardar_ejecucion(NOMBRE, mediciones, parametros)
+        print(f"\n💾 Resultados añadidos a {ruta}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Benchmark offline del camino posterior a la API
+
+Ejecuta cada etapa de TranscriptorMedico sobre respuestas sintéticas de
+1, 10, 60 y 180 minutos (y las guardadas en benchmarks/fixtures/), sin red
+ni API key, y mide tiempo, pico de memoria y palabras por segundo:
+
+- analisis_contenido: _analizar_contenido_medico
+- speakers: _analizar_speakers
+- turnos: construir_turnos
+- guardar: _guardar_transcripcion_completa
+- procesar_respuesta: _procesar_respuesta_completa (todo lo anterior + resumen)
+- extremo_a_extremo: transcribir_optimizado con el cliente falso y su latencia
+
+Los resultados se añaden a benchmarks/resultados/postproceso.jsonl.
+
+Uso:
+    python benchmarks/bench_postproceso.py --minutos 1 10 60 --latencia 0.5 --comparar
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from transcriptor_medico_final import TranscriptorMedico
+from turnos import construir_turnos
+
+from cliente_falso import ClienteFalso
+from fixtures import respuesta_sintetica, fixtures_guardadas, palabras_de
+from registro import guardar_ejecucion, ultima_ejecucion
+
+NOMBRE = "postproceso"
+
+
+def _crear_wav_silencio(ruta, segundos=1):
+    with wave.open(ruta, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(16000)
+        w.writeframes(b"\0\0" * 16000 * segundos)
+
+
+def _etapas(transcriptor, respuesta, wav):
+    """
+    {etapa: corrutina sin argumentos} para una respuesta
+    """
+    alternativa = respuesta["results"]["channels"][0]["alternatives"][0]
+    transcript = alternativa["transcript"]
+    words = alternativa.get("words", [])
+
+    resultado_base = {
+        "transcript": transcript,
+        "confidence": alternativa.get("confidence", 0),
+        "archivo": "benchmark.wav",
+        "timestamp": "2025-01-01T00:00:00",
+        "modelo": "nova-2",
+        "analisis": asyncio.run(transcriptor._analizar_contenido_medico(transcript, words)),
+        "speakers": transcriptor._analizar_speakers(words)
+    }
+    resultado_base["turnos"], resultado_base["dinamica"] = construir_turnos(words)
+
+    async def analisis_contenido():
+        await transcriptor._analizar_contenido_medico(transcript, words)
+
+    async def speakers():
+        transcriptor._analizar_speakers(words)
+
+    async def turnos():
+        construir_turnos(words)
+
+    async def guardar():
+        await transcriptor._guardar_transcripcion_completa(resultado_base, True)
+
+    async def procesar_respuesta():
+        await transcriptor._procesar_respuesta_completa(respuesta, "benchmark.wav", True)
+
+    async def extremo_a_extremo():
+        await transcriptor.transcribir_optimizado(wav)
+
+    return {
+        "analisis_contenido": analisis_contenido,
+        "speakers": speakers,
+        "turnos": turnos,
+        "guardar": guardar,
+        "procesar_respuesta": procesar_respuesta,
+        "extremo_a_extremo": extremo_a_extremo
+    }
+
+
+def _medir(etapa, repeticiones):
+    """
+    (mediana de segundos, pico de memoria en MB) de una etapa
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        asyncio.run(etapa())
+        tiempos.append(time.perf_counter() - inicio)
+
+    # Memoria en una pasada aparte: tracemalloc distorsiona los tiempos
+    tracemalloc.start()
+    asyncio.run(etapa())
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return statistics.median(tiempos), pico / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline del post-proceso de transcripciones")
+    parser.add_argument("--minutos", type=float, nargs="+", default=[1, 10, 60, 180])
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--latencia", type=float, default=0.0, help="Latencia del cliente falso (s)")
+    parser.add_argument("--etapas", nargs="+", help="Limitar a estas etapas")
+    parser.add_argument("--comparar", action="store_true", help="Comparar con la ejecución anterior")
+    parser.add_argument("--no-guardar", action="store_true")
+    args = parser.parse_args()
+
+    fixtures = {f"sintetica_{m:g}min": respuesta_sintetica(m) for m in args.minutos}
+    fixtures.update(fixtures_guardadas())
+
+    anterior = ultima_ejecucion(NOMBRE) if args.comparar else None
+    referencia = {}
+    if anterior:
+        for medicion in anterior["mediciones"]:
+            referencia[(medicion["fixture"], medicion["etapa"])] = medicion["segundos"]
+
+    mediciones = []
+    directorio_original = os.getcwd()
+
+    print("🧪 BENCHMARK OFFLINE DEL POST-PROCESO")
+    print("=" * 78)
+    print(f"{'fixture':<22}{'etapa':<22}{'palabras':>9}{'segundos':>10}{'pico MB':>9}{'palabras/s':>12}")
+
+    with tempfile.TemporaryDirectory() as temporal:
+        # Los reportes se escriben en el directorio actual
+        os.chdir(temporal)
+        wav = os.path.join(temporal, "benchmark.wav")
+        _crear_wav_silencio(wav)
+
+        try:
+            for nombre, respuesta in fixtures.items():
+                transcriptor = TranscriptorMedico(usar_cache=False, reutilizar_segmentos=False, indexar=False)
+                transcriptor.dg = ClienteFalso(respuesta, latencia_base=args.latencia)
+                palabras = len(palabras_de(respuesta))
+
+                with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+                    etapas = _etapas(transcriptor, respuesta, wav)
+
+                for etapa, corrutina in etapas.items():
+                    if args.etapas and etapa not in args.etapas:
+                        continue
+
+                    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+                        segundos, pico_mb = _medir(corrutina, args.repeticiones)
+
+                    medicion = {
+                        "fixture": nombre,
+                        "etapa": etapa,
+                        "palabras": palabras,
+                        "segundos": segundos,
+                        "pico_mb": pico_mb,
+                        "palabras_por_segundo": palabras / segundos if segundos > 0 else None
+                    }
+                    mediciones.append(medicion)
+
+                    linea = (f"{nombre:<22}{etapa:<22}{palabras:>9}{segundos:>10.4f}{pico_mb:>9.1f}"
+                             f"{(medicion['palabras_por_segundo'] or 0):>12.0f}")
+                    previo = referencia.get((nombre, etapa))
+                    if previo:
+                        linea += f"  ({(segundos - previo) / previo:+.0%} vs anterior)"
+                    print(linea)
+        finally:
+            os.chdir(directorio_original)
+
+    if not args.no_guardar:
+        ruta = guardar_ejecucion(NOMBRE, mediciones, {"repeticiones": args.repeticiones, "latencia": args.latencia})
+        print(f"\n💾 Resultados añadidos a {ruta}")
+
+
+if __name__ == "__main__":
+    main()
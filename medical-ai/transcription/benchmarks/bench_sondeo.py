@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark del listado de un archivo grande de grabaciones
+
+Crea N archivos repartidos entre WAV, FLAC, MP3 (CBR y VBR) y M4A y mide
+cuánto tarda en obtenerse la duración de todos:
+
+- frio: sondeo de cabeceras en paralelo con la caché vacía
+- caliente: el mismo listado otra vez (solo stat + consulta a SQLite)
+- ffprobe: un proceso por archivo sobre una muestra, extrapolado a N
+  (si ffprobe está instalado)
+
+También comprueba la precisión: la diferencia máxima entre la duración
+sondeada y la real de cada formato. Para no llenar el disco los archivos
+son enlaces duros a una grabación corta por formato (cada ruta se sondea y
+guarda en caché por separado).
+Los resultados se añaden a benchmarks/resultados/sondeo.jsonl.
+
+Uso:
+    python benchmarks/bench_sondeo.py --archivos 20000
+    python benchmarks/bench_sondeo.py --archivos 5000 --workers 32 --muestra-ffprobe 100
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sondeo_audio import SondeoAudio, estimar_costo
+
+from bench_codecs import crear_voz_sintetica
+from registro import guardar_ejecucion
+
+NOMBRE = "sondeo"
+
+# Extensión y opciones de ffmpeg de cada variante
+FORMATOS = {
+    "wav": ("wav", []),
+    "flac": ("flac", []),
+    "mp3_cbr": ("mp3", ["-b:a", "64k"]),
+    "mp3_vbr": ("mp3", ["-q:a", "5"]),
+    "m4a": ("m4a", ["-b:a", "64k"]),
+}
+
+
+def crear_archivo(directorio, cantidad, segundos):
+    """
+    Una grabación por formato y `cantidad` rutas enlazadas a ellas, repartidas
+    en subcarpetas como un archivo real; devuelve (rutas, formato de cada una)
+    """
+    base = os.path.join(directorio, "base.wav")
+    crear_voz_sintetica(base, segundos, 44100)
+
+    fuentes = {}
+    for variante, (extension, opciones) in FORMATOS.items():
+        fuentes[variante] = os.path.join(directorio, f"fuente_{variante}.{extension}")
+        subprocess.run(['ffmpeg', '-loglevel', 'error', '-i', base, *opciones, '-y', fuentes[variante]], check=True)
+
+    rutas, variantes = [], []
+    nombres = list(FORMATOS)
+    for i in range(cantidad):
+        variante = nombres[i % len(nombres)]
+        carpeta = os.path.join(directorio, "archivo", f"{i // 1000:03d}")
+        os.makedirs(carpeta, exist_ok=True)
+        ruta = os.path.join(carpeta, f"consulta_{i:06d}.{FORMATOS[variante][0]}")
+        try:
+            os.link(fuentes[variante], ruta)
+        except OSError:
+            shutil.copyfile(fuentes[variante], ruta)
+        rutas.append(ruta)
+        variantes.append(variante)
+    return rutas, variantes
+
+
+def medir_sondeo(sondeo, rutas):
+    inicio = time.perf_counter()
+    sondeos = sondeo.sondear_lote(rutas)
+    return sondeos, time.perf_counter() - inicio
+
+
+def medir_ffprobe(rutas):
+    inicio = time.perf_counter()
+    for ruta in rutas:
+        subprocess.run(
+            ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'csv=p=0', ruta],
+            capture_output=True, check=True
+        )
+    return (time.perf_counter() - inicio) / len(rutas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del sondeo de cabeceras frente a ffprobe")
+    parser.add_argument("--archivos", type=int, default=20000)
+    parser.add_argument("--segundos", type=int, default=20, help="Duración de cada grabación")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--muestra-ffprobe", type=int, default=200, help="Archivos medidos con ffprobe (0 = omitir)")
+    parser.add_argument("--no-guardar", action="store_true")
+    args = parser.parse_args()
+
+    print(f"🔎 SONDEO: {args.archivos} archivos de {args.segundos}s ({', '.join(FORMATOS)}), {args.workers} workers")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as temporal:
+        rutas, variantes = crear_archivo(temporal, args.archivos, args.segundos)
+        sondeo = SondeoAudio(os.path.join(temporal, "sondeos.db"), args.workers)
+
+        sondeos, tiempo_frio = medir_sondeo(sondeo, rutas)
+        _, tiempo_caliente = medir_sondeo(sondeo, rutas)
+
+        errores = {}
+        for s, variante in zip(sondeos, variantes):
+            error = abs(s["duracion"] - args.segundos) if s["duracion"] is not None else float("inf")
+            errores[variante] = max(errores.get(variante, 0.0), error)
+
+        tiempo_ffprobe = None
+        if args.muestra_ffprobe and shutil.which("ffprobe"):
+            tiempo_ffprobe = medir_ffprobe(rutas[:args.muestra_ffprobe]) * len(rutas)
+
+    total = estimar_costo(sondeos)
+    mediciones = {
+        "archivos": len(rutas),
+        "frio_segundos": tiempo_frio,
+        "caliente_segundos": tiempo_caliente,
+        "ffprobe_estimado_segundos": tiempo_ffprobe,
+        "archivos_por_segundo_frio": len(rutas) / tiempo_frio,
+        "archivos_por_segundo_caliente": len(rutas) / tiempo_caliente,
+        "error_maximo_segundos": errores,
+        "audio_segundos": total["audio_segundos"],
+    }
+
+    print(f"❄️ Caché vacía:  {tiempo_frio:6.2f}s ({mediciones['archivos_por_segundo_frio']:,.0f} archivos/s)")
+    print(f"🔥 Caché llena:  {tiempo_caliente:6.2f}s ({mediciones['archivos_por_segundo_caliente']:,.0f} archivos/s)")
+    if tiempo_ffprobe is not None:
+        print(f"🐢 ffprobe:      {tiempo_ffprobe:6.2f}s (estimado con {args.muestra_ffprobe} archivos, "
+              f"{tiempo_ffprobe / tiempo_frio:.0f}x más lento)")
+    else:
+        print("🐢 ffprobe:      omitido")
+    print("🎯 Error máximo de duración: " + ", ".join(f"{v} {e * 1000:.1f} ms" for v, e in errores.items()))
+
+    if not args.no_guardar:
+        parametros = {k: v for k, v in vars(args).items() if k != "no_guardar"}
+        ruta = guardar_ejecucion(NOMBRE, mediciones, parametros)
+        print(f"\n💾 Resultados añadidos a {ruta}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Cliente falso de Deepgram que reproduce respuestas guardadas
+
+Se asigna a `transcriptor.dg` y expone la misma llamada que el SDK
+(`transcription.prerecorded(source, options)`): consume el audio como lo
+haría una subida real y devuelve la respuesta tras una latencia configurable.
+"""
+
+import asyncio
+import random
+
+
+class _TranscripcionFalsa:
+    def __init__(self, cliente):
+        self._cliente = cliente
+
+    async def prerecorded(self, source, options=None, **kwargs):
+        return await self._cliente._responder(source)
+
+
+class ClienteFalso:
+    """
+    Reproduce `respuestas` (una respuesta fija o una lista en rotación) con
+    latencia_base + latencia_por_mb * MB subidos + jitter aleatorio
+    """
+
+    def __init__(self, respuestas, latencia_base=0.0, latencia_por_mb=0.0, jitter=0.0, semilla=0):
+        self.respuestas = respuestas if isinstance(respuestas, list) else [respuestas]
+        self.latencia_base = latencia_base
+        self.latencia_por_mb = latencia_por_mb
+        self.jitter = jitter
+        self.transcription = _TranscripcionFalsa(self)
+
+        self.llamadas = 0
+        self.bytes_recibidos = 0
+        self._aleatorio = random.Random(semilla)
+
+    async def _consumir(self, buffer):
+        if isinstance(buffer, (bytes, bytearray, memoryview)):
+            return len(buffer)
+        if hasattr(buffer, "read"):
+            return len(buffer.read())
+        total = 0
+        async for bloque in buffer:
+            total += len(bloque)
+        return total
+
+    async def _responder(self, source):
+        recibidos = await self._consumir(source["buffer"])
+        self.bytes_recibidos += recibidos
+
+        latencia = self.latencia_base + self.latencia_por_mb * recibidos / (1024 * 1024)
+        if self.jitter:
+            latencia += self._aleatorio.uniform(0, self.jitter)
+        await asyncio.sleep(latencia)
+
+        respuesta = self.respuestas[self.llamadas % len(self.respuestas)]
+        self.llamadas += 1
+        return respuesta
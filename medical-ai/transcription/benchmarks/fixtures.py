@@ -0,0 +1,103 @@
+"""
+Fixtures de respuestas de Deepgram para benchmarks sin red ni API key
+
+Las respuestas sintéticas imitan la forma de una respuesta prerecorded de
+nova-2 con diarización: consulta médico/paciente a ~150 palabras por minuto,
+turnos alternos y vocabulario médico. Son deterministas (semilla fija) para
+que los resultados sean comparables entre ejecuciones. También se pueden
+usar respuestas reales guardadas como JSON en benchmarks/fixtures/.
+"""
+
+import glob
+import json
+import os
+import random
+
+DIRECTORIO_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+PALABRAS_POR_MINUTO = 150
+
+FRASES_MEDICO = [
+    "¿cómo se ha sentido desde la última consulta?",
+    "¿el dolor aparece por la mañana o por la noche?",
+    "vamos a ajustar la dosis del medicamento.",
+    "en una escala del uno al diez, ¿qué intensidad tiene?",
+    "¿ha notado palpitaciones o mareo esta semana?",
+    "seguiremos con el mismo tratamiento un mes más.",
+]
+
+FRASES_PACIENTE = [
+    "me siento mejor pero sigo con insomnio.",
+    "la ansiedad es más fuerte por la noche.",
+    "tomo la pastilla todos los días con el desayuno.",
+    "a veces tengo náuseas y fatiga después de comer.",
+    "estoy más tranquilo, aunque el estrés del trabajo sigue igual.",
+    "el dolor de cabeza es ocasional, no diario.",
+]
+
+
+def respuesta_sintetica(minutos, semilla=42):
+    """
+    Respuesta con forma Deepgram de `minutos` de consulta diarizada
+    """
+    aleatorio = random.Random(semilla)
+    total_palabras = int(minutos * PALABRAS_POR_MINUTO)
+    segundos_por_palabra = 60.0 / PALABRAS_POR_MINUTO
+
+    words = []
+    t = 0.0
+    speaker = 0
+    while len(words) < total_palabras:
+        frases = FRASES_MEDICO if speaker == 0 else FRASES_PACIENTE
+        for _ in range(aleatorio.randint(1, 3)):
+            for token in aleatorio.choice(frases).split():
+                duracion = segundos_por_palabra * aleatorio.uniform(0.6, 0.9)
+                words.append({
+                    "word": token.strip("¿?.,").lower(),
+                    "punctuated_word": token,
+                    "start": round(t, 3),
+                    "end": round(t + duracion, 3),
+                    "confidence": round(aleatorio.uniform(0.85, 1.0), 4),
+                    "speaker": speaker,
+                    "speaker_confidence": round(aleatorio.uniform(0.5, 1.0), 4)
+                })
+                t += segundos_por_palabra
+        # Pausa entre turnos: latencia de respuesta
+        t += aleatorio.uniform(0.2, 1.5)
+        speaker = 1 - speaker
+
+    words = words[:total_palabras]
+    transcript = " ".join(w["punctuated_word"] for w in words)
+
+    return {
+        "metadata": {
+            "request_id": f"00000000-0000-0000-0000-{semilla:012d}",
+            "duration": words[-1]["end"] if words else 0.0,
+            "channels": 1,
+            "models": ["nova-2"]
+        },
+        "results": {
+            "channels": [{
+                "alternatives": [{
+                    "transcript": transcript,
+                    "confidence": round(sum(w["confidence"] for w in words) / len(words), 4) if words else 0.0,
+                    "words": words
+                }]
+            }]
+        }
+    }
+
+
+def fixtures_guardadas():
+    """
+    {nombre: respuesta} de los JSON guardados en benchmarks/fixtures/
+    """
+    fixtures = {}
+    for ruta in sorted(glob.glob(os.path.join(DIRECTORIO_FIXTURES, "*.json"))):
+        with open(ruta, "r", encoding="utf-8") as f:
+            fixtures[os.path.splitext(os.path.basename(ruta))[0]] = json.load(f)
+    return fixtures
+
+
+def palabras_de(respuesta):
+    return respuesta["results"]["channels"][0]["alternatives"][0].get("words", [])
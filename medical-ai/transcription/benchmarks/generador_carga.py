@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Generador de carga para TranscriptorMedico
+
+Lanza sesiones a una tasa objetivo (llegadas abiertas: no espera a que
+terminen las anteriores) contra el servidor mock o cualquier URL base, y
+reporta percentiles de latencia, rendimiento, errores y el retraso del event
+loop, para saber cuántas sesiones concurrentes soporta una máquina antes de
+que se saturen el event loop, ffmpeg o el disco.
+
+Modos:
+- archivo: sube un WAV ya preparado (event loop + red)
+- ffmpeg: crea el segmento con ffmpeg en un hilo y lo sube (CPU + disco + red)
+- streaming: ffmpeg por stdout directamente a la subida
+
+Uso:
+    # Arranca un mock interno con la latencia indicada
+    python benchmarks/generador_carga.py --tasa 5 --duracion 60 --latencia-mock lognormal:1.5:0.4
+
+    # Contra un servidor ya levantado
+    python benchmarks/generador_carga.py --api-url http://127.0.0.1:8787/v1 --tasa 10 --sesiones 200
+"""
+
+import argparse
+import asyncio
+import contextlib
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from transcriptor_medico_final import TranscriptorMedico
+from cliente_http import cerrar_clientes
+
+from registro import guardar_ejecucion
+
+NOMBRE = "carga"
+API_KEY_MOCK = "0" * 40
+
+
+def crear_audio_prueba(ruta, segundos, frecuencia=16000):
+    """
+    WAV mono 16-bit con un tono, para que ffmpeg tenga algo que filtrar
+    """
+    muestras = bytearray()
+    for i in range(int(segundos * frecuencia)):
+        valor = int(8000 * math.sin(2 * math.pi * 440 * i / frecuencia))
+        muestras += valor.to_bytes(2, "little", signed=True)
+
+    with wave.open(ruta, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(frecuencia)
+        w.writeframes(bytes(muestras))
+
+
+def percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, math.ceil(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+async def vigilar_event_loop(muestras, intervalo=0.05):
+    """
+    Retraso del event loop: cuánto tarda en despertar un sleep de `intervalo`
+    """
+    while True:
+        inicio = time.perf_counter()
+        await asyncio.sleep(intervalo)
+        muestras.append(time.perf_counter() - inicio - intervalo)
+
+
+async def ejecutar_carga(args, audio):
+    transcriptor = TranscriptorMedico(
+        api_key=args.api_key or API_KEY_MOCK,
+        api_url=args.api_url,
+        usar_cache=False,
+        reutilizar_segmentos=False,
+        silencioso=True,
+        indexar=False
+    )
+
+    async def sesion():
+        inicio = time.perf_counter()
+        if args.modo == "archivo":
+            resultado = await transcriptor.transcribir_optimizado(audio)
+        elif args.modo == "ffmpeg":
+            # Sin almacén el segmento se escribe junto al original con un nombre fijo: cada sesión enlaza
+            # el audio en su propio directorio para que las sesiones concurrentes no se pisen el archivo
+            with tempfile.TemporaryDirectory(prefix="carga_") as directorio:
+                enlace = os.path.join(directorio, os.path.basename(audio))
+                os.symlink(os.path.abspath(audio), enlace)
+                segmento = await asyncio.to_thread(transcriptor.crear_segmento_optimizado, enlace, args.segundos_audio)
+                resultado = await transcriptor.transcribir_optimizado(segmento) if segmento else None
+        else:
+            resultado = await transcriptor.transcribir_streaming(audio, args.segundos_audio)
+        return resultado is not None, time.perf_counter() - inicio
+
+    total = args.sesiones or int(args.tasa * args.duracion)
+    aleatorio = random.Random(args.semilla)
+    latencias = []
+    fallidas = 0
+    retrasos_loop = []
+
+    vigilante = asyncio.create_task(vigilar_event_loop(retrasos_loop))
+    inicio = time.perf_counter()
+    tareas = []
+
+    for _ in range(total):
+        tareas.append(asyncio.create_task(sesion()))
+        # Llegadas de Poisson a la tasa objetivo
+        await asyncio.sleep(aleatorio.expovariate(args.tasa))
+
+    for terminada in asyncio.as_completed(tareas):
+        ok, latencia = await terminada
+        if ok:
+            latencias.append(latencia)
+        else:
+            fallidas += 1
+
+    transcurrido = time.perf_counter() - inicio
+    vigilante.cancel()
+
+    return {
+        "sesiones": total,
+        "completadas": len(latencias),
+        "fallidas": fallidas,
+        "transcurrido_segundos": transcurrido,
+        "tasa_objetivo": args.tasa,
+        "rendimiento_sesiones_s": len(latencias) / transcurrido if transcurrido > 0 else 0.0,
+        "latencia_p50": percentil(latencias, 50),
+        "latencia_p90": percentil(latencias, 90),
+        "latencia_p99": percentil(latencias, 99),
+        "latencia_max": max(latencias) if latencias else None,
+        "latencia_media": statistics.mean(latencias) if latencias else None,
+        "retraso_loop_p99": percentil(retrasos_loop, 99),
+        "retraso_loop_max": max(retrasos_loop) if retrasos_loop else None,
+        "api": transcriptor.control.estadisticas(),
+        "conexiones_nuevas": transcriptor.dg.stats["conexiones_nuevas"]
+    }
+
+
+async def principal(args):
+    servidor = None
+    if not args.api_url:
+        from servidor_mock import ServidorMock
+
+        mock = ServidorMock(
+            latencia=args.latencia_mock,
+            tasa_error=args.tasa_error_mock,
+            tasa_429=args.tasa_429_mock,
+            max_concurrentes=args.max_concurrentes_mock,
+            semilla=args.semilla
+        )
+        servidor = await mock.iniciar(puerto=args.puerto_mock)
+        args.api_url = f"http://127.0.0.1:{args.puerto_mock}/v1"
+
+    try:
+        with tempfile.TemporaryDirectory() as temporal:
+            audio = args.audio
+            if not audio:
+                audio = os.path.join(temporal, "carga.wav")
+                crear_audio_prueba(audio, args.segundos_audio)
+
+            directorio_original = os.getcwd()
+            os.chdir(temporal)  # Los reportes se escriben en el directorio actual
+            try:
+                with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+                    return await ejecutar_carga(args, audio)
+            finally:
+                os.chdir(directorio_original)
+                await cerrar_clientes()
+    finally:
+        if servidor:
+            await servidor.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generador de carga para el transcriptor médico")
+    parser.add_argument("--tasa", type=float, default=2.0, help="Sesiones por segundo")
+    parser.add_argument("--duracion", type=float, default=30.0, help="Segundos de generación de carga")
+    parser.add_argument("--sesiones", type=int, help="Número fijo de sesiones (ignora --duracion)")
+    parser.add_argument("--modo", choices=["archivo", "ffmpeg", "streaming"], default="archivo")
+    parser.add_argument("--audio", help="Audio a usar (por defecto un tono generado)")
+    parser.add_argument("--segundos-audio", type=int, default=60)
+    parser.add_argument("--api-url", help="URL base (sin ella se arranca un mock interno)")
+    parser.add_argument("--api-key", help="API key para la URL indicada")
+    parser.add_argument("--puerto-mock", type=int, default=8787)
+    parser.add_argument("--latencia-mock", default="lognormal:1.5:0.4")
+    parser.add_argument("--tasa-error-mock", type=float, default=0.0)
+    parser.add_argument("--tasa-429-mock", type=float, default=0.0)
+    parser.add_argument("--max-concurrentes-mock", type=int, help="El mock responde 429 por encima de este límite")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--no-guardar", action="store_true")
+    args = parser.parse_args()
+
+    print(f"🚀 CARGA: {args.tasa:g} sesiones/s, modo {args.modo}")
+    print("=" * 40)
+
+    resultado = asyncio.run(principal(args))
+
+    def ms(valor):
+        return f"{valor * 1000:.0f} ms" if valor is not None else "-"
+
+    print(f"✅ Completadas: {resultado['completadas']}/{resultado['sesiones']} ({resultado['fallidas']} fallidas)")
+    print(f"📈 Rendimiento: {resultado['rendimiento_sesiones_s']:.2f} sesiones/s")
+    print(f"⏱️ Latencia p50 {ms(resultado['latencia_p50'])} | p90 {ms(resultado['latencia_p90'])} "
+          f"| p99 {ms(resultado['latencia_p99'])} | máx {ms(resultado['latencia_max'])}")
+    api = resultado["api"]
+    print(f"🚦 API: {api['llamadas']} llamadas, {api['reintentos']} reintentos "
+          f"({api['limitadas_429']} por 429), límite final {api['limite']:g}, {api['tasa']:g} peticiones/s")
+    print(f"🔌 Conexiones abiertas: {resultado['conexiones_nuevas']} para {api['llamadas']} llamadas")
+    print(f"🔄 Retraso del event loop p99 {ms(resultado['retraso_loop_p99'])} | máx {ms(resultado['retraso_loop_max'])}")
+
+    if not args.no_guardar:
+        parametros = {k: v for k, v in vars(args).items() if k not in ("api_key", "no_guardar")}
+        ruta = guardar_ejecucion(NOMBRE, [resultado], parametros)
+        print(f"\n💾 Resultados añadidos a {ruta}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Medición del tiempo de importación de transcriptor_medico_final
+
+Importa el módulo en un proceso limpio con `python -X importtime`, sin
+credenciales en el entorno, y comprueba que no imprime nada, no termina el
+proceso y cabe en el presupuesto de milisegundos indicado.
+
+Uso:
+    python benchmarks/medir_importacion.py --presupuesto-ms 150 --repeticiones 5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+DIRECTORIO_MODULO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULO = "transcriptor_medico_final"
+
+
+def medir_una_vez():
+    """
+    Importar el módulo una vez y devolver (ms totales, [(ms, módulo)], stdout, código de salida)
+    """
+    entorno = {k: v for k, v in os.environ.items() if k != "DEEPGRAM_API_KEY"}
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {MODULO}"],
+        cwd=DIRECTORIO_MODULO, env=entorno, capture_output=True, text=True
+    )
+
+    total = None
+    dependencias = []
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        _, acumulado, nombre = linea[len("import time:"):].split("|")
+        milisegundos = int(acumulado) / 1000
+        # Dos espacios de sangría por nivel: nivel 1 = importado directamente por el módulo
+        nivel = (len(nombre) - len(nombre.lstrip()) - 1) // 2
+        nombre = nombre.strip()
+        if nombre == MODULO:
+            total = milisegundos
+            break
+        if nivel == 0:
+            # Los hijos se listan antes que su padre: lo anterior era de otro módulo
+            dependencias = []
+        elif nivel == 1:
+            dependencias.append((milisegundos, nombre))
+
+    return total, dependencias, proceso.stdout, proceso.returncode
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de importación del transcriptor médico")
+    parser.add_argument("--presupuesto-ms", type=float, default=150.0)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"⏱️ IMPORTACIÓN DE {MODULO}")
+    print("=" * 40)
+
+    tiempos = []
+    for _ in range(args.repeticiones):
+        total, dependencias, salida, codigo = medir_una_vez()
+        if codigo != 0 or total is None:
+            print(f"❌ La importación falló (código {codigo})")
+            return 1
+        if salida.strip():
+            print(f"❌ Importar el módulo imprime en stdout: {salida.strip()[:200]}")
+            return 1
+        tiempos.append(total)
+
+    mediana = statistics.median(tiempos)
+    print(f"📊 Mediana: {mediana:.1f} ms (mín. {min(tiempos):.1f}, máx. {max(tiempos):.1f})")
+
+    print("\n📦 Dependencias más pesadas (última ejecución):")
+    for ms, nombre in sorted(dependencias, reverse=True)[:10]:
+        print(f"  • {nombre}: {ms:.1f} ms")
+
+    if mediana > args.presupuesto_ms:
+        print(f"\n❌ Supera el presupuesto de {args.presupuesto_ms:.0f} ms")
+        return 1
+
+    print(f"\n✅ Dentro del presupuesto de {args.presupuesto_ms:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""
+Registro de resultados de benchmarks en benchmarks/resultados/<nombre>.jsonl
+
+Cada ejecución añade una línea con fecha, commit, versión de Python y sus
+mediciones, para poder comparar ejecuciones a lo largo del tiempo.
+"""
+
+import json
+import os
+import platform
+import subprocess
+from datetime import datetime
+
+DIRECTORIO_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultados")
+
+
+def _commit_actual():
+    try:
+        resultado = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True
+        )
+        return resultado.stdout.strip() if resultado.returncode == 0 else None
+    except FileNotFoundError:
+        return None
+
+
+def ultima_ejecucion(nombre):
+    """
+    Última ejecución registrada del benchmark, o None
+    """
+    ruta = os.path.join(DIRECTORIO_RESULTADOS, f"{nombre}.jsonl")
+    if not os.path.exists(ruta):
+        return None
+
+    ultima = None
+    with open(ruta, "r", encoding="utf-8") as f:
+        for linea in f:
+            if linea.strip():
+                ultima = linea
+    return json.loads(ultima) if ultima else None
+
+
+def guardar_ejecucion(nombre, mediciones, parametros=None):
+    """
+    Añadir una ejecución al registro y devolver la ruta del archivo
+    """
+    os.makedirs(DIRECTORIO_RESULTADOS, exist_ok=True)
+    ruta = os.path.join(DIRECTORIO_RESULTADOS, f"{nombre}.jsonl")
+
+    ejecucion = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit_actual(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "parametros": parametros or {},
+        "mediciones": mediciones
+    }
+
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write(json.dumps(ejecucion, ensure_ascii=False) + "\n")
+
+    return ruta
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Servidor local que imita el endpoint prerecorded de Deepgram (POST /v1/listen)
+
+Sirve para pruebas de capacidad sin coste ni límites de la API real. Lee el
+audio completo (también con transferencia chunked), espera una latencia
+muestreada de la distribución configurada y responde con una respuesta
+sintética cuyo tamaño es proporcional al audio recibido, o con errores 5xx
+y 429 (con Retry-After) en las proporciones indicadas.
+
+Se conecta al transcriptor cambiando la URL base:
+
+    python benchmarks/servidor_mock.py --puerto 8787 --latencia lognormal:1.5:0.4 --tasa-429 0.05
+    DEEPGRAM_API_URL=http://127.0.0.1:8787/v1 python transcriptor_medico_final.py
+
+GET /stats devuelve los contadores del servidor.
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import sys
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fixtures import respuesta_sintetica
+
+BYTES_POR_SEGUNDO_WAV = 16000 * 2  # 16 kHz mono pcm_s16le
+
+
+def muestreador_latencia(especificacion, semilla=None):
+    """
+    Función sin argumentos que devuelve latencias en segundos. Formatos:
+    fija:1.0 | uniforme:0.5:2.0 | normal:1.5:0.3 | lognormal:1.5:0.4 | exponencial:1.5
+    (para lognormal y exponencial el primer valor es la media)
+    """
+    aleatorio = random.Random(semilla)
+    partes = especificacion.split(":")
+    tipo, valores = partes[0], [float(v) for v in partes[1:]]
+
+    if tipo == "fija":
+        return lambda: valores[0]
+    if tipo == "uniforme":
+        return lambda: aleatorio.uniform(valores[0], valores[1])
+    if tipo == "normal":
+        return lambda: max(0.0, aleatorio.gauss(valores[0], valores[1]))
+    if tipo == "lognormal":
+        media, sigma = valores
+        mu = math.log(media) - sigma ** 2 / 2
+        return lambda: aleatorio.lognormvariate(mu, sigma)
+    if tipo == "exponencial":
+        return lambda: aleatorio.expovariate(1 / valores[0])
+
+    raise ValueError(f"Distribución de latencia desconocida: {especificacion}")
+
+
+class ServidorMock:
+    """
+    Aplicación aiohttp con el comportamiento configurable del endpoint /v1/listen
+    """
+
+    def __init__(self, latencia="fija:0.5", tasa_error=0.0, tasa_429=0.0, retry_after=1.0,
+                 max_concurrentes=None, minutos_respuesta=None, semilla=None):
+        self.latencia = muestreador_latencia(latencia, semilla)
+        self.tasa_error = tasa_error
+        self.tasa_429 = tasa_429
+        self.retry_after = retry_after
+        self.max_concurrentes = max_concurrentes
+        self.minutos_respuesta = minutos_respuesta
+        self._aleatorio = random.Random(semilla)
+        self._respuestas = {}
+
+        self.en_curso = 0
+        self.stats = {"peticiones": 0, "ok": 0, "errores_5xx": 0, "errores_429": 0,
+                      "bytes_recibidos": 0, "max_en_curso": 0}
+
+        self.app = web.Application(client_max_size=4 * 1024 ** 3)
+        self.app.router.add_post("/v1/listen", self.listen)
+        self.app.router.add_get("/stats", self.estadisticas)
+
+    def _respuesta(self, minutos):
+        # Las respuestas se cachean por tamaño: generarlas no debe medir como latencia
+        minutos = round(minutos, 1)
+        if minutos not in self._respuestas:
+            self._respuestas[minutos] = respuesta_sintetica(minutos)
+        return self._respuestas[minutos]
+
+    async def listen(self, request):
+        self.stats["peticiones"] += 1
+        self.en_curso += 1
+        self.stats["max_en_curso"] = max(self.stats["max_en_curso"], self.en_curso)
+
+        try:
+            recibidos = 0
+            async for bloque in request.content.iter_any():
+                recibidos += len(bloque)
+            self.stats["bytes_recibidos"] += recibidos
+
+            limite_superado = self.max_concurrentes and self.en_curso > self.max_concurrentes
+            if limite_superado or self._aleatorio.random() < self.tasa_429:
+                self.stats["errores_429"] += 1
+                return web.json_response(
+                    {"err_code": "TOO_MANY_REQUESTS", "err_msg": "Too many requests (mock)"},
+                    status=429, headers={"Retry-After": f"{self.retry_after:g}"}
+                )
+
+            await asyncio.sleep(self.latencia())
+
+            if self._aleatorio.random() < self.tasa_error:
+                self.stats["errores_5xx"] += 1
+                return web.json_response(
+                    {"err_code": "INTERNAL_SERVER_ERROR", "err_msg": "Simulated failure (mock)"}, status=503
+                )
+
+            minutos = self.minutos_respuesta or max(recibidos / BYTES_POR_SEGUNDO_WAV / 60, 0.1)
+            self.stats["ok"] += 1
+            return web.json_response(self._respuesta(minutos))
+        finally:
+            self.en_curso -= 1
+
+    async def estadisticas(self, request):
+        return web.json_response({**self.stats, "en_curso": self.en_curso})
+
+    async def iniciar(self, host="127.0.0.1", puerto=8787):
+        """
+        Arrancar dentro del event loop actual; devuelve el runner para detenerlo con cleanup()
+        """
+        runner = web.AppRunner(self.app)
+        await runner.setup()
+        await web.TCPSite(runner, host, puerto).start()
+        return runner
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor mock del endpoint prerecorded de Deepgram")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8787)
+    parser.add_argument("--latencia", default="fija:0.5", help="Ej.: fija:1 | lognormal:1.5:0.4")
+    parser.add_argument("--tasa-error", type=float, default=0.0, help="Proporción de respuestas 503")
+    parser.add_argument("--tasa-429", type=float, default=0.0, help="Proporción de respuestas 429")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--max-concurrentes", type=int, help="Responder 429 por encima de este límite")
+    parser.add_argument("--minutos-respuesta", type=float, help="Tamaño fijo de respuesta (si no, según el audio)")
+    parser.add_argument("--semilla", type=int)
+    args = parser.parse_args()
+
+    servidor = ServidorMock(
+        latencia=args.latencia,
+        tasa_error=args.tasa_error,
+        tasa_429=args.tasa_429,
+        retry_after=args.retry_after,
+        max_concurrentes=args.max_concurrentes,
+        minutos_respuesta=args.minutos_respuesta,
+        semilla=args.semilla
+    )
+
+    print(f"🧪 Mock de Deepgram en http://{args.host}:{args.puerto}/v1 (latencia {args.latencia})")
+    web.run_app(servidor.app, host=args.host, port=args.puerto, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Comprobación de la unión de segmentos de una sesión completa
+
+Simula una consulta de dos speakers transcrita en segmentos solapados y
+comprueba que unir_segmentos conserva dos etiquetas, también cuando uno de
+los speakers no habla en el solape y Deepgram numera los speakers de cada
+segmento por orden de aparición o los intercambia. Si el solape queda en
+silencio, los segmentos inciertos se vuelven a transcribir con el solape
+ampliado (ampliar_solapes), como hace la sesión completa. Sin red ni API
+key; termina con código 1 si algún caso falla.
+
+Uso:
+    python benchmarks/verificar_sesion_completa.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sesion_completa import ampliar_solapes, planificar_segmentos, unir_segmentos
+
+DURACION = 230
+SEGMENTO = 120
+SOLAPE = 10
+
+
+def consulta(turnos):
+    """
+    Palabras con tiempos absolutos: una cada 0.5 s dentro de cada turno (inicio, fin, speaker real)
+    """
+    palabras = []
+    for inicio, fin, speaker in turnos:
+        t = inicio
+        while t < fin:
+            palabras.append({"word": f"p{len(palabras)}", "start": t, "end": t + 0.4, "speaker": speaker})
+            t += 0.5
+    return palabras
+
+
+def transcribir_segmentos(palabras, tramos, numeracion):
+    """
+    Lo que devolvería Deepgram por segmento (índice, inicio, duración):
+    tiempos relativos y etiquetas según `numeracion` ("aparicion" o "intercambiada")
+    """
+    segmentos = []
+    for indice, inicio, duracion in tramos:
+        tramo = [p for p in palabras if inicio <= p["start"] < inicio + duracion]
+        etiquetas = {}
+        words = []
+        for p in tramo:
+            if numeracion == "aparicion":
+                etiqueta = etiquetas.setdefault(p["speaker"], len(etiquetas))
+            else:
+                etiqueta = 1 - p["speaker"] if indice % 2 else p["speaker"]
+            words.append({**p, "start": p["start"] - inicio, "end": p["end"] - inicio, "speaker": etiqueta})
+        segmentos.append((inicio, duracion, words))
+    return segmentos
+
+
+def comprobar(nombre, turnos, numeracion):
+    palabras = consulta(turnos)
+    plan = planificar_segmentos(DURACION, SEGMENTO, SOLAPE)
+    segmentos = transcribir_segmentos(palabras, [(i, ini, dur) for i, (ini, dur) in enumerate(plan)], numeracion)
+
+    inciertos = []
+    unidas = unir_segmentos(segmentos, inciertos)
+    ampliados = ampliar_solapes(segmentos, inciertos)
+    if ampliados:
+        nuevos = transcribir_segmentos(palabras, [(i, ini, dur) for i, (ini, dur) in ampliados.items()], numeracion)
+        for indice, segmento in zip(ampliados, nuevos):
+            segmentos[indice] = segmento
+        unidas = unir_segmentos(segmentos)
+    reales = {p["start"]: p["speaker"] for p in palabras}
+
+    etiquetas = {p["speaker"] for p in unidas}
+    # Misma partición que la real: cada speaker real con una sola etiqueta y viceversa
+    parejas = {(reales[round(p["start"], 6)], p["speaker"]) for p in unidas}
+    correcto = len(etiquetas) == 2 and len(parejas) == 2
+    print(f"{'✅' if correcto else '❌'} {nombre} ({numeracion}): etiquetas {sorted(etiquetas)}, "
+          f"{len(ampliados)} solape(s) ampliado(s)")
+    return correcto
+
+
+def main():
+    # El médico habla hasta 100 s y vuelve a 125 s; el paciente, de 100 a 108 s y después de 125 s.
+    # En el solape (110-120 s) no habla nadie, y el paciente habla primero en el segundo segmento.
+    silencio_en_solape = [(0, 60, 0), (60, 100, 1), (100, 108, 1), (125, 160, 1), (160, 230, 0)]
+    # Solo el médico habla en el solape: el paciente se asigna por descarte
+    medico_en_solape = [(0, 60, 0), (60, 100, 1), (100, 125, 0), (125, 170, 1), (170, 230, 0)]
+    # Solape en silencio y el paciente domina el segundo segmento: contar palabras invertiría los roles
+    paciente_domina = [(0, 80, 0), (80, 100, 1), (125, 200, 1), (200, 230, 0)]
+
+    casos = (
+        ("solape en silencio", silencio_en_solape),
+        ("un speaker en el solape", medico_en_solape),
+        ("solape en silencio, domina el otro", paciente_domina),
+    )
+    resultados = [
+        comprobar(nombre, turnos, numeracion)
+        for nombre, turnos in casos
+        for numeracion in ("aparicion", "intercambiada")
+    ]
+    sys.exit(0 if all(resultados) else 1)
+
+
+if __name__ == "__main__":
+    main()
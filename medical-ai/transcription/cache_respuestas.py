@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import threading
+
+
+class CacheRespuestas:
+    """
+    Caché en disco de respuestas de Deepgram, direccionada por contenido:
+    la clave es el hash de los bytes de audio más las opciones de la
+    petición normalizadas. Expulsa por LRU cuando supera max_megabytes.
+    """
+
+    def __init__(self, directorio=None, max_megabytes=1024, omitir=False):
+        self.directorio = directorio or os.path.expanduser("~/.cache/transcriptor_medico/respuestas")
+        self.max_bytes = int(max_megabytes * 1024 * 1024)
+        self.omitir = omitir
+
+        self.aciertos = 0
+        self.fallos = 0
+        self.escrituras = 0
+        self.expulsiones = 0
+
+        self._lock = threading.Lock()
+        os.makedirs(self.directorio, exist_ok=True)
+        self._bytes_totales = sum(tamaño for _, _, tamaño in self._entradas())
+
+    def clave(self, audio, opciones, extra=""):
+        """
+        Hash del audio (bytes u objeto archivo, que se deja en su posición
+        inicial) y de las opciones normalizadas
+        """
+        hasher = hashlib.sha256()
+
+        if isinstance(audio, (bytes, bytearray, memoryview)):
+            hasher.update(audio)
+        else:
+            posicion = audio.tell()
+            for bloque in iter(lambda: audio.read(1024 * 1024), b""):
+                hasher.update(bloque)
+            audio.seek(posicion)
+
+        hasher.update(b"\0")
+        hasher.update(json.dumps(opciones, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        hasher.update(b"\0")
+        hasher.update(extra.encode("utf-8"))
+        return hasher.hexdigest()
+
+    def clave_archivo(self, ruta, opciones, extra=""):
+        """
+        Clave por identidad del archivo (ruta, tamaño y mtime) en lugar de su
+        contenido: para cuando solo se usa un tramo de una grabación grande y
+        hashearla entera costaría una lectura completa por petición
+        """
+        info = os.stat(ruta)
+        identidad = f"{os.path.abspath(ruta)}|{info.st_size}|{info.st_mtime_ns}"
+        return self.clave(identidad.encode("utf-8"), opciones, extra)
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, clave[:2], f"{clave}.json")
+
+    def obtener(self, clave):
+        """
+        Respuesta guardada o None; un acierto la marca como usada recientemente
+        """
+        ruta = self._ruta(clave)
+        try:
+            with open(ruta, "r", encoding="utf-8") as f:
+                respuesta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self._lock:
+                self.fallos += 1
+            return None
+
+        os.utime(ruta)  # mtime = último uso, base del LRU
+        with self._lock:
+            self.aciertos += 1
+        return respuesta
+
+    def guardar(self, clave, respuesta):
+        """
+        Guardar la respuesta cruda (escritura atómica) y expulsar si hace falta
+        """
+        ruta = self._ruta(clave)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+
+        temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(respuesta, f, ensure_ascii=False)
+
+        anterior = os.path.getsize(ruta) if os.path.exists(ruta) else 0
+        os.replace(temporal, ruta)
+
+        with self._lock:
+            self.escrituras += 1
+            self._bytes_totales += os.path.getsize(ruta) - anterior
+            if self._bytes_totales > self.max_bytes:
+                self._expulsar()
+
+    def _entradas(self):
+        """
+        (ruta, mtime, tamaño) de cada respuesta guardada
+        """
+        for raiz, _, archivos in os.walk(self.directorio):
+            for nombre in archivos:
+                if not nombre.endswith(".json"):
+                    continue
+                ruta = os.path.join(raiz, nombre)
+                try:
+                    info = os.stat(ruta)
+                except FileNotFoundError:
+                    continue
+                yield ruta, info.st_mtime, info.st_size
+
+    def _expulsar(self):
+        """
+        Borrar las entradas usadas hace más tiempo hasta bajar del 90% del límite
+        """
+        objetivo = self.max_bytes * 0.9
+        entradas = sorted(self._entradas(), key=lambda entrada: entrada[1])
+        self._bytes_totales = sum(tamaño for _, _, tamaño in entradas)
+
+        for ruta, _, tamaño in entradas:
+            if self._bytes_totales <= objetivo:
+                break
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+            self._bytes_totales -= tamaño
+            self.expulsiones += 1
+
+    def estadisticas(self):
+        """
+        Contadores de uso de la caché
+        """
+        consultas = self.aciertos + self.fallos
+        return {
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+            "escrituras": self.escrituras,
+            "expulsiones": self.expulsiones,
+            "megabytes": self._bytes_totales / (1024 * 1024),
+            "omitir": self.omitir
+        }
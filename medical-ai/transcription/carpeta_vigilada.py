@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Modo demonio: transcribir grabaciones en cuanto aparecen en una carpeta
+
+Vigila uno o varios directorios con eventos del sistema de archivos
+(inotify en Linux, FSEvents en macOS, vía watchdog), sin sondear. Cada
+archivo de audio se encola cuando deja de crecer, una sola vez por
+contenido (ruta + tamaño + fecha de modificación), y lo transcriben hasta
+max_concurrencia workers. La cola es acotada: si se llena, los archivos
+detectados esperan en lugar de lanzar más trabajo del que se puede atender,
+y si también se llena la espera (max_en_espera) se descartan y se recogen
+con un nuevo recorrido de las carpetas cuando la cola se vacía. La memoria
+no crece con la vida del demonio: los archivos ya encolados se recuerdan en
+un LRU de max_vistos entradas.
+
+Uso:
+    python carpeta_vigilada.py ~/Grabaciones --concurrencia 2
+    python carpeta_vigilada.py ~/Grabaciones /Volumes/Consultas --duracion 300 --existentes
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from collections import OrderedDict
+
+EXTENSIONES_AUDIO = ('.wav', '.mp3', '.m4a', '.aiff', '.flac')
+
+
+class CarpetaVigilada:
+    """
+    Observador de directorios que alimenta al transcriptor con contrapresión
+    """
+
+    def __init__(self, transcriptor, directorios, max_concurrencia=2, tamano_cola=16, espera_estable=2.0,
+                 duracion_segundos=None, recursivo=False, procesar_existentes=False, extensiones=EXTENSIONES_AUDIO,
+                 max_en_espera=1000, max_vistos=100000):
+        self.transcriptor = transcriptor
+        self.directorios = [os.path.abspath(d) for d in directorios]
+        self.max_concurrencia = max_concurrencia
+        self.tamano_cola = tamano_cola
+        self.espera_estable = espera_estable
+        self.duracion_segundos = duracion_segundos  # None: sesión completa
+        self.recursivo = recursivo
+        self.procesar_existentes = procesar_existentes
+        self.extensiones = tuple(e.lower() for e in extensiones)
+        self.max_en_espera = max_en_espera
+        self.max_vistos = max_vistos
+
+        self._loop = None
+        self._cola = None
+        self._temporizadores = {}  # ruta -> TimerHandle de la próxima comprobación
+        self._firmas = {}          # ruta -> (tamaño, mtime_ns) en la última comprobación
+        self._vistos = OrderedDict()     # ruta -> (tamaño, mtime_ns) ya encolada, LRU de max_vistos
+        self._en_espera = OrderedDict()  # ruta -> instante de detección, estables pero sin hueco en la cola
+        self._hay_espera = None          # asyncio.Event que despierta al alimentador
+        self._desbordado = False         # se descartaron archivos: volver a recorrer las carpetas
+
+        self.stats = {"detectados": 0, "duplicados": 0, "descartados": 0, "completados": 0, "fallidos": 0}
+
+    def _es_audio(self, ruta):
+        nombre = os.path.basename(ruta)
+        return (
+            nombre.lower().endswith(self.extensiones)
+            and not nombre.startswith('.')
+            and '_optimizado_' not in nombre  # Segmentos generados por el propio transcriptor
+        )
+
+    def notificar(self, ruta):
+        """
+        Evento del sistema de archivos sobre `ruta`; seguro desde cualquier hilo
+        """
+        self._loop.call_soon_threadsafe(self._programar, os.path.abspath(ruta))
+
+    def notificar_borrado(self, ruta):
+        """
+        `ruta` ya no existe (borrada o movida); seguro desde cualquier hilo
+        """
+        self._loop.call_soon_threadsafe(self._olvidar, os.path.abspath(ruta))
+
+    def _olvidar(self, ruta):
+        self._vistos.pop(ruta, None)
+        self._firmas.pop(ruta, None)
+        temporizador = self._temporizadores.pop(ruta, None)
+        if temporizador:
+            temporizador.cancel()
+
+    def _programar(self, ruta):
+        # Cada evento reinicia la espera: el archivo se comprueba cuando deja de recibir escrituras
+        if not self._es_audio(ruta):
+            return
+        try:
+            estado = os.stat(ruta)
+        except FileNotFoundError:
+            return
+        self._firmas[ruta] = (estado.st_size, estado.st_mtime_ns)
+
+        temporizador = self._temporizadores.pop(ruta, None)
+        if temporizador:
+            temporizador.cancel()
+        self._temporizadores[ruta] = self._loop.call_later(self.espera_estable, self._comprobar, ruta)
+
+    def _comprobar(self, ruta):
+        """
+        Encolar si tamaño y fecha no cambiaron desde la comprobación anterior
+        """
+        self._temporizadores.pop(ruta, None)
+        try:
+            estado = os.stat(ruta)
+        except FileNotFoundError:
+            self._firmas.pop(ruta, None)
+            return
+
+        firma = (estado.st_size, estado.st_mtime_ns)
+        if firma != self._firmas.get(ruta) or estado.st_size == 0:
+            # Sigue creciendo (o acaba de aparecer): volver a mirar tras otra espera
+            self._firmas[ruta] = firma
+            self._temporizadores[ruta] = self._loop.call_later(self.espera_estable, self._comprobar, ruta)
+            return
+
+        del self._firmas[ruta]
+        if self._vistos.get(ruta) == firma or ruta in self._en_espera:
+            self.stats["duplicados"] += 1
+            return
+        if len(self._en_espera) >= self.max_en_espera:
+            # Sin recordarlo como visto: el próximo recorrido de las carpetas lo recoge
+            self._desbordado = True
+            self.stats["descartados"] += 1
+            return
+
+        self._vistos[ruta] = firma
+        self._vistos.move_to_end(ruta)
+        if len(self._vistos) > self.max_vistos:
+            self._vistos.popitem(last=False)
+        self.stats["detectados"] += 1
+
+        self._en_espera[ruta] = time.perf_counter()
+        self._hay_espera.set()
+
+    async def _alimentar(self):
+        """
+        Pasar los archivos en espera a la cola acotada, esperando en put()
+        cuando está llena: una sola tarea, no una por archivo
+        """
+        while True:
+            await self._hay_espera.wait()
+            while self._en_espera:
+                ruta, detectado = next(iter(self._en_espera.items()))
+                await self._cola.put((ruta, detectado))
+                self._en_espera.pop(ruta, None)
+            self._hay_espera.clear()
+
+            if self._desbordado:
+                self._desbordado = False
+                self._escanear()
+
+    def _escanear(self):
+        """
+        Programar la comprobación de todos los archivos de las carpetas vigiladas
+        """
+        for directorio in self.directorios:
+            for raiz, _, archivos in os.walk(directorio):
+                for archivo in archivos:
+                    self._programar(os.path.join(raiz, archivo))
+                if not self.recursivo:
+                    break
+
+    async def _transcribir(self, ruta):
+        if self.duracion_segundos is None:
+            return await self.transcriptor.transcribir_sesion_completa(ruta)
+        if self.transcriptor.decodificacion == "interna":
+            return await self.transcriptor.transcribir_en_memoria(ruta, self.duracion_segundos)
+
+        segmento = await asyncio.to_thread(self.transcriptor.crear_segmento_optimizado, ruta, self.duracion_segundos)
+        if not segmento:
+            return None
+        return await self.transcriptor.transcribir_optimizado(segmento)
+
+    async def _trabajar(self, resultados):
+        while True:
+            ruta, detectado = await self._cola.get()
+            inicio = time.perf_counter()
+            try:
+                resultado = await self._transcribir(ruta)
+            except Exception as e:
+                print(f"❌ {ruta}: {e}")
+                resultado = None
+            finally:
+                self._cola.task_done()
+
+            self.stats["completados" if resultado else "fallidos"] += 1
+            await resultados.put({
+                "archivo": ruta,
+                "resultado": resultado,
+                "tiempo_segundos": time.perf_counter() - inicio,
+                "espera_cola_segundos": inicio - detectado,
+                "latencia_segundos": time.perf_counter() - detectado
+            })
+
+    async def ejecutar(self):
+        """
+        Vigilar hasta que se cancele, entregando cada resultado en cuanto termina
+        """
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            raise RuntimeError("watchdog no instalado. Instala con: pip install watchdog")
+
+        vigilante = self
+
+        class Manejador(FileSystemEventHandler):
+            def on_any_event(self, evento):
+                if evento.is_directory or evento.event_type == "opened":
+                    return
+                if evento.event_type in ("deleted", "moved"):
+                    vigilante.notificar_borrado(evento.src_path)
+                if evento.event_type != "deleted":
+                    vigilante.notificar(getattr(evento, "dest_path", "") or evento.src_path)
+
+        self._loop = asyncio.get_running_loop()
+        self._cola = asyncio.Queue(maxsize=self.tamano_cola)
+        self._hay_espera = asyncio.Event()
+        resultados = asyncio.Queue()
+
+        observador = Observer()
+        for directorio in self.directorios:
+            observador.schedule(Manejador(), directorio, recursive=self.recursivo)
+        observador.start()
+
+        if self.procesar_existentes:
+            self._escanear()
+
+        workers = [asyncio.create_task(self._trabajar(resultados)) for _ in range(self.max_concurrencia)]
+        workers.append(asyncio.create_task(self._alimentar()))
+        try:
+            while True:
+                yield await resultados.get()
+        finally:
+            observador.stop()
+            for temporizador in self._temporizadores.values():
+                temporizador.cancel()
+            for tarea in workers:
+                tarea.cancel()
+            await asyncio.to_thread(observador.join)
+
+    def estadisticas(self):
+        return {
+            **self.stats,
+            "en_cola": self._cola.qsize() if self._cola else 0,
+            "en_espera": len(self._en_espera),
+            "recordados": len(self._vistos),
+            "esperando_estabilidad": len(self._temporizadores)
+        }
+
+
+async def vigilar(args):
+    from cliente_http import cerrar_clientes
+    from transcriptor_medico_final import TranscriptorMedico
+
+    transcriptor = TranscriptorMedico(silencioso=True)
+    transcriptor.dg  # Fallar al arrancar si no hay API key, no con la primera grabación
+
+    vigilante = CarpetaVigilada(
+        transcriptor,
+        args.directorios,
+        max_concurrencia=args.concurrencia,
+        tamano_cola=args.cola,
+        espera_estable=args.espera,
+        duracion_segundos=args.duracion,
+        recursivo=args.recursivo,
+        procesar_existentes=args.existentes
+    )
+
+    print(f"👀 Vigilando {', '.join(vigilante.directorios)} (máx. {args.concurrencia} en paralelo)")
+    try:
+        async for item in vigilante.ejecutar():
+            if item["resultado"]:
+                print(f"✅ {item['archivo']}: {item['resultado']['output_file']} "
+                      f"({item['latencia_segundos']:.1f}s desde que se detectó)")
+            else:
+                print(f"❌ {item['archivo']}: falló tras {item['tiempo_segundos']:.1f}s")
+    finally:
+        await cerrar_clientes()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribir automáticamente las grabaciones nuevas de una carpeta")
+    parser.add_argument("directorios", nargs="+")
+    parser.add_argument("--concurrencia", type=int, default=2, help="Transcripciones simultáneas")
+    parser.add_argument("--cola", type=int, default=16, help="Grabaciones en espera antes de aplicar contrapresión")
+    parser.add_argument("--espera", type=float, default=2.0, help="Segundos sin cambios para dar un archivo por terminado")
+    parser.add_argument("--duracion", type=int, help="Solo los primeros N segundos (por defecto, la sesión completa)")
+    parser.add_argument("--recursivo", action="store_true")
+    parser.add_argument("--existentes", action="store_true", help="Procesar también los archivos ya presentes")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(vigilar(args))
+    except KeyboardInterrupt:
+        print("\n👋 Vigilancia detenida")
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
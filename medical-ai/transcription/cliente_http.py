@@ -0,0 +1,256 @@
+import asyncio
+import json
+import mmap
+import os
+import threading
+import time
+import urllib.parse
+
+from control_concurrencia import ErrorApi, segundos_retry_after
+
+URL_DEEPGRAM = "https://api.deepgram.com/v1"
+TAMANO_BLOQUE = 256 * 1024
+
+_compartidos = {}
+_lock = threading.Lock()
+
+
+def cadena_consulta(opciones):
+    """
+    Opciones de transcripción a query string como las espera Deepgram:
+    booleanos en minúsculas y listas como parámetros repetidos
+    """
+    pares = []
+    for clave, valor in opciones.items():
+        for elemento in valor if isinstance(valor, (list, tuple)) else [valor]:
+            if elemento is None:
+                continue
+            pares.append((clave, str(elemento).lower() if isinstance(elemento, bool) else str(elemento)))
+    return urllib.parse.urlencode(pares)
+
+
+async def bloques_archivo(archivo, tamano_bloque=TAMANO_BLOQUE, mapear=False):
+    """
+    Contenido de un archivo abierto, desde su posición actual, en bloques de
+    `tamano_bloque` bytes: la memoria residente no depende del tamaño de la
+    grabación. Por defecto cada bloque se lee en un hilo (el event loop no se
+    bloquea con el disco). Con mapear=True el archivo se proyecta con mmap y
+    se entregan vistas sin copiar; las páginas ya enviadas se descartan con
+    MADV_DONTNEED para que no se acumulen en el RSS.
+    """
+    if not mapear:
+        while True:
+            bloque = await asyncio.to_thread(archivo.read, tamano_bloque)
+            if not bloque:
+                return
+            yield bloque
+
+    inicio = archivo.tell()
+    tamano = os.fstat(archivo.fileno()).st_size
+    if inicio >= tamano:
+        return
+
+    mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+    vista = memoryview(mapa)
+    liberar = hasattr(mapa, "madvise") and hasattr(mmap, "MADV_DONTNEED")
+    if hasattr(mapa, "madvise"):
+        mapa.madvise(mmap.MADV_SEQUENTIAL)
+    try:
+        descartado = 0
+        for posicion in range(inicio, tamano, tamano_bloque):
+            yield vista[posicion:posicion + tamano_bloque]
+            # El bloque anterior ya está en el socket: sus páginas pueden salir de memoria
+            fin = (posicion + tamano_bloque) // mmap.PAGESIZE * mmap.PAGESIZE
+            if liberar and fin > descartado:
+                mapa.madvise(mmap.MADV_DONTNEED, descartado, fin - descartado)
+                descartado = fin
+        archivo.seek(tamano)
+    finally:
+        vista.release()
+        try:
+            mapa.close()
+        except BufferError:
+            pass  # Aún hay una vista en el transporte: el mapa se cierra al recolectarla
+
+
+class ClienteDeepgram:
+    """
+    Cliente HTTP del endpoint prerecorded con un pool de conexiones keep-alive
+    por event loop: las subidas sucesivas reutilizan la conexión TCP/TLS en
+    lugar de abrir una por petición como el SDK. Expone la misma llamada que
+    el SDK (`transcription.prerecorded(source, options)`), así que sustituye
+    a `Deepgram(...)` en TranscriptorMedico.
+
+    Timeouts: `timeout_conexion` para conectar (incluido TLS), `timeout_subida`
+    como máximo sin que avance el envío del audio y `timeout_lectura` como
+    máximo sin recibir datos de la respuesta (incluye el procesamiento en
+    Deepgram).
+
+    El audio se envía siempre por bloques de `tamano_bloque` con
+    transferencia chunked, así que subir una grabación de varias horas no
+    la carga en memoria; `mapear_archivos` usa mmap para los archivos
+    (ver bloques_archivo).
+    """
+
+    def __init__(self, api_key, api_url=None, limite_conexiones=32, conexiones_por_host=16, keepalive_segundos=60,
+                 timeout_conexion=10, timeout_subida=120, timeout_lectura=600, tamano_bloque=TAMANO_BLOQUE,
+                 mapear_archivos=False):
+        self.api_key = api_key
+        self.api_url = (api_url or URL_DEEPGRAM).rstrip("/")
+        self.limite_conexiones = limite_conexiones
+        self.conexiones_por_host = conexiones_por_host
+        self.keepalive_segundos = keepalive_segundos
+        self.timeout_conexion = timeout_conexion
+        self.timeout_subida = timeout_subida
+        self.timeout_lectura = timeout_lectura
+        self.tamano_bloque = tamano_bloque
+        self.mapear_archivos = mapear_archivos
+
+        self._sesiones = {}  # event loop -> aiohttp.ClientSession
+        self.stats = {"peticiones": 0, "conexiones_nuevas": 0}
+
+    @classmethod
+    def compartido(cls, api_key, api_url=None, **opciones):
+        """
+        Instancia única por proceso para cada (api_key, api_url): la comparten
+        todos los transcriptores. Las opciones solo cuentan en la primera llamada.
+        """
+        clave = (api_key, (api_url or URL_DEEPGRAM).rstrip("/"))
+        with _lock:
+            if clave not in _compartidos:
+                _compartidos[clave] = cls(api_key, api_url, **opciones)
+            return _compartidos[clave]
+
+    @property
+    def transcription(self):
+        return self
+
+    def _sesion(self):
+        """
+        Sesión del event loop actual (una aiohttp.ClientSession no puede
+        usarse desde otro loop), creada en el primer uso
+        """
+        loop = asyncio.get_running_loop()
+        sesion = self._sesiones.get(loop)
+        if sesion is None or sesion.closed:
+            import aiohttp
+
+            # Las sesiones de loops ya cerrados (asyncio.run anteriores) no pueden reutilizarse
+            for otro in [l for l in self._sesiones if l.is_closed()]:
+                del self._sesiones[otro]
+
+            rastreo = aiohttp.TraceConfig()
+            rastreo.on_connection_create_end.append(self._conexion_creada)
+
+            sesion = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.limite_conexiones,
+                    limit_per_host=self.conexiones_por_host,
+                    keepalive_timeout=self.keepalive_segundos
+                ),
+                timeout=aiohttp.ClientTimeout(
+                    total=None,
+                    sock_connect=self.timeout_conexion,
+                    sock_read=self.timeout_lectura
+                ),
+                headers={"Authorization": f"Token {self.api_key}"},
+                trace_configs=[rastreo]
+            )
+            self._sesiones[loop] = sesion
+        return sesion
+
+    async def _conexion_creada(self, sesion, contexto, parametros):
+        self.stats["conexiones_nuevas"] += 1
+
+    def _cuerpo(self, audio, progreso):
+        """
+        Cuerpo de la petición como generador por bloques, registrando el
+        avance del envío para el timeout de subida
+        """
+        async def bloques():
+            if isinstance(audio, (bytes, bytearray, memoryview)):
+                vista = memoryview(audio)
+                for inicio in range(0, len(vista), self.tamano_bloque):
+                    progreso[0] = time.monotonic()
+                    yield vista[inicio:inicio + self.tamano_bloque]
+            elif hasattr(audio, "read"):
+                mapear = self.mapear_archivos and hasattr(audio, "fileno")
+                async for bloque in bloques_archivo(audio, self.tamano_bloque, mapear):
+                    progreso[0] = time.monotonic()
+                    yield bloque
+            else:
+                async for bloque in audio:
+                    progreso[0] = time.monotonic()
+                    yield bloque
+            progreso[0] = None  # Envío completo: desde aquí rige timeout_lectura
+        return bloques()
+
+    async def prerecorded(self, source, options=None, **kwargs):
+        """
+        POST /listen con el audio de `source` ({"buffer", "mimetype"}); devuelve
+        la respuesta JSON o lanza ErrorApi con el código HTTP y Retry-After
+        """
+        sesion = self._sesion()
+        url = f"{self.api_url}/listen"
+        consulta = cadena_consulta({**(options or {}), **kwargs})
+        if consulta:
+            url = f"{url}?{consulta}"
+
+        progreso = [time.monotonic()]
+        self.stats["peticiones"] += 1
+
+        async def enviar():
+            async with sesion.post(
+                url,
+                data=self._cuerpo(source["buffer"], progreso),
+                headers={"Content-Type": source.get("mimetype", "audio/wav")}
+            ) as respuesta:
+                contenido = await respuesta.text()
+                if respuesta.status >= 400:
+                    try:
+                        mensaje = json.loads(contenido).get("err_msg") or contenido
+                    except (ValueError, AttributeError):
+                        mensaje = contenido
+                    raise ErrorApi(
+                        f"HTTP {respuesta.status}: {mensaje.strip()[:200]}",
+                        estado=respuesta.status,
+                        reintentar_en=segundos_retry_after(respuesta.headers.get("Retry-After"))
+                    )
+                cuerpo = json.loads(contenido) if contenido.strip() else None
+                if isinstance(cuerpo, dict) and (cuerpo.get("err_msg") or cuerpo.get("error")):
+                    raise ErrorApi(str(cuerpo.get("err_msg") or cuerpo.get("error")), estado=respuesta.status)
+                return cuerpo
+
+        tarea = asyncio.ensure_future(enviar())
+        try:
+            # Vigilar la subida: sin avance en timeout_subida segundos se aborta la petición
+            while True:
+                espera = self.timeout_subida if progreso[0] is None else progreso[0] + self.timeout_subida - time.monotonic()
+                terminadas, _ = await asyncio.wait({tarea}, timeout=max(espera, 0.01))
+                if terminadas:
+                    return tarea.result()
+                if progreso[0] is not None and time.monotonic() - progreso[0] >= self.timeout_subida:
+                    raise asyncio.TimeoutError(f"La subida no avanzó en {self.timeout_subida}s")
+        finally:
+            if not tarea.done():
+                tarea.cancel()
+                await asyncio.wait({tarea})
+
+    async def cerrar(self):
+        """
+        Cerrar la sesión del event loop actual
+        """
+        sesion = self._sesiones.pop(asyncio.get_running_loop(), None)
+        if sesion:
+            await sesion.close()
+
+
+async def cerrar_clientes():
+    """
+    Cerrar las conexiones de todos los clientes compartidos en el event loop
+    actual; llamar al terminar, antes de que asyncio.run cierre el loop
+    """
+    with _lock:
+        clientes = list(_compartidos.values())
+    for cliente in clientes:
+        await cliente.cerrar()
@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+"""
+Cola de trabajos persistente (SQLite) para transcripciones reanudables
+
+Cada archivo es un trabajo que avanza por estados y guarda lo necesario
+para continuar desde el último completado:
+
+    pendiente -> segmentado -> subido -> analizado -> escrito
+                 (segmento)    (respuesta) (resultado)  (salidas)
+
+Si el proceso muere o Deepgram falla, el trabajo se retoma en el estado en
+que quedó: una respuesta ya recibida no se vuelve a pagar. Los fallos se
+reintentan con espera exponencial y jitter hasta max_intentos. Varios
+procesos pueden trabajar sobre la misma base: cada trabajo se reclama en
+una transacción exclusiva con un plazo (lease) que el worker renueva con un
+latido mientras trabaja; si el worker desaparece, el plazo vence y otro lo
+retoma.
+
+Uso:
+    python cola_trabajos.py agregar grabaciones/*.wav --duracion 300
+    python cola_trabajos.py procesar --concurrencia 4
+    python cola_trabajos.py estado
+    python cola_trabajos.py reintentar
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sqlite3
+import time
+from contextlib import contextmanager
+
+ESTADOS = ("pendiente", "segmentado", "subido", "analizado", "escrito")
+FINALES = ("escrito", "fallido")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS trabajos (
+    id INTEGER PRIMARY KEY,
+    clave TEXT UNIQUE NOT NULL,
+    archivo TEXT NOT NULL,
+    duracion_segundos INTEGER,
+    incluir_timestamps INTEGER NOT NULL DEFAULT 1,
+    estado TEXT NOT NULL DEFAULT 'pendiente',
+    intentos INTEGER NOT NULL DEFAULT 0,
+    max_intentos INTEGER NOT NULL DEFAULT 5,
+    proximo_intento REAL NOT NULL DEFAULT 0,
+    reclamado_por TEXT,
+    reclamado_hasta REAL,
+    segmento TEXT,
+    respuesta TEXT,
+    resultado TEXT,
+    salidas TEXT,
+    error TEXT,
+    creado REAL NOT NULL,
+    actualizado REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS trabajos_estado ON trabajos(estado, proximo_intento);
+"""
+
+
+class ColaTrabajos:
+    """
+    Almacén SQLite de trabajos de transcripción, seguro entre procesos
+    """
+
+    def __init__(self, ruta=None, espera_base=2.0, espera_maxima=300.0, plazo_reclamo=900.0):
+        self.ruta = ruta or os.path.expanduser("~/.cache/transcriptor_medico/trabajos.db")
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self.plazo_reclamo = plazo_reclamo
+
+        directorio = os.path.dirname(self.ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        conexion = sqlite3.connect(self.ruta, timeout=30)
+        try:
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.executescript(ESQUEMA)
+        finally:
+            conexion.close()
+
+    @contextmanager
+    def _conectar(self, exclusiva=False):
+        """
+        Conexión de corta duración; exclusiva=True toma el bloqueo de escritura
+        desde el inicio (BEGIN IMMEDIATE) para leer y actualizar sin carreras
+        """
+        conexion = sqlite3.connect(self.ruta, timeout=30, isolation_level=None)
+        conexion.row_factory = sqlite3.Row
+        try:
+            conexion.execute("BEGIN IMMEDIATE" if exclusiva else "BEGIN")
+            try:
+                yield conexion
+            except BaseException:
+                conexion.execute("ROLLBACK")
+                raise
+            conexion.execute("COMMIT")
+        finally:
+            conexion.close()
+
+    def agregar(self, archivo, duracion_segundos=300, incluir_timestamps=True, max_intentos=5):
+        """
+        Encolar un archivo; idempotente: el mismo contenido (ruta, tamaño,
+        fecha) con los mismos parámetros no se duplica. Devuelve el id.
+        """
+        archivo = os.path.abspath(archivo)
+        estado = os.stat(archivo)
+        clave = f"{archivo}|{estado.st_size}|{estado.st_mtime_ns}|{duracion_segundos}|{int(incluir_timestamps)}"
+        ahora = time.time()
+
+        with self._conectar(exclusiva=True) as conexion:
+            conexion.execute(
+                "INSERT OR IGNORE INTO trabajos (clave, archivo, duracion_segundos, incluir_timestamps, max_intentos, "
+                "creado, actualizado) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (clave, archivo, duracion_segundos, int(incluir_timestamps), max_intentos, ahora, ahora)
+            )
+            return conexion.execute("SELECT id FROM trabajos WHERE clave = ?", (clave,)).fetchone()[0]
+
+    def reclamar(self, trabajador):
+        """
+        Tomar el siguiente trabajo disponible (no terminado, sin reclamo
+        vigente y con su reintento vencido), o None
+        """
+        ahora = time.time()
+        with self._conectar(exclusiva=True) as conexion:
+            fila = conexion.execute(
+                "SELECT * FROM trabajos WHERE estado NOT IN (?, ?) AND proximo_intento <= ? "
+                "AND (reclamado_hasta IS NULL OR reclamado_hasta < ?) ORDER BY id LIMIT 1",
+                (*FINALES, ahora, ahora)
+            ).fetchone()
+            if fila is None:
+                return None
+
+            conexion.execute(
+                "UPDATE trabajos SET reclamado_por = ?, reclamado_hasta = ?, actualizado = ? WHERE id = ?",
+                (trabajador, ahora + self.plazo_reclamo, ahora, fila["id"])
+            )
+
+        trabajo = dict(fila, reclamado_por=trabajador, reclamado_hasta=ahora + self.plazo_reclamo)
+        for campo in ("respuesta", "resultado", "salidas"):
+            if trabajo[campo]:
+                trabajo[campo] = json.loads(trabajo[campo])
+        return trabajo
+
+    def avanzar(self, trabajo, estado, **campos):
+        """
+        Registrar el nuevo estado (y lo producido en él) y renovar el reclamo;
+        falla si otro worker se quedó con el trabajo porque el plazo venció
+        """
+        ahora = time.time()
+        valores = {campo: json.dumps(valor, ensure_ascii=False) if campo in ("respuesta", "resultado", "salidas") else valor
+                   for campo, valor in campos.items()}
+        asignaciones = "".join(f", {campo} = ?" for campo in valores)
+        if estado == "escrito":
+            # Lo intermedio ya no hace falta y es lo que más ocupa
+            asignaciones += ", respuesta = NULL, resultado = NULL, reclamado_por = NULL, reclamado_hasta = NULL"
+
+        with self._conectar(exclusiva=True) as conexion:
+            cursor = conexion.execute(
+                f"UPDATE trabajos SET estado = ?, error = NULL, actualizado = ?, reclamado_hasta = ?{asignaciones} "
+                "WHERE id = ? AND reclamado_por = ?",
+                (estado, ahora, ahora + self.plazo_reclamo, *valores.values(), trabajo["id"], trabajo["reclamado_por"])
+            )
+            if cursor.rowcount == 0:
+                raise RuntimeError(f"El trabajo {trabajo['id']} ya no pertenece a {trabajo['reclamado_por']}")
+
+        trabajo.update(campos, estado=estado)
+
+    def renovar(self, trabajo):
+        """
+        Extender el reclamo sin cambiar de estado (latido durante una etapa
+        larga); falla si otro worker ya se quedó con el trabajo
+        """
+        ahora = time.time()
+        with self._conectar(exclusiva=True) as conexion:
+            cursor = conexion.execute(
+                "UPDATE trabajos SET reclamado_hasta = ?, actualizado = ? WHERE id = ? AND reclamado_por = ?",
+                (ahora + self.plazo_reclamo, ahora, trabajo["id"], trabajo["reclamado_por"])
+            )
+            if cursor.rowcount == 0:
+                raise RuntimeError(f"El trabajo {trabajo['id']} ya no pertenece a {trabajo['reclamado_por']}")
+        trabajo["reclamado_hasta"] = ahora + self.plazo_reclamo
+
+    def fallar(self, trabajo, error, reintentable=True):
+        """
+        Liberar el trabajo tras un error: se reprograma con espera exponencial
+        y jitter, o queda como fallido si no es reintentable o se agotaron los intentos
+        """
+        intentos = trabajo["intentos"] + 1
+        ahora = time.time()
+
+        if reintentable and intentos < trabajo["max_intentos"]:
+            espera = min(self.espera_maxima, self.espera_base * 2 ** (intentos - 1))
+            # Jitter: la mitad fija y la otra mitad aleatoria, para no reintentar todos a la vez
+            proximo = ahora + espera / 2 + random.uniform(0, espera / 2)
+            estado = trabajo["estado"]
+        else:
+            proximo = ahora
+            estado = "fallido"
+
+        with self._conectar(exclusiva=True) as conexion:
+            conexion.execute(
+                "UPDATE trabajos SET estado = ?, intentos = ?, proximo_intento = ?, error = ?, "
+                "reclamado_por = NULL, reclamado_hasta = NULL, actualizado = ? WHERE id = ? AND reclamado_por = ?",
+                (estado, intentos, proximo, str(error), ahora, trabajo["id"], trabajo["reclamado_por"])
+            )
+
+        return estado, proximo - ahora
+
+    def reintentar_fallidos(self):
+        with self._conectar(exclusiva=True) as conexion:
+            return conexion.execute(
+                "UPDATE trabajos SET estado = CASE WHEN resultado IS NOT NULL THEN 'analizado' "
+                "WHEN respuesta IS NOT NULL THEN 'subido' ELSE 'pendiente' END, "
+                "intentos = 0, proximo_intento = 0, error = NULL WHERE estado = 'fallido'"
+            ).rowcount
+
+    def hay_pendientes(self):
+        """
+        (trabajos sin terminar, segundos hasta que el próximo esté disponible)
+        """
+        ahora = time.time()
+        with self._conectar() as conexion:
+            fila = conexion.execute(
+                "SELECT COUNT(*), MIN(MAX(proximo_intento, COALESCE(reclamado_hasta, 0))) FROM trabajos "
+                "WHERE estado NOT IN (?, ?)", FINALES
+            ).fetchone()
+        cantidad, disponible = fila
+        return cantidad, max(0.0, (disponible or ahora) - ahora)
+
+    def resumen(self):
+        with self._conectar() as conexion:
+            filas = conexion.execute("SELECT estado, COUNT(*) FROM trabajos GROUP BY estado").fetchall()
+        return {estado: cantidad for estado, cantidad in filas}
+
+    def fallidos(self):
+        with self._conectar() as conexion:
+            filas = conexion.execute("SELECT id, archivo, intentos, error FROM trabajos WHERE estado = 'fallido'")
+            return [dict(fila) for fila in filas]
+
+
+class TrabajadorCola:
+    """
+    Worker asíncrono: reclama trabajos de la cola y los hace avanzar con el
+    TranscriptorMedico, hasta max_concurrencia a la vez
+    """
+
+    def __init__(self, transcriptor, cola, max_concurrencia=4, nombre=None):
+        self.transcriptor = transcriptor
+        self.cola = cola
+        self.max_concurrencia = max_concurrencia
+        self.nombre = nombre or f"{socket.gethostname()}:{os.getpid()}"
+
+    async def _avanzar(self, trabajo, estado, **campos):
+        # La respuesta de una sesión larga pesa varios MB: serializarla fuera del event loop
+        await asyncio.to_thread(self.cola.avanzar, trabajo, estado, **campos)
+
+    async def _segmentar(self, trabajo):
+        if trabajo["duracion_segundos"] is None:
+            # Sesión completa: los segmentos los gestiona _respuesta_sesion_completa
+            await self._avanzar(trabajo, "segmentado")
+            return
+        segmento = await asyncio.to_thread(
+            self.transcriptor.crear_segmento_optimizado, trabajo["archivo"], trabajo["duracion_segundos"]
+        )
+        if not segmento:
+            raise RuntimeError("No se pudo crear el segmento")
+        await self._avanzar(trabajo, "segmentado", segmento=segmento)
+
+    async def _subir(self, trabajo):
+        from transcriptor_medico_final import mimetype_audio
+
+        if trabajo["duracion_segundos"] is None:
+            response = await self.transcriptor._respuesta_sesion_completa(trabajo["archivo"])
+        else:
+            if not trabajo["segmento"] or not os.path.exists(trabajo["segmento"]):
+                # El segmento se perdió (p. ej. spool en tmpfs tras reiniciar): rehacerlo
+                await self._segmentar(trabajo)
+            with open(trabajo["segmento"], "rb") as audio:
+                response = await self.transcriptor._llamar_api(
+                    {"buffer": audio, "mimetype": mimetype_audio(trabajo["segmento"])}
+                )
+            response = self.transcriptor._traducir_tiempos(response, trabajo["segmento"])
+
+        if not response or "results" not in response:
+            raise RuntimeError("No se recibió respuesta válida de Deepgram")
+        await self._avanzar(trabajo, "subido", respuesta=response)
+
+        if trabajo["segmento"]:
+            self.transcriptor._borrar_segmento(trabajo["segmento"])
+
+    async def _analizar(self, trabajo):
+        resultado = await self.transcriptor._construir_resultado(
+            trabajo["respuesta"], trabajo["archivo"], bool(trabajo["incluir_timestamps"])
+        )
+        if resultado is None:
+            raise ValueError("Respuesta sin transcripción")
+        await self._avanzar(trabajo, "analizado", resultado=resultado)
+
+    async def _escribir(self, trabajo):
+        resultado = await self.transcriptor._guardar_resultado(trabajo["resultado"], bool(trabajo["incluir_timestamps"]))
+        await self._avanzar(trabajo, "escrito", salidas=resultado["salidas"])
+
+    async def _latido(self, trabajo, tarea, perdido):
+        """
+        Renovar el reclamo cada tercio del plazo mientras dura una etapa: una
+        subida de horas no debe dejar que otro worker lo reclame y la pague
+        otra vez. Si el reclamo ya se perdió, se cancela el procesamiento.
+        """
+        while True:
+            await asyncio.sleep(self.cola.plazo_reclamo / 3)
+            try:
+                await asyncio.to_thread(self.cola.renovar, trabajo)
+            except RuntimeError:
+                perdido.set()
+                tarea.cancel()
+                return
+            except sqlite3.Error as e:
+                # Base bloqueada un momento: el plazo aún da margen para el siguiente latido
+                print(f"⚠️ Trabajo {trabajo['id']}: no se pudo renovar el reclamo ({e})")
+
+    async def procesar(self, trabajo):
+        """
+        Avanzar un trabajo desde su estado actual hasta escrito; True si lo completa
+        """
+        perdido = asyncio.Event()
+        latido = asyncio.create_task(self._latido(trabajo, asyncio.current_task(), perdido))
+        try:
+            return await self._procesar(trabajo)
+        except asyncio.CancelledError:
+            if not perdido.is_set():
+                raise
+            print(f"⚠️ Trabajo {trabajo['id']}: el reclamo pasó a otro worker, se abandona")
+            return False
+        finally:
+            latido.cancel()
+
+    async def _procesar(self, trabajo):
+        etapas = {
+            "pendiente": self._segmentar,
+            "segmentado": self._subir,
+            "subido": self._analizar,
+            "analizado": self._escribir
+        }
+        print(f"🔧 Trabajo {trabajo['id']} ({os.path.basename(trabajo['archivo'])}): desde '{trabajo['estado']}'")
+
+        try:
+            while trabajo["estado"] != "escrito":
+                await etapas[trabajo["estado"]](trabajo)
+            print(f"✅ Trabajo {trabajo['id']}: escrito")
+            return True
+        except Exception as e:
+            error = e
+
+        # Sin el archivo, o con una respuesta de formato inesperado, reintentar no cambia nada
+        reintentable = not isinstance(error, (FileNotFoundError, ValueError, KeyError))
+        try:
+            estado, espera = await asyncio.to_thread(self.cola.fallar, trabajo, error, reintentable)
+        except sqlite3.Error as e:
+            # Base bloqueada por otro proceso: el reclamo caduca y el trabajo se reintenta igualmente
+            print(f"⚠️ Trabajo {trabajo['id']}: {error}; no se pudo registrar el fallo ({e})")
+            return False
+        if estado == "fallido":
+            print(f"❌ Trabajo {trabajo['id']}: fallido ({error})")
+        else:
+            print(f"⚠️ Trabajo {trabajo['id']}: {error} (reintento en {espera:.0f}s)")
+        return False
+
+    async def ejecutar(self, hasta_vaciar=True, intervalo_maximo=5.0):
+        """
+        Procesar trabajos hasta que no quede ninguno sin terminar (o indefinidamente)
+        """
+        en_curso = set()
+        completados = 0
+
+        while True:
+            while len(en_curso) < self.max_concurrencia:
+                # SQLite fuera del event loop: una espera de bloqueo no debe frenar las subidas en vuelo
+                try:
+                    trabajo = await asyncio.to_thread(self.cola.reclamar, self.nombre)
+                except sqlite3.Error as e:
+                    # Bloqueo transitorio de otro worker: se vuelve a intentar en la siguiente vuelta
+                    print(f"⚠️ No se pudo reclamar un trabajo ({e})")
+                    break
+                if trabajo is None:
+                    break
+                en_curso.add(asyncio.create_task(self.procesar(trabajo)))
+
+            if en_curso:
+                hechos, en_curso = await asyncio.wait(en_curso, return_when=asyncio.FIRST_COMPLETED)
+                completados += sum(1 for tarea in hechos if tarea.result())
+                continue
+
+            try:
+                pendientes, espera = await asyncio.to_thread(self.cola.hay_pendientes)
+            except sqlite3.Error as e:
+                print(f"⚠️ No se pudo consultar la cola ({e})")
+                pendientes, espera = True, 1.0
+            if not pendientes and hasta_vaciar:
+                return completados
+            # Reintentos programados o trabajos reclamados por otros workers
+            await asyncio.sleep(min(max(espera, 0.1), intervalo_maximo))
+
+
+async def procesar_cola(args):
+    from cliente_http import cerrar_clientes
+    from transcriptor_medico_final import TranscriptorMedico
+
+    transcriptor = TranscriptorMedico(silencioso=True)
+    transcriptor.dg  # Fallar al arrancar si no hay API key
+
+    cola = ColaTrabajos(args.cola)
+    trabajador = TrabajadorCola(transcriptor, cola, args.concurrencia, args.trabajador)
+    try:
+        completados = await trabajador.ejecutar(hasta_vaciar=not args.continuo)
+    finally:
+        await cerrar_clientes()
+    print(f"\n📦 {completados} trabajos completados por {trabajador.nombre}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cola persistente de transcripciones médicas")
+    parser.add_argument("--cola", help="Ruta de la base de datos de trabajos")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    agregar = subparsers.add_parser("agregar", help="Encolar archivos")
+    agregar.add_argument("archivos", nargs="+")
+    agregar.add_argument("--duracion", type=int, default=300, help="Segundos por archivo (0 = sesión completa)")
+    agregar.add_argument("--max-intentos", type=int, default=5)
+
+    procesar = subparsers.add_parser("procesar", help="Procesar trabajos (se puede lanzar en varios procesos)")
+    procesar.add_argument("--concurrencia", type=int, default=4)
+    procesar.add_argument("--trabajador", help="Nombre del worker (por defecto host:pid)")
+    procesar.add_argument("--continuo", action="store_true", help="Seguir esperando trabajos nuevos")
+
+    subparsers.add_parser("estado", help="Trabajos por estado")
+    subparsers.add_parser("reintentar", help="Volver a encolar los fallidos")
+
+    args = parser.parse_args()
+    cola = ColaTrabajos(args.cola)
+
+    if args.comando == "agregar":
+        for archivo in args.archivos:
+            id_trabajo = cola.agregar(archivo, args.duracion or None, max_intentos=args.max_intentos)
+            print(f"📥 {archivo}: trabajo {id_trabajo}")
+
+    elif args.comando == "procesar":
+        try:
+            asyncio.run(procesar_cola(args))
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            exit(1)
+
+    elif args.comando == "estado":
+        resumen = cola.resumen()
+        for estado in (*ESTADOS, "fallido"):
+            print(f"  {estado:<11} {resumen.get(estado, 0)}")
+        for fallido in cola.fallidos():
+            print(f"  ❌ {fallido['archivo']} ({fallido['intentos']} intentos): {fallido['error']}")
+
+    else:
+        print(f"🔁 {cola.reintentar_fallidos()} trabajos reencolados")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+import asyncio
+import math
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+
+class ErrorApi(Exception):
+    """
+    Fallo HTTP de la API con su código de estado y, si vino, el Retry-After en segundos
+    """
+
+    def __init__(self, mensaje, estado=None, reintentar_en=None):
+        super().__init__(mensaje)
+        self.estado = estado
+        self.reintentar_en = reintentar_en
+
+
+def segundos_retry_after(valor):
+    """
+    Cabecera Retry-After (segundos o fecha HTTP) a segundos de espera, o None
+    """
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(valor).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def clasificar_error(error):
+    """
+    (tipo, reintentar_en) de una excepción de la llamada a la API:
+    "limite" para 429, "servidor" para 5xx o estado desconocido, "red" para
+    fallos de conexión o timeouts y None si reintentar no serviría (4xx)
+    """
+    if isinstance(error, ErrorApi):
+        estado, reintentar_en = error.estado, error.reintentar_en
+    else:
+        # DeepgramApiError guarda la excepción de aiohttp en http_library_error
+        original = getattr(error, "http_library_error", None) or error
+        estado = getattr(error, "http_error_status", None) or getattr(original, "status", None)
+        cabeceras = getattr(original, "headers", None) or {}
+        reintentar_en = segundos_retry_after(cabeceras.get("Retry-After"))
+
+        if estado is None:
+            if isinstance(original, (ConnectionError, TimeoutError, asyncio.TimeoutError)) \
+                    or type(original).__name__ in ("ServerDisconnectedError", "ClientConnectorError", "ClientOSError",
+                                                   "ClientPayloadError", "ServerTimeoutError"):
+                return "red", None
+            return None, None
+
+    if estado == 429:
+        return "limite", reintentar_en
+    if estado is None or estado >= 500 or estado == 408:
+        return "servidor", reintentar_en
+    return None, None
+
+
+class ControlConcurrencia:
+    """
+    Planificador de llamadas a la API: un token bucket limita las peticiones
+    por segundo y un límite de peticiones en vuelo se ajusta por AIMD (suma
+    lenta mientras la latencia se mantiene, reducción multiplicativa ante
+    429, 5xx o latencia disparada). Los 429 frenan también la tasa del
+    bucket y Retry-After pausa todas las llamadas nuevas hasta que vence.
+    La latencia de referencia se lleva por tamaño de subida (en tramos de
+    factor √2 en MB) y aparte para las llamadas sin peso (streaming): una
+    subida pequeña dominada por el coste fijo de la petición no se compara
+    con una grande.
+    Una misma instancia puede compartirse entre transcriptores para que
+    todos respeten la misma cuota.
+    """
+
+    def __init__(self, tasa_inicial=5.0, tasa_maxima=25.0, rafaga=10, limite_inicial=4, limite_minimo=1,
+                 limite_maximo=32, factor_reduccion=0.5, tolerancia_latencia=2.0, max_reintentos=3,
+                 espera_base=1.0, espera_maxima=60.0, metricas=None):
+        self.tasa = tasa_inicial
+        self.tasa_minima = 0.1
+        self.tasa_maxima = tasa_maxima
+        self.rafaga = rafaga
+        self.limite = float(limite_inicial)
+        self.limite_minimo = limite_minimo
+        self.limite_maximo = limite_maximo
+        self.factor_reduccion = factor_reduccion
+        self.tolerancia_latencia = tolerancia_latencia
+        self.max_reintentos = max_reintentos
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self.metricas = metricas
+
+        self.en_vuelo = 0
+        self._tokens = float(rafaga)
+        self._ultimo_relleno = time.monotonic()
+        self._pausa_hasta = 0.0
+        self._ultima_reduccion = 0.0
+        self._referencias = {}  # tramo de tamaño (None: sin peso) -> mejor latencia reciente, la de la API sin cola
+        self._latencia_media = None
+        self._loop = None
+        self._cambio = None
+
+        self.stats = {"llamadas": 0, "reintentos": 0, "limitadas_429": 0, "errores_servidor": 0,
+                      "errores_red": 0, "reducciones": 0, "espera_segundos": 0.0}
+
+    def _rellenar(self, ahora):
+        self._tokens = min(self.rafaga, self._tokens + (ahora - self._ultimo_relleno) * self.tasa)
+        self._ultimo_relleno = ahora
+
+    async def _adquirir(self):
+        """
+        Esperar a que haya token, hueco bajo el límite y ninguna pausa vigente
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._cambio = loop, asyncio.Event()
+
+        llegada = time.monotonic()
+        while True:
+            ahora = time.monotonic()
+            self._rellenar(ahora)
+
+            if ahora < self._pausa_hasta:
+                espera = self._pausa_hasta - ahora
+            elif self.en_vuelo >= int(self.limite):
+                espera = None  # Hasta que termine una llamada
+            elif self._tokens < 1:
+                espera = (1 - self._tokens) / self.tasa
+            else:
+                self._tokens -= 1
+                self.en_vuelo += 1
+                self.stats["espera_segundos"] += ahora - llegada
+                return
+
+            self._cambio.clear()
+            try:
+                await asyncio.wait_for(self._cambio.wait(), espera)
+            except asyncio.TimeoutError:
+                pass
+
+    def _liberar(self):
+        self.en_vuelo -= 1
+        self._cambio.set()
+
+    @staticmethod
+    def _tramo(peso):
+        """
+        Tramo de tamaño de una subida: dentro de un tramo el tamaño varía
+        como mucho √2 veces, menos que tolerancia_latencia
+        """
+        if not peso:
+            return None
+        return math.floor(2 * math.log2(max(peso, 1 / 1024)))
+
+    def _exito(self, latencia, peso):
+        self._latencia_media = latencia if self._latencia_media is None else 0.8 * self._latencia_media + 0.2 * latencia
+
+        # La referencia de cada tramo envejece despacio para seguir cambios reales de la API
+        tramo = self._tramo(peso)
+        referencia = self._referencias.get(tramo)
+        if referencia is None or latencia < referencia:
+            self._referencias[tramo] = latencia
+        else:
+            self._referencias[tramo] = referencia * 1.01
+
+        if referencia is not None and latencia > referencia * self.tolerancia_latencia:
+            # La latencia crece con la concurrencia: el proveedor está encolando
+            self._reducir()
+        elif self.en_vuelo >= int(self.limite):
+            # Solo crece si el límite actual se está usando
+            self.limite = min(self.limite_maximo, self.limite + 1 / self.limite)
+
+        self.tasa = min(self.tasa_maxima, self.tasa + 0.1)
+        self._registrar_limite()
+
+    def _reducir(self):
+        # Una sola reducción por ventana: varias llamadas en vuelo fallan a la vez por la misma causa
+        ahora = time.monotonic()
+        if ahora - self._ultima_reduccion < (self._latencia_media or 1.0):
+            return False
+        self._ultima_reduccion = ahora
+        self.limite = max(self.limite_minimo, self.limite * self.factor_reduccion)
+        self.stats["reducciones"] += 1
+        return True
+
+    def _congestion(self, tipo, reintentar_en):
+        if self._reducir() and tipo == "limite":
+            self.tasa = max(self.tasa_minima, self.tasa * self.factor_reduccion)
+        if reintentar_en:
+            self._pausa_hasta = max(self._pausa_hasta, time.monotonic() + min(reintentar_en, self.espera_maxima))
+        self._registrar_limite()
+
+    def _registrar_limite(self):
+        if self.metricas:
+            self.metricas.observar("limite_concurrencia", self.limite)
+            self.metricas.observar("tasa_peticiones", self.tasa)
+
+    def _espera_reintento(self, intento, reintentar_en):
+        if reintentar_en is not None:
+            return min(reintentar_en, self.espera_maxima)
+        # Backoff exponencial con jitter completo
+        return random.uniform(0, min(self.espera_maxima, self.espera_base * 2 ** intento))
+
+    async def ejecutar(self, llamada, peso=None, reintentable=True, antes_de_reintentar=None):
+        """
+        Ejecutar la corrutina que devuelve `llamada()` dentro de los límites,
+        reintentando 429, 5xx y fallos de red. `peso` (p. ej. MB subidos)
+        elige con qué llamadas de tamaño parecido se compara la latencia;
+        `antes_de_reintentar` prepara la fuente de nuevo (p. ej. rebobinar
+        el archivo).
+        """
+        intento = 0
+        while True:
+            await self._adquirir()
+            self.stats["llamadas"] += 1
+            inicio = time.monotonic()
+            try:
+                resultado = await llamada()
+            except Exception as error:
+                fallo = error
+                tipo, reintentar_en = clasificar_error(error)
+                if tipo is None:
+                    raise
+
+                self.stats["limitadas_429" if tipo == "limite" else f"errores_{tipo}"] += 1
+                self._congestion(tipo, reintentar_en)
+                if not reintentable or intento >= self.max_reintentos:
+                    raise
+            else:
+                self._exito(time.monotonic() - inicio, peso)
+                return resultado
+            finally:
+                self._liberar()
+
+            espera = self._espera_reintento(intento, reintentar_en)
+            intento += 1
+            self.stats["reintentos"] += 1
+            if self.metricas:
+                self.metricas.contar("reintentos_api")
+            print(f"⏳ API: {fallo} ({tipo}); reintento {intento}/{self.max_reintentos} en {espera:.1f}s")
+            await asyncio.sleep(espera)
+            if antes_de_reintentar:
+                antes_de_reintentar()
+
+    def estadisticas(self):
+        return {
+            **self.stats,
+            "limite": round(self.limite, 2),
+            "tasa": round(self.tasa, 2),
+            "en_vuelo": self.en_vuelo
+        }
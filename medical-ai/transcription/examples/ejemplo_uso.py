@@ -13,6 +13,7 @@ import os
 # Agregar el path del módulo médico
 sys.path.append('../')
 from transcriptor_medico_final import TranscriptorMedico
+from cliente_http import cerrar_clientes
 
 async def ejemplo_transcripcion_simple():
     """
@@ -79,17 +80,11 @@ async def ejemplo_analisis_batch():
     
     resultados = []
     
-    for archivo in archivos[:3]:  # Máximo 3 archivos
-        print(f"\n📁 Procesando: {archivo}")
-        
-        # Crear segmento pequeño para demo
-        segmento = transcriptor.crear_segmento_optimizado(archivo, 60)
-        
-        if segmento:
-            resultado = await transcriptor.transcribir_optimizado(segmento)
-            if resultado:
-                resultados.append(resultado)
-                print(f"✅ {archivo}: {resultado['confidence']:.2%}")
+    # Segmentos pequeños para demo, procesados en paralelo
+    async for item in transcriptor.transcribir_lote(archivos[:3], max_concurrencia=3, duracion_segundos=60):
+        if item['resultado']:
+            resultados.append(item['resultado'])
+            print(f"✅ {item['archivo']}: {item['resultado']['confidence']:.2%}")
     
     # Resumen de resultados
     if resultados:
@@ -194,11 +189,14 @@ async def main():
     print("=" * 60)
     print("🎯 Mostrando diferentes formas de usar el módulo\n")
     
-    # Ejecutar ejemplos
-    await ejemplo_transcripcion_simple()
-    await ejemplo_analisis_batch()
-    ejemplo_integracion_n8n()
-    await ejemplo_uso_programatico()
+    # Ejecutar ejemplos (todos los transcriptores comparten las conexiones a Deepgram)
+    try:
+        await ejemplo_transcripcion_simple()
+        await ejemplo_analisis_batch()
+        ejemplo_integracion_n8n()
+        await ejemplo_uso_programatico()
+    finally:
+        await cerrar_clientes()
     
     print("\n" + "=" * 60)
     print("✅ EJEMPLOS COMPLETADOS")
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Índice de texto completo del archivo de transcripciones (SQLite FTS5)
+
+Cada resultado guardado por TranscriptorMedico se añade al índice al
+momento, turno a turno: cada entrada conserva la sesión, el speaker y los
+timestamps de inicio y fin, de modo que una búsqueda devuelve directamente
+"quién lo dijo y en qué minuto" sin recorrer los reportes.
+
+Uso:
+    python indice_transcripciones.py buscar palpitaciones --speaker 1
+    python indice_transcripciones.py buscar "dolor NEAR(pecho, 5)" --archivo consulta_perez
+    python indice_transcripciones.py indexar transcripcion_medica_optimizada_*.txt
+    python indice_transcripciones.py estadisticas
+"""
+
+import argparse
+import glob
+import os
+import re
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS sesiones (
+    id INTEGER PRIMARY KEY,
+    ruta_salida TEXT UNIQUE NOT NULL,
+    archivo TEXT,
+    session_id TEXT,
+    timestamp TEXT,
+    modelo TEXT,
+    confidence REAL,
+    audio_segundos REAL
+);
+CREATE TABLE IF NOT EXISTS turnos (
+    id INTEGER PRIMARY KEY,
+    sesion INTEGER NOT NULL REFERENCES sesiones(id) ON DELETE CASCADE,
+    speaker INTEGER,
+    inicio REAL,
+    fin REAL,
+    texto TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS turnos_sesion ON turnos(sesion);
+CREATE VIRTUAL TABLE IF NOT EXISTS turnos_fts USING fts5(
+    texto, content='turnos', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS turnos_ai AFTER INSERT ON turnos BEGIN
+    INSERT INTO turnos_fts(rowid, texto) VALUES (new.id, new.texto);
+END;
+CREATE TRIGGER IF NOT EXISTS turnos_ad AFTER DELETE ON turnos BEGIN
+    INSERT INTO turnos_fts(turnos_fts, rowid, texto) VALUES ('delete', old.id, old.texto);
+END;
+"""
+
+# Línea de turno del reporte de texto: [mm:ss - mm:ss] Speaker N: texto
+_LINEA_TURNO = re.compile(r"^\[(\d+):(\d{2}) - (\d+):(\d{2})\] Speaker (\d+): (.*)$")
+
+
+class IndiceTranscripciones:
+    """
+    Índice invertido sobre los turnos de todas las sesiones transcritas
+    """
+
+    def __init__(self, ruta=None):
+        self.ruta = ruta or os.path.expanduser("~/.cache/transcriptor_medico/indice.db")
+        directorio = os.path.dirname(self.ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        self._lock = threading.Lock()
+        with self._conectar() as conexion:
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.executescript(ESQUEMA)
+
+    @contextmanager
+    def _conectar(self):
+        """
+        Conexión de corta duración: confirma al salir del bloque y se cierra
+        """
+        conexion = sqlite3.connect(self.ruta, timeout=30)
+        try:
+            conexion.execute("PRAGMA foreign_keys=ON")
+            conexion.row_factory = sqlite3.Row
+            with conexion:
+                yield conexion
+        finally:
+            conexion.close()
+
+    def agregar(self, resultado, ruta_salida, session_id=None):
+        """
+        Indexar (o re-indexar) un resultado de TranscriptorMedico; devuelve
+        el número de turnos indexados
+        """
+        turnos = resultado.get("turnos")
+        if turnos:
+            filas = [(t["speaker"], t["inicio"], t["fin"], t["texto"]) for t in turnos]
+        else:
+            # Sin timestamps: la transcripción completa como un único turno sin speaker
+            filas = [(None, None, None, resultado["transcript"])]
+
+        sesion = (
+            os.path.abspath(ruta_salida),
+            resultado.get("archivo"),
+            session_id,
+            resultado.get("timestamp"),
+            resultado.get("modelo"),
+            resultado.get("confidence"),
+            resultado.get("audio_segundos")
+        )
+
+        with self._lock, self._conectar() as conexion:
+            conexion.execute("DELETE FROM sesiones WHERE ruta_salida = ?", (sesion[0],))
+            cursor = conexion.execute(
+                "INSERT INTO sesiones (ruta_salida, archivo, session_id, timestamp, modelo, confidence, audio_segundos) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", sesion
+            )
+            conexion.executemany(
+                "INSERT INTO turnos (sesion, speaker, inicio, fin, texto) VALUES (?, ?, ?, ?, ?)",
+                [(cursor.lastrowid, *fila) for fila in filas]
+            )
+
+        return len(filas)
+
+    def buscar(self, consulta, speaker=None, archivo=None, desde=None, hasta=None, limite=50):
+        """
+        Turnos que cumplen la consulta FTS5 (palabras, "frases", prefijo*,
+        AND/OR/NOT, NEAR), ordenados por relevancia. Filtros opcionales por
+        speaker, nombre de archivo (subcadena) y fecha ISO de la sesión.
+        """
+        condiciones = ["turnos_fts MATCH ?"]
+        parametros = [consulta]
+
+        if speaker is not None:
+            condiciones.append("t.speaker = ?")
+            parametros.append(speaker)
+        if archivo:
+            condiciones.append("s.archivo LIKE ?")
+            parametros.append(f"%{archivo}%")
+        if desde:
+            condiciones.append("s.timestamp >= ?")
+            parametros.append(desde)
+        if hasta:
+            condiciones.append("s.timestamp < ?")
+            parametros.append(hasta)
+
+        sql = (
+            "SELECT s.archivo, s.ruta_salida, s.timestamp, t.speaker, t.inicio, t.fin, "
+            "snippet(turnos_fts, 0, '[', ']', '…', 16) AS fragmento "
+            "FROM turnos_fts JOIN turnos t ON t.id = turnos_fts.rowid JOIN sesiones s ON s.id = t.sesion "
+            f"WHERE {' AND '.join(condiciones)} ORDER BY rank LIMIT ?"
+        )
+        parametros.append(limite)
+
+        with self._conectar() as conexion:
+            return [dict(fila) for fila in conexion.execute(sql, parametros)]
+
+    def sesiones(self, consulta):
+        """
+        Sesiones que mencionan la consulta, con el número de turnos que coinciden
+        """
+        sql = (
+            "SELECT s.archivo, s.ruta_salida, s.timestamp, COUNT(*) AS coincidencias "
+            "FROM turnos_fts JOIN turnos t ON t.id = turnos_fts.rowid JOIN sesiones s ON s.id = t.sesion "
+            "WHERE turnos_fts MATCH ? GROUP BY s.id ORDER BY coincidencias DESC, s.timestamp DESC"
+        )
+        with self._conectar() as conexion:
+            return [dict(fila) for fila in conexion.execute(sql, (consulta,))]
+
+    def indexar_reporte(self, ruta_reporte):
+        """
+        Indexar un reporte .txt ya existente (para incorporar el archivo
+        anterior al índice); devuelve el número de turnos
+        """
+        return self.agregar(leer_reporte(ruta_reporte), ruta_reporte)
+
+    def estadisticas(self):
+        with self._conectar() as conexion:
+            sesiones = conexion.execute("SELECT COUNT(*) FROM sesiones").fetchone()[0]
+            turnos = conexion.execute("SELECT COUNT(*) FROM turnos").fetchone()[0]
+        return {
+            "sesiones": sesiones,
+            "turnos": turnos,
+            "megabytes": os.path.getsize(self.ruta) / (1024 * 1024)
+        }
+
+
+def leer_reporte(ruta_reporte):
+    """
+    Resultado mínimo (archivo, timestamp, modelo, transcripción y turnos)
+    reconstruido desde un reporte de texto de TranscriptorMedico
+    """
+    resultado = {"archivo": None, "timestamp": None, "modelo": None, "transcript": "", "turnos": []}
+    seccion = None
+    transcripcion = []
+
+    with open(ruta_reporte, "r", encoding="utf-8") as f:
+        for linea in f:
+            linea = linea.rstrip("\n")
+
+            if linea.endswith(":") and linea.isupper():
+                seccion = linea[:-1]
+                continue
+            if set(linea) <= {"-", "="}:
+                continue
+
+            if seccion == "INFORMACIÓN DE LA SESIÓN":
+                campo, _, valor = linea.partition(": ")
+                if campo in ("Archivo", "Timestamp", "Modelo"):
+                    resultado[campo.lower()] = valor
+            elif seccion == "TRANSCRIPCIÓN COMPLETA" and linea:
+                transcripcion.append(linea)
+            elif seccion == "TURNOS CON TIMESTAMPS":
+                turno = _LINEA_TURNO.match(linea)
+                if turno:
+                    m1, s1, m2, s2, speaker, texto = turno.groups()
+                    resultado["turnos"].append({
+                        "speaker": int(speaker),
+                        "inicio": int(m1) * 60 + int(s1),
+                        "fin": int(m2) * 60 + int(s2),
+                        "texto": texto
+                    })
+
+    resultado["transcript"] = "\n".join(transcripcion)
+    return resultado
+
+
+def _mm_ss(segundos):
+    if segundos is None:
+        return "--:--"
+    segundos = int(segundos)
+    return f"{segundos // 60:02d}:{segundos % 60:02d}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Índice de texto completo de transcripciones médicas")
+    parser.add_argument("--indice", help="Ruta de la base de datos del índice")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    buscar = subparsers.add_parser("buscar", help="Buscar turnos")
+    buscar.add_argument("consulta", help='Consulta FTS5: palabras, "frases", prefijo*, AND/OR/NOT, NEAR')
+    buscar.add_argument("--speaker", type=int)
+    buscar.add_argument("--archivo", help="Subcadena del nombre del audio")
+    buscar.add_argument("--desde", help="Fecha ISO mínima (AAAA-MM-DD)")
+    buscar.add_argument("--hasta", help="Fecha ISO máxima, exclusiva")
+    buscar.add_argument("--limite", type=int, default=50)
+    buscar.add_argument("--sesiones", action="store_true", help="Agrupar por sesión")
+
+    indexar = subparsers.add_parser("indexar", help="Indexar reportes .txt existentes")
+    indexar.add_argument("reportes", nargs="*", default=["transcripcion_medica_optimizada_*.txt"])
+
+    subparsers.add_parser("estadisticas", help="Tamaño del índice")
+
+    args = parser.parse_args()
+    indice = IndiceTranscripciones(args.indice)
+
+    if args.comando == "buscar":
+        try:
+            if args.sesiones:
+                for sesion in indice.sesiones(args.consulta):
+                    print(f"{sesion['coincidencias']:>4}x  {sesion['timestamp']}  {sesion['archivo']}  ({sesion['ruta_salida']})")
+                return
+
+            resultados = indice.buscar(args.consulta, args.speaker, args.archivo, args.desde, args.hasta, args.limite)
+        except sqlite3.OperationalError as e:
+            print(f"❌ Consulta inválida: {e}")
+            sys.exit(1)
+
+        if not resultados:
+            print("🔍 Sin resultados")
+        for r in resultados:
+            print(f"📄 {r['archivo']} [{_mm_ss(r['inicio'])} - {_mm_ss(r['fin'])}] Speaker {r['speaker']}: {r['fragmento']}")
+
+    elif args.comando == "indexar":
+        rutas = sorted({ruta for patron in args.reportes for ruta in glob.glob(patron)})
+        turnos = sum(indice.indexar_reporte(ruta) for ruta in rutas)
+        print(f"✅ {len(rutas)} reportes indexados ({turnos} turnos)")
+
+    else:
+        stats = indice.estadisticas()
+        print(f"📚 {stats['sesiones']} sesiones, {stats['turnos']} turnos, {stats['megabytes']:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
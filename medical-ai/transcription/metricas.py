@@ -0,0 +1,133 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Metricas:
+    """
+    Instrumentación del pipeline: tramos (spans) con tiempo por etapa,
+    contadores y observaciones. Cada evento puede escribirse al momento en
+    un archivo JSON lines, y el agregado se exporta en formato de texto de
+    Prometheus (apto para el textfile collector de node_exporter).
+    """
+
+    def __init__(self, ruta_jsonl=None, prefijo="transcriptor"):
+        self.prefijo = prefijo
+        self.etapas = {}        # etapa -> {"cantidad", "suma", "max"}
+        self.contadores = {}    # nombre -> total
+        self.observaciones = {} # nombre -> {"cantidad", "suma", "ultimo"}
+
+        self._lock = threading.Lock()
+        self._jsonl = open(ruta_jsonl, "a", encoding="utf-8", buffering=1) if ruta_jsonl else None
+
+    def _emitir(self, evento):
+        if self._jsonl:
+            evento["ts"] = time.time()
+            linea = json.dumps(evento, ensure_ascii=False, default=str)
+            with self._lock:
+                self._jsonl.write(linea + "\n")
+
+    @contextmanager
+    def span(self, etapa, **atributos):
+        """
+        Medir el bloque como una ejecución de `etapa`; vale también alrededor de un await
+        """
+        inicio = time.perf_counter()
+        error = None
+        try:
+            yield atributos
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            duracion = time.perf_counter() - inicio
+            with self._lock:
+                agregado = self.etapas.setdefault(etapa, {"cantidad": 0, "suma": 0.0, "max": 0.0})
+                agregado["cantidad"] += 1
+                agregado["suma"] += duracion
+                agregado["max"] = max(agregado["max"], duracion)
+            evento = {"tipo": "span", "etapa": etapa, "segundos": duracion, **atributos}
+            if error:
+                evento["error"] = error
+            self._emitir(evento)
+
+    def contar(self, nombre, valor=1):
+        with self._lock:
+            self.contadores[nombre] = self.contadores.get(nombre, 0) + valor
+        self._emitir({"tipo": "contador", "nombre": nombre, "valor": valor})
+
+    def observar(self, nombre, valor, **atributos):
+        with self._lock:
+            observacion = self.observaciones.setdefault(nombre, {"cantidad": 0, "suma": 0.0, "ultimo": 0.0})
+            observacion["cantidad"] += 1
+            observacion["suma"] += valor
+            observacion["ultimo"] = valor
+        self._emitir({"tipo": "observacion", "nombre": nombre, "valor": valor, **atributos})
+
+    def resumen(self):
+        """
+        Copia del estado agregado
+        """
+        with self._lock:
+            return {
+                "etapas": {etapa: dict(agregado) for etapa, agregado in self.etapas.items()},
+                "contadores": dict(self.contadores),
+                "observaciones": {nombre: dict(obs) for nombre, obs in self.observaciones.items()}
+            }
+
+    def exportar_prometheus(self, ruta):
+        """
+        Escribir el agregado en formato de texto de Prometheus (escritura atómica)
+        """
+        resumen = self.resumen()
+        p = self.prefijo
+        lineas = [
+            f"# HELP {p}_etapa_segundos Tiempo por etapa del pipeline de transcripción",
+            f"# TYPE {p}_etapa_segundos summary"
+        ]
+        for etapa, agregado in sorted(resumen["etapas"].items()):
+            lineas.append(f'{p}_etapa_segundos_sum{{etapa="{etapa}"}} {agregado["suma"]:.6f}')
+            lineas.append(f'{p}_etapa_segundos_count{{etapa="{etapa}"}} {agregado["cantidad"]}')
+        lineas.append(f"# TYPE {p}_etapa_segundos_max gauge")
+        for etapa, agregado in sorted(resumen["etapas"].items()):
+            lineas.append(f'{p}_etapa_segundos_max{{etapa="{etapa}"}} {agregado["max"]:.6f}')
+
+        for nombre, total in sorted(resumen["contadores"].items()):
+            lineas.append(f"# TYPE {p}_{nombre}_total counter")
+            lineas.append(f"{p}_{nombre}_total {total}")
+
+        for nombre, obs in sorted(resumen["observaciones"].items()):
+            lineas.append(f"# TYPE {p}_{nombre} gauge")
+            lineas.append(f"{p}_{nombre} {obs['ultimo']:.6f}")
+
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            f.write("\n".join(lineas) + "\n")
+        os.replace(temporal, ruta)
+
+    def mostrar_resumen(self):
+        """
+        Tiempos por etapa en pantalla
+        """
+        resumen = self.resumen()
+        if not resumen["etapas"]:
+            return
+
+        print(f"\n⏱️ TIEMPOS POR ETAPA:")
+        print("=" * 30)
+        for etapa, agregado in resumen["etapas"].items():
+            promedio = agregado["suma"] / agregado["cantidad"]
+            print(f"  • {etapa}: {agregado['suma']:.2f}s total, {promedio:.2f}s promedio ({agregado['cantidad']}x)")
+
+        contadores = resumen["contadores"]
+        if contadores.get("bytes_subidos"):
+            print(f"  • Subido: {contadores['bytes_subidos'] / (1024 * 1024):.2f} MB")
+        if "factor_tiempo_real" in resumen["observaciones"]:
+            print(f"  • Factor tiempo real: {resumen['observaciones']['factor_tiempo_real']['ultimo']:.1f}x")
+
+    def cerrar(self):
+        if self._jsonl:
+            self._jsonl.close()
+            self._jsonl = None
@@ -0,0 +1,186 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+_FIN = object()
+
+
+class PipelineLote:
+    """
+    Pipeline de dos etapas para lotes: el preprocesado con ffmpeg corre en un
+    pool de hilos y alimenta una cola acotada, de la que consumen las subidas
+    a Deepgram. Así el filtrado del archivo N+1 se solapa con la espera de red
+    del archivo N.
+
+    ffmpeg ya corre como proceso aparte, así que basta un pool de hilos:
+    cada hilo solo espera a su subproceso y no compite por el GIL. Con la
+    decodificación interna del transcriptor el preprocesado es PyAV/SciPy,
+    que sueltan el GIL en la decodificación y el filtrado, y la cola lleva
+    buffers en memoria en lugar de rutas.
+    """
+
+    def __init__(self, transcriptor, workers_ffmpeg=2, workers_subida=4, tamano_cola=4):
+        self.transcriptor = transcriptor
+        self.workers_ffmpeg = workers_ffmpeg
+        self.workers_subida = workers_subida
+        self.tamano_cola = tamano_cola
+
+        self._inicio = None
+        self._fin = None
+        self._ocupado = {"preprocesado": 0.0, "subida": 0.0}
+        self._cola = None
+        self._cola_max = 0
+        self._cola_profundidad = 0
+        self._cola_integral = 0.0
+        self._cola_ultimo_cambio = None
+
+    async def ejecutar(self, archivos, duracion_segundos=300, incluir_timestamps=True):
+        """
+        Procesar los archivos y entregar cada resultado en cuanto termina
+        """
+        self._inicio = time.perf_counter()
+        self._fin = None
+        self._cola_ultimo_cambio = self._inicio
+        self._cola = asyncio.Queue(maxsize=self.tamano_cola)
+
+        pendientes = asyncio.Queue()
+        for archivo in archivos:
+            pendientes.put_nowait(archivo)
+
+        resultados = asyncio.Queue()
+        pool = ThreadPoolExecutor(max_workers=self.workers_ffmpeg, thread_name_prefix="ffmpeg")
+        loop = asyncio.get_running_loop()
+        en_memoria = self.transcriptor.decodificacion == "interna"
+        preparar = self.transcriptor.preparar_en_memoria if en_memoria else self.transcriptor.crear_segmento_optimizado
+
+        async def preprocesar():
+            while not pendientes.empty():
+                archivo = pendientes.get_nowait()
+                inicio = time.perf_counter()
+                segmento = await loop.run_in_executor(pool, preparar, archivo, duracion_segundos)
+                tiempo = time.perf_counter() - inicio
+                self._ocupado["preprocesado"] += tiempo
+
+                if segmento:
+                    # put() bloquea si la cola está llena: contrapresión sobre ffmpeg
+                    await self._cola.put((archivo, segmento, tiempo, time.perf_counter()))
+                    self._registrar_cola()
+                else:
+                    await resultados.put(self._crear_item(archivo, None, None, tiempo, 0.0, 0.0))
+
+        async def subir():
+            while True:
+                elemento = await self._cola.get()
+                if elemento is _FIN:
+                    return
+                self._registrar_cola()
+                archivo, segmento, tiempo_ffmpeg, encolado = elemento
+                espera = time.perf_counter() - encolado
+
+                inicio = time.perf_counter()
+                if en_memoria:
+                    resultado = await self.transcriptor.transcribir_en_memoria(
+                        archivo, incluir_timestamps=incluir_timestamps, audio=segmento
+                    )
+                else:
+                    resultado = await self.transcriptor.transcribir_optimizado(segmento, incluir_timestamps)
+                tiempo_subida = time.perf_counter() - inicio
+                self._ocupado["subida"] += tiempo_subida
+
+                await resultados.put(self._crear_item(archivo, segmento, resultado, tiempo_ffmpeg, tiempo_subida, espera))
+
+        async def coordinar():
+            await asyncio.gather(*(preprocesar() for _ in range(self.workers_ffmpeg)))
+            # Señal de fin para cada consumidor; no cuenta como profundidad de cola
+            for _ in range(self.workers_subida):
+                await self._cola.put(_FIN)
+            await asyncio.gather(*consumidores)
+
+        consumidores = [asyncio.create_task(subir()) for _ in range(self.workers_subida)]
+        coordinador = asyncio.create_task(coordinar())
+
+        try:
+            for _ in range(len(archivos)):
+                yield await resultados.get()
+            await coordinador
+        finally:
+            coordinador.cancel()
+            for tarea in consumidores:
+                tarea.cancel()
+            pool.shutdown(wait=False)
+            self._fin = time.perf_counter()
+
+    def _crear_item(self, archivo, segmento, resultado, tiempo_ffmpeg, tiempo_subida, espera_cola):
+        """
+        Resultado por archivo con sus tiempos de cada etapa; `segmento` es la
+        ruta del segmento o, con decodificación interna, el AudioPreparado
+        """
+        en_memoria = segmento is not None and not isinstance(segmento, str)
+        if resultado:
+            audio_segundos = resultado["audio_segundos"]
+        elif en_memoria:
+            audio_segundos = segmento.segundos
+        else:
+            audio_segundos = self.transcriptor._duracion_audio(segmento) if segmento else 0.0
+        if en_memoria:
+            megabytes = segmento.bytes / (1024 * 1024)
+        else:
+            megabytes = os.path.getsize(segmento) / (1024 * 1024) if segmento else 0.0
+        tiempo = tiempo_ffmpeg + espera_cola + tiempo_subida
+
+        return {
+            "archivo": archivo,
+            "segmento": None if en_memoria else segmento,
+            "resultado": resultado,
+            "tiempo_segundos": tiempo,
+            "tiempo_ffmpeg_segundos": tiempo_ffmpeg,
+            "tiempo_subida_segundos": tiempo_subida,
+            "espera_cola_segundos": espera_cola,
+            "audio_segundos": audio_segundos,
+            "megabytes": megabytes,
+            "factor_tiempo_real": audio_segundos / tiempo if tiempo > 0 else 0.0,
+            "mb_por_segundo": megabytes / tiempo if tiempo > 0 else 0.0
+        }
+
+    def _registrar_cola(self):
+        """
+        Acumular profundidad de cola ponderada por tiempo
+        """
+        ahora = time.perf_counter()
+        self._cola_integral += self._cola_profundidad * (ahora - self._cola_ultimo_cambio)
+        self._cola_ultimo_cambio = ahora
+        self._cola_profundidad = self._cola.qsize()
+        self._cola_max = max(self._cola_max, self._cola_profundidad)
+
+    def estadisticas(self):
+        """
+        Profundidad de cola y utilización de cada etapa, para dimensionar los pools
+        """
+        if self._inicio is None:
+            return None
+
+        transcurrido = (self._fin or time.perf_counter()) - self._inicio
+
+        def utilizacion(etapa, workers):
+            return self._ocupado[etapa] / (transcurrido * workers) if transcurrido > 0 else 0.0
+
+        return {
+            "transcurrido_segundos": transcurrido,
+            "cola": {
+                "capacidad": self.tamano_cola,
+                "profundidad_actual": self._cola.qsize() if self._cola else 0,
+                "profundidad_maxima": self._cola_max,
+                "profundidad_promedio": self._cola_integral / transcurrido if transcurrido > 0 else 0.0
+            },
+            "preprocesado": {
+                "workers": self.workers_ffmpeg,
+                "ocupado_segundos": self._ocupado["preprocesado"],
+                "utilizacion": utilizacion("preprocesado", self.workers_ffmpeg)
+            },
+            "subida": {
+                "workers": self.workers_subida,
+                "ocupado_segundos": self._ocupado["subida"],
+                "utilizacion": utilizacion("subida", self.workers_subida)
+            }
+        }
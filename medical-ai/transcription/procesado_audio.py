@@ -0,0 +1,287 @@
+import math
+import struct
+import threading
+
+import numpy as np
+
+FRECUENCIA_SALIDA = 16000
+TAMANO_CABECERA_WAV = 44
+
+
+def cabecera_wav(bytes_pcm, frecuencia=FRECUENCIA_SALIDA, canales=1, bits=16):
+    """
+    Cabecera RIFF/WAVE de 44 bytes para `bytes_pcm` bytes de PCM entero
+    """
+    bloque = canales * bits // 8
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + bytes_pcm, b"WAVE",
+        b"fmt ", 16, 1, canales, frecuencia, frecuencia * bloque, bloque, bits,
+        b"data", bytes_pcm
+    )
+
+
+def coeficientes_biquad(tipo, frecuencia_corte, frecuencia, q=0.707):
+    """
+    Sección de segundo orden (formato sos de SciPy) de un filtro paso alto o
+    paso bajo con los coeficientes del "Audio EQ Cookbook", los mismos que
+    usan los filtros highpass/lowpass de ffmpeg con sus opciones por defecto
+    """
+    w0 = 2 * np.pi * frecuencia_corte / frecuencia
+    coseno = np.cos(w0)
+    alpha = np.sin(w0) / (2 * q)
+
+    if tipo == "highpass":
+        b = [(1 + coseno) / 2, -(1 + coseno), (1 + coseno) / 2]
+    elif tipo == "lowpass":
+        b = [(1 - coseno) / 2, 1 - coseno, (1 - coseno) / 2]
+    else:
+        raise ValueError(f"Filtro no soportado: {tipo}")
+
+    a0 = 1 + alpha
+    return np.array([[b[0] / a0, b[1] / a0, b[2] / a0, 1.0, -2 * coseno / a0, (1 - alpha) / a0]])
+
+
+def _mezclar_mono(canales):
+    """
+    Promedio de los canales (lista o filas de un array) en float32; sumar
+    columna a columna es mucho más rápido que mean(axis=...) en arrays intercalados
+    """
+    mono = np.array(canales[0], dtype=np.float32)
+    for canal in canales[1:]:
+        mono += canal
+    if len(canales) > 1:
+        mono *= 1 / len(canales)
+    return mono
+
+
+def _decodificar_av(ruta, inicio_segundos, duracion_segundos):
+    """
+    Decodificar con PyAV (libavcodec): cualquier formato que lea ffmpeg
+    """
+    import av
+
+    bloques = []
+    escritas = 0
+    descartar = None
+
+    with av.open(ruta) as contenedor:
+        stream = contenedor.streams.audio[0]
+        frecuencia = stream.rate
+        maximo = int(round(duracion_segundos * frecuencia))
+        if inicio_segundos:
+            contenedor.seek(int(inicio_segundos / stream.time_base), stream=stream)
+        # Solo se convierte el formato de muestra: la frecuencia y los canales se tratan en NumPy
+        conversor = av.AudioResampler(format="fltp")
+
+        for trama in contenedor.decode(stream):
+            if descartar is None:
+                # Sin seek no se recorta nada: el pts inicial puede ser negativo por el retardo del códec
+                tiempo = float(trama.pts * trama.time_base) if trama.pts is not None else inicio_segundos
+                descartar = max(0, int(round((inicio_segundos - tiempo) * frecuencia))) if inicio_segundos else 0
+            for convertida in conversor.resample(trama):
+                bloque = _mezclar_mono(convertida.to_ndarray())
+                if descartar:
+                    # El seek cae en un keyframe anterior: recortar hasta el inicio pedido
+                    recorte = min(descartar, bloque.size)
+                    bloque = bloque[recorte:]
+                    descartar -= recorte
+                bloque = bloque[:maximo - escritas]
+                bloques.append(bloque)
+                escritas += bloque.size
+            if escritas >= maximo:
+                break
+
+    mono = np.concatenate(bloques) if bloques else np.zeros(0, dtype=np.float32)
+    return mono.astype(np.float32, copy=False), frecuencia
+
+
+def _decodificar_soundfile(ruta, inicio_segundos, duracion_segundos):
+    """
+    Decodificar con soundfile (libsndfile: WAV, FLAC, OGG, MP3 según versión)
+    """
+    import soundfile as sf
+
+    with sf.SoundFile(ruta) as archivo:
+        frecuencia = archivo.samplerate
+        if inicio_segundos:
+            archivo.seek(min(int(inicio_segundos * frecuencia), archivo.frames))
+        muestras = archivo.read(int(duracion_segundos * frecuencia), dtype="float32", always_2d=True)
+
+    return _mezclar_mono(muestras.T), frecuencia
+
+
+def decodificar(ruta, inicio_segundos=0, duracion_segundos=300):
+    """
+    (audio mono float32 en [-1, 1], frecuencia original), decodificado en el
+    propio proceso. soundfile (una sola lectura en C) se usa para los formatos
+    que entiende libsndfile y PyAV para el resto (m4a, aac...). Varios
+    canales se promedian, como hace `-ac 1` en ffmpeg.
+    """
+    try:
+        import soundfile
+    except ImportError:
+        soundfile = None
+
+    if soundfile is not None:
+        try:
+            return _decodificar_soundfile(ruta, inicio_segundos, duracion_segundos)
+        except soundfile.LibsndfileError:
+            pass  # Formato que libsndfile no lee: probar con PyAV
+
+    try:
+        import av  # noqa: F401
+    except ImportError:
+        raise RuntimeError("Decodificación interna no disponible para este formato. Instala con: pip install av soundfile")
+    return _decodificar_av(ruta, inicio_segundos, duracion_segundos)
+
+
+class AudioPreparado:
+    """
+    WAV de 16 kHz mono en un buffer del pool: `vista` es un memoryview que
+    se sube tal cual, sin copias. Llamar a liberar() cuando termine la subida.
+    """
+
+    def __init__(self, procesador, buffer, bytes_wav, segundos):
+        self._procesador = procesador
+        self._buffer = buffer
+        self.vista = memoryview(buffer)[:bytes_wav]
+        self.bytes = bytes_wav
+        self.segundos = segundos
+
+    def liberar(self):
+        if self._buffer is not None:
+            self.vista.release()
+            self._procesador._devolver(self._buffer)
+            self._buffer = None
+
+
+class ProcesadorAudio:
+    """
+    Alternativa en proceso al ffmpeg por segmento: decodifica, aplica los
+    filtros de voz (biquads paso alto/paso bajo) y la ganancia, remuestrea a
+    16 kHz mono y escribe el PCM de 16 bits en buffers reutilizables. Con
+    miles de archivos cortos ahorra arrancar un proceso y escribir un archivo
+    temporal por segmento.
+
+    Sigue el orden de la cadena de ffmpeg (filtros a la frecuencia original y
+    después remuestreo), así que el resultado coincide con el del segmento
+    de ffmpeg salvo por el filtro de remuestreo. Un filtro en o por encima
+    de Nyquist se omite: no atenúa nada y el biquad sería inestable.
+
+    El pool de buffers libres se limita a max_buffers_libres buffers y
+    max_megabytes_libres MB: al pasarse se descartan los más grandes, para
+    que un archivo largo no deje su memoria retenida el resto del proceso.
+    """
+
+    def __init__(self, frecuencia=FRECUENCIA_SALIDA, paso_alto=100, paso_bajo=8000, ganancia=1.2,
+                 max_buffers_libres=8, max_megabytes_libres=64):
+        self.frecuencia = frecuencia
+        self.paso_alto = paso_alto
+        self.paso_bajo = paso_bajo
+        self.ganancia = ganancia
+        self.max_buffers_libres = max_buffers_libres
+        self.max_bytes_libres = int(max_megabytes_libres * 1024 * 1024)
+
+        self._secciones = {}  # frecuencia de entrada -> sos
+        self._filtros_remuestreo = {}  # (up, down) -> FIR de resample_poly
+        self._libres = []
+        self._lock = threading.Lock()
+        self.buffers_creados = 0
+        self.buffers_reutilizados = 0
+        self.buffers_descartados = 0
+        self._bytes_libres = 0
+
+    def secciones(self, frecuencia):
+        """
+        Filtros en formato sos para audio a `frecuencia` Hz, o None si ninguno aplica
+        """
+        if frecuencia not in self._secciones:
+            secciones = []
+            for tipo, corte in (("highpass", self.paso_alto), ("lowpass", self.paso_bajo)):
+                if corte and corte < 0.49 * frecuencia:
+                    secciones.append(coeficientes_biquad(tipo, corte, frecuencia))
+            self._secciones[frecuencia] = np.vstack(secciones) if secciones else None
+        return self._secciones[frecuencia]
+
+    def procesar(self, ruta, duracion_segundos=300, inicio_segundos=0):
+        """
+        AudioPreparado con el tramo filtrado de `ruta`
+        """
+        muestras, frecuencia = decodificar(ruta, inicio_segundos, duracion_segundos)
+
+        sos = self.secciones(frecuencia)
+        if sos is not None and muestras.size:
+            from scipy.signal import sosfilt
+            muestras = sosfilt(sos.astype(np.float32), muestras)
+
+        if frecuencia != self.frecuencia and muestras.size:
+            from scipy.signal import resample_poly
+            divisor = math.gcd(self.frecuencia, frecuencia)
+            subir, bajar = self.frecuencia // divisor, frecuencia // divisor
+            muestras = resample_poly(muestras, subir, bajar, window=self._filtro_remuestreo(subir, bajar))
+
+        bytes_pcm = muestras.size * 2
+        buffer = self._tomar(TAMANO_CABECERA_WAV + bytes_pcm)
+        buffer[:TAMANO_CABECERA_WAV] = np.frombuffer(cabecera_wav(bytes_pcm, self.frecuencia), dtype=np.uint8)
+
+        # Ganancia, redondeo y saturación a int16 escribiendo directamente en el buffer
+        pcm = buffer[TAMANO_CABECERA_WAV:TAMANO_CABECERA_WAV + bytes_pcm].view("<i2")
+        escalado = np.multiply(muestras, self.ganancia * 32768.0, dtype=np.float32)
+        np.rint(escalado, out=escalado)
+        np.clip(escalado, -32768, 32767, out=escalado)
+        pcm[:] = escalado
+
+        return AudioPreparado(self, buffer, TAMANO_CABECERA_WAV + bytes_pcm, muestras.size / self.frecuencia)
+
+    def _filtro_remuestreo(self, subir, bajar):
+        """
+        El mismo FIR que diseña resample_poly por defecto, calculado una vez
+        por par de frecuencias en lugar de en cada archivo
+        """
+        if (subir, bajar) not in self._filtros_remuestreo:
+            from scipy.signal import firwin
+            factor = max(subir, bajar)
+            self._filtros_remuestreo[(subir, bajar)] = firwin(
+                2 * 10 * factor + 1, 1 / factor, window=("kaiser", 5.0)
+            ).astype(np.float32)
+        return self._filtros_remuestreo[(subir, bajar)]
+
+    def _tomar(self, tamano):
+        """
+        Buffer libre de al menos `tamano` bytes; si ninguno basta se crea uno nuevo
+        """
+        with self._lock:
+            for i, buffer in enumerate(self._libres):
+                if buffer.size >= tamano:
+                    self.buffers_reutilizados += 1
+                    self._bytes_libres -= buffer.size
+                    return self._libres.pop(i)
+            self.buffers_creados += 1
+        return np.empty(tamano, dtype=np.uint8)
+
+    def _devolver(self, buffer):
+        """
+        Devolver un buffer al pool, descartando los más grandes si se pasa de los límites
+        """
+        with self._lock:
+            self._libres.append(buffer)
+            self._bytes_libres += buffer.size
+            while self._libres and (len(self._libres) > self.max_buffers_libres
+                                    or self._bytes_libres > self.max_bytes_libres):
+                mayor = max(range(len(self._libres)), key=lambda i: self._libres[i].size)
+                self._bytes_libres -= self._libres.pop(mayor).size
+                self.buffers_descartados += 1
+
+    def estadisticas(self):
+        """
+        Buffers creados y reutilizados, y memoria retenida en el pool
+        """
+        with self._lock:
+            return {
+                "buffers_creados": self.buffers_creados,
+                "buffers_reutilizados": self.buffers_reutilizados,
+                "buffers_descartados": self.buffers_descartados,
+                "buffers_libres": len(self._libres),
+                "megabytes_libres": self._bytes_libres / (1024 * 1024)
+            }
@@ -0,0 +1,278 @@
+import asyncio
+import json
+import os
+from datetime import datetime
+
+# Límites de cada subtítulo al agrupar palabras
+MAX_SEGUNDOS_SUBTITULO = 7.0
+MAX_CARACTERES_SUBTITULO = 84
+PAUSA_CORTE_SUBTITULO = 1.0
+
+
+def renderizar_texto(resultado, incluir_timestamps, session_id):
+    """
+    Reporte legible con transcripción, análisis médico, speakers y turnos
+    """
+    lineas = []
+    escribir = lineas.append
+
+    escribir("TRANSCRIPCIÓN MÉDICA OPTIMIZADA - NOVA-2\n")
+    escribir("=" * 60 + "\n\n")
+
+    # Información del archivo
+    escribir("INFORMACIÓN DE LA SESIÓN:\n")
+    escribir("-" * 30 + "\n")
+    escribir(f"Archivo: {resultado['archivo']}\n")
+    escribir(f"Timestamp: {resultado['timestamp']}\n")
+    escribir(f"Modelo: {resultado['modelo']}\n")
+    escribir(f"Confianza: {resultado['confidence']:.2%}\n")
+    escribir(f"Sesión ID: {session_id}\n\n")
+
+    # Transcripción principal
+    escribir("TRANSCRIPCIÓN COMPLETA:\n")
+    escribir("-" * 25 + "\n")
+    escribir(resultado['transcript'])
+    escribir("\n\n")
+
+    # Análisis médico
+    if resultado['analisis']:
+        escribir("ANÁLISIS DE CONTENIDO MÉDICO:\n")
+        escribir("-" * 35 + "\n")
+
+        for categoria, contenido in resultado['analisis'].items():
+            if categoria == "ESTADISTICAS":
+                escribir(f"\n{categoria}:\n")
+                for key, value in contenido.items():
+                    escribir(f"  • {key}: {value}\n")
+            elif categoria == "SENTIMENT":
+                escribir(f"\n{categoria}:\n")
+                escribir(f"  • Score: {contenido['score']}\n")
+                escribir(f"  • Interpretación: {contenido['interpretacion']}\n")
+            else:
+                escribir(f"\n{categoria}:\n")
+                for palabra, count in contenido.items():
+                    escribir(f"  • {palabra}: {count} vez(es)\n")
+
+    # Análisis de speakers
+    if resultado['speakers']:
+        escribir("\n\nANÁLISIS POR SPEAKERS:\n")
+        escribir("-" * 25 + "\n")
+
+        for speaker_id, info in resultado['speakers'].items():
+            escribir(f"\n{info['rol_estimado']} (Speaker {speaker_id}):\n")
+            escribir(f"  • Palabras: {info['palabras']}\n")
+            escribir(f"  • Participación: {info['participacion_porcentaje']:.1f}%\n")
+            escribir(f"  • Tiempo de habla: {info['tiempo_habla_segundos'] / 60:.1f} min ({info['tiempo_habla_porcentaje']:.1f}%)\n")
+            escribir(f"  • Confianza promedio: {info['confianza_promedio']:.2%}\n")
+            escribir(f"  • Muestra de texto: {info['texto'][:200]}...\n")
+
+    # Dinámica de la conversación
+    if resultado.get('dinamica'):
+        dinamica = resultado['dinamica']
+        escribir("\n\nDINÁMICA DE LA CONVERSACIÓN:\n")
+        escribir("-" * 30 + "\n")
+        escribir(f"  • Turnos: {dinamica['turnos']}\n")
+        escribir(f"  • Duración media de turno: {dinamica['duracion_media_turno']:.1f}s "
+                 f"({dinamica['palabras_media_turno']:.1f} palabras)\n")
+        escribir(f"  • Interrupciones: {dinamica['interrupciones']}\n")
+        escribir(f"  • Solapamientos: {dinamica['solapamientos']}\n")
+        if dinamica['latencia_respuesta_paciente'] is not None:
+            escribir(f"  • Latencia de respuesta del paciente: {dinamica['latencia_respuesta_paciente']:.2f}s\n")
+        if dinamica['latencia_respuesta_medico'] is not None:
+            escribir(f"  • Latencia de respuesta del médico: {dinamica['latencia_respuesta_medico']:.2f}s\n")
+
+    # Turnos con timestamps
+    if incluir_timestamps and resultado.get('turnos'):
+        escribir("\n\nTURNOS CON TIMESTAMPS:\n")
+        escribir("-" * 25 + "\n")
+        for turno in resultado['turnos']:
+            inicio = int(turno['inicio'])
+            fin = int(turno['fin'])
+            escribir(f"[{inicio // 60:02d}:{inicio % 60:02d} - {fin // 60:02d}:{fin % 60:02d}] "
+                     f"Speaker {turno['speaker']}: {turno['texto']}\n")
+
+    # Recomendaciones
+    escribir("\n\nRECOMENDACIONES PARA MEJORA:\n")
+    escribir("-" * 35 + "\n")
+    if resultado['confidence'] >= 0.95:
+        escribir("✅ Excelente calidad de audio - mantener configuración\n")
+    elif resultado['confidence'] >= 0.90:
+        escribir("✅ Buena calidad - considerar mejores micrófonos\n")
+    else:
+        escribir("⚠️ Calidad mejorable - revisar audio fuente\n")
+
+    escribir("💡 Usar siempre modelo nova-2 para máxima precisión\n")
+    escribir("💡 Mantener segmentos de 2-5 minutos para mejor costo/beneficio\n")
+
+    return "".join(lineas)
+
+
+def renderizar_jsonl(resultado, incluir_timestamps, session_id):
+    """
+    Un registro "sesion" con metadatos y análisis, seguido de un registro
+    "turno" por turno de palabra, para consumir línea a línea (p. ej. en n8n)
+    """
+    sesion = {
+        "tipo": "sesion",
+        "session_id": session_id,
+        "archivo": resultado["archivo"],
+        "timestamp": resultado["timestamp"],
+        "modelo": resultado["modelo"],
+        "confidence": resultado["confidence"],
+        "audio_segundos": resultado.get("audio_segundos"),
+        "transcript": resultado["transcript"],
+        "analisis": resultado["analisis"],
+        "speakers": resultado["speakers"],
+        "dinamica": resultado.get("dinamica")
+    }
+
+    lineas = [json.dumps(sesion, ensure_ascii=False)]
+    for turno in resultado.get("turnos") or []:
+        lineas.append(json.dumps({"tipo": "turno", "session_id": session_id, **turno}, ensure_ascii=False))
+
+    return "\n".join(lineas) + "\n"
+
+
+def subtitulos(resultado):
+    """
+    (inicio, fin, speaker, texto) de cada subtítulo: palabras consecutivas del
+    mismo speaker, cortando en pausas, finales de frase o al superar los
+    límites de duración y longitud. Sin palabras se usa un subtítulo por turno.
+    """
+    palabras = resultado.get("palabras")
+    if not palabras:
+        return [(t["inicio"], t["fin"], t["speaker"], t["texto"]) for t in resultado.get("turnos") or []]
+
+    cues = []
+    actual = None
+
+    for palabra in palabras:
+        token = palabra.get("punctuated_word", palabra.get("word", ""))
+        speaker = palabra.get("speaker", 0)
+        inicio = palabra.get("start", 0.0)
+        fin = palabra.get("end", inicio)
+
+        if actual is not None:
+            cortar = (
+                speaker != actual["speaker"]
+                or inicio - actual["fin"] > PAUSA_CORTE_SUBTITULO
+                or fin - actual["inicio"] > MAX_SEGUNDOS_SUBTITULO
+                or actual["caracteres"] + 1 + len(token) > MAX_CARACTERES_SUBTITULO
+                or actual["tokens"][-1].endswith((".", "?", "!"))
+            )
+            if cortar:
+                cues.append((actual["inicio"], actual["fin"], actual["speaker"], " ".join(actual["tokens"])))
+                actual = None
+
+        if actual is None:
+            actual = {"inicio": inicio, "fin": fin, "speaker": speaker, "tokens": [], "caracteres": -1}
+
+        actual["fin"] = max(actual["fin"], fin)
+        actual["tokens"].append(token)
+        actual["caracteres"] += 1 + len(token)
+
+    if actual is not None:
+        cues.append((actual["inicio"], actual["fin"], actual["speaker"], " ".join(actual["tokens"])))
+
+    return cues
+
+
+def _tiempo_subtitulo(segundos, separador):
+    milisegundos = int(round(segundos * 1000))
+    horas, milisegundos = divmod(milisegundos, 3600000)
+    minutos, milisegundos = divmod(milisegundos, 60000)
+    segundos, milisegundos = divmod(milisegundos, 1000)
+    return f"{horas:02d}:{minutos:02d}:{segundos:02d}{separador}{milisegundos:03d}"
+
+
+def renderizar_srt(resultado, incluir_timestamps, session_id):
+    bloques = []
+    for numero, (inicio, fin, speaker, texto) in enumerate(subtitulos(resultado), 1):
+        bloques.append(f"{numero}\n{_tiempo_subtitulo(inicio, ',')} --> {_tiempo_subtitulo(fin, ',')}\n"
+                       f"[Speaker {speaker}] {texto}\n")
+    return "\n".join(bloques)
+
+
+def renderizar_vtt(resultado, incluir_timestamps, session_id):
+    bloques = ["WEBVTT\n"]
+    for inicio, fin, speaker, texto in subtitulos(resultado):
+        bloques.append(f"{_tiempo_subtitulo(inicio, '.')} --> {_tiempo_subtitulo(fin, '.')}\n"
+                       f"<v Speaker {speaker}>{texto}\n")
+    return "\n".join(bloques)
+
+
+# Formato -> función (resultado, incluir_timestamps, session_id) -> contenido
+FORMATOS = {
+    "txt": renderizar_texto,
+    "jsonl": renderizar_jsonl,
+    "srt": renderizar_srt,
+    "vtt": renderizar_vtt
+}
+
+
+def registrar_formato(extension, renderizador):
+    """
+    Añadir un formato de salida propio
+    """
+    FORMATOS[extension] = renderizador
+
+
+class SalidaTranscripcion:
+    """
+    Escribe los formatos elegidos a partir del mismo resultado en memoria.
+    Cada formato se genera completo en memoria y se escribe de una vez, en
+    un hilo aparte para no bloquear el event loop. Los nombres se reservan
+    con creación exclusiva: dos resultados en el mismo segundo no se pisan.
+    """
+
+    def __init__(self, formatos=("txt",), directorio=".", prefijo="transcripcion_medica_optimizada"):
+        # Sin espacios, vacíos ni repetidos: "txt, srt," equivale a ("txt", "srt")
+        formatos = tuple(dict.fromkeys(formato.strip() for formato in formatos if formato.strip()))
+        if not formatos:
+            raise ValueError(f"Indica al menos un formato de salida (opciones: {', '.join(FORMATOS)})")
+        desconocidos = [formato for formato in formatos if formato not in FORMATOS]
+        if desconocidos:
+            raise ValueError(f"Formatos de salida desconocidos: {', '.join(desconocidos)}")
+
+        self.formatos = formatos
+        self.directorio = directorio
+        self.prefijo = prefijo
+
+    def _reservar(self):
+        """
+        Crear vacíos los archivos de todos los formatos con un nombre base libre
+        """
+        os.makedirs(self.directorio, exist_ok=True)
+        base = os.path.join(self.directorio, f"{self.prefijo}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+
+        intento = 1
+        while True:
+            nombre = base if intento == 1 else f"{base}_{intento}"
+            creados = {}
+            try:
+                for formato in self.formatos:
+                    ruta = f"{nombre}.{formato}"
+                    open(ruta, "x").close()
+                    creados[formato] = ruta
+                return creados
+            except FileExistsError:
+                for ruta in creados.values():
+                    os.remove(ruta)
+                intento += 1
+
+    def escribir(self, resultado, incluir_timestamps, session_id):
+        """
+        Versión síncrona: {formato: ruta}
+        """
+        rutas = self._reservar()
+        for formato, ruta in rutas.items():
+            contenido = FORMATOS[formato](resultado, incluir_timestamps, session_id)
+            with open(ruta, "w", encoding="utf-8", buffering=1024 * 1024) as f:
+                f.write(contenido)
+        return rutas
+
+    async def guardar(self, resultado, incluir_timestamps, session_id):
+        """
+        Generar y escribir todos los formatos fuera del event loop
+        """
+        return await asyncio.to_thread(self.escribir, resultado, incluir_timestamps, session_id)
@@ -0,0 +1,178 @@
+"""
+Utilidades para transcribir grabaciones completas: planificar segmentos
+solapados y unir las palabras de cada segmento en una sola transcripción
+"""
+
+import math
+from collections import Counter
+
+
+def planificar_segmentos(duracion_total, duracion_segmento=300, solape_segundos=10):
+    """
+    Lista de (inicio, duración) que cubre toda la grabación, con cada
+    segmento solapando solape_segundos con el anterior
+    """
+    if duracion_segmento <= solape_segundos:
+        raise ValueError("duracion_segmento debe ser mayor que solape_segundos")
+
+    segmentos = []
+    inicio = 0
+    paso = duracion_segmento - solape_segundos
+
+    while inicio < duracion_total:
+        duracion = min(duracion_segmento, duracion_total - inicio)
+        segmentos.append((inicio, duracion))
+        if inicio + duracion >= duracion_total:
+            break
+        inicio += paso
+
+    return segmentos
+
+
+def _normalizar(palabra):
+    return palabra.get("word", "").lower().strip(".,;:¿?¡!")
+
+
+def _mapear_speakers(anteriores, nuevas, desde, hasta, siguiente_libre, previos=None, tolerancia=0.3):
+    """
+    Traducir los speakers de un segmento a las etiquetas del anterior,
+    emparejando las palabras que ambos transcribieron en el solape.
+    `previos` son las etiquetas con palabras en el segmento anterior: si el
+    solape empareja al menos a un speaker y queda uno solo sin pareja a cada
+    lado, se asignan por descarte. Sin coincidencias no se adivina: los
+    speakers reciben etiquetas nuevas y el mapeo se marca como incierto.
+    Devuelve (mapa, siguiente_libre, incierto)
+    """
+    en_solape = []
+    for previa in reversed(anteriores):
+        if previa["start"] < desde:
+            break
+        if previa["start"] < hasta:
+            en_solape.append(previa)
+    coincidencias = Counter()
+
+    for palabra in nuevas:
+        if not (desde <= palabra["start"] < hasta):
+            continue
+        texto = _normalizar(palabra)
+        for previa in en_solape:
+            if abs(previa["start"] - palabra["start"]) <= tolerancia and _normalizar(previa) == texto:
+                coincidencias[(palabra.get("speaker", 0), previa.get("speaker", 0))] += 1
+                break
+
+    mapa = {}
+    usados = set()
+    for (nuevo, previo), _ in coincidencias.most_common():
+        if nuevo not in mapa and previo not in usados:
+            mapa[nuevo] = previo
+            usados.add(previo)
+
+    # Speakers sin pareja en el solape, por orden de aparición
+    pendientes = list(dict.fromkeys(p.get("speaker", 0) for p in nuevas if p.get("speaker", 0) not in mapa))
+    libres = [previo for previo in (previos or ()) if previo not in usados]
+    if mapa and len(pendientes) == 1 and len(libres) == 1:
+        mapa[pendientes.pop()] = libres[0]
+
+    incierto = bool(pendientes and libres)
+    for speaker in pendientes:
+        mapa[speaker] = siguiente_libre
+        siguiente_libre += 1
+
+    return mapa, siguiente_libre, incierto
+
+
+def unir_segmentos(segmentos, inciertos=None):
+    """
+    Unir [(inicio, duracion, words), ...] en una sola lista de palabras con tiempos
+    absolutos. En cada solape se corta en el punto medio para no duplicar
+    palabras, y los speakers se renumeran para mantener la etiqueta del
+    primer segmento en que aparecen (por el solape o, si no hablan en él y
+    el resto sí se emparejó, por descarte). Si se pasa la lista `inciertos`,
+    se añaden los índices de los segmentos cuyos speakers no se pudieron
+    relacionar con los del anterior (ver ampliar_solapes)
+    """
+    unidas = []
+    fin_anterior = 0.0
+    inicio_anterior = 0.0
+    siguiente_libre = 0
+
+    for indice, (inicio, duracion, words) in enumerate(segmentos):
+        desplazadas = []
+        for palabra in words:
+            copia = dict(palabra)
+            copia["start"] = palabra.get("start", 0) + inicio
+            copia["end"] = palabra.get("end", 0) + inicio
+            desplazadas.append(copia)
+
+        if indice == 0:
+            mapa = {}
+            for palabra in desplazadas:
+                speaker = palabra.get("speaker", 0)
+                if speaker not in mapa:
+                    mapa[speaker] = speaker
+            siguiente_libre = max(mapa.values(), default=-1) + 1
+            corte = None
+        else:
+            previos = {p["speaker"] for p in unidas if p["start"] >= inicio_anterior and "speaker" in p}
+            mapa, siguiente_libre, incierto = _mapear_speakers(
+                unidas, desplazadas, inicio, fin_anterior, siguiente_libre, previos
+            )
+            if incierto and inciertos is not None:
+                inciertos.append(indice)
+            corte = (inicio + fin_anterior) / 2
+            while unidas and unidas[-1]["start"] >= corte:
+                unidas.pop()
+
+        for palabra in desplazadas:
+            if corte is not None and palabra["start"] < corte:
+                continue
+            if "speaker" in palabra:
+                palabra["speaker"] = mapa[palabra["speaker"]]
+            unidas.append(palabra)
+
+        inicio_anterior = inicio
+        fin_anterior = inicio + duracion
+
+    return unidas
+
+
+def ampliar_solapes(segmentos, inciertos, palabras=20, margen=1.0):
+    """
+    {índice: (inicio, duración)} para volver a transcribir los segmentos
+    inciertos adelantando su inicio hasta las últimas `palabras` palabras
+    del segmento anterior, de modo que el solape contenga voz (el final del
+    segmento se mantiene). Se omiten los que no pueden ampliarse: segmento
+    anterior sin palabras o solape que ya las incluía
+    """
+    tramos = {}
+    for indice in inciertos:
+        inicio_previo, duracion_previa, words_previas = segmentos[indice - 1]
+        inicio, duracion, _ = segmentos[indice]
+        finales = [p.get("start", 0) for p in words_previas][-palabras:]
+        if not finales:
+            continue
+        nuevo_inicio = max(inicio_previo, math.floor(inicio_previo + finales[0] - margen))
+        if nuevo_inicio >= inicio:
+            continue
+        tramos[indice] = (nuevo_inicio, inicio + duracion - nuevo_inicio)
+    return tramos
+
+
+def respuesta_unificada(words):
+    """
+    Respuesta con la misma forma que la de Deepgram a partir de las palabras unidas
+    """
+    transcript = " ".join(p.get("punctuated_word", p.get("word", "")) for p in words)
+    confidence = sum(p.get("confidence", 0) for p in words) / len(words) if words else 0
+
+    return {
+        "results": {
+            "channels": [{
+                "alternatives": [{
+                    "transcript": transcript,
+                    "confidence": confidence,
+                    "words": words
+                }]
+            }]
+        }
+    }
@@ -0,0 +1,565 @@
+#!/usr/bin/env python3
+"""
+Sondeo rápido de grabaciones: duración, frecuencia y canales desde la cabecera
+
+Lee directamente las cabeceras de WAV (RIFF/RF64), FLAC (STREAMINFO), MP3
+(Xing/Info, VBRI o tramas CBR), M4A/MP4 (mvhd/mdhd/stsd) y AIFF (COMM), sin
+lanzar ffprobe ni decodificar audio: unos pocos KB por archivo. Los archivos
+se sondean en paralelo y el resultado se guarda en SQLite con la ruta, el
+tamaño y el mtime, así que volver a listar un archivo de miles de
+grabaciones solo hace un stat por archivo.
+
+Con las duraciones se estima el coste de un lote antes de subir nada.
+
+Uso:
+    python sondeo_audio.py grabaciones/ --recursivo
+    python sondeo_audio.py grabaciones/*.mp3 --segmento 300 --detalle
+    python sondeo_audio.py /archivo/consultas --recursivo --workers 32 --precio-minuto 0.0043
+"""
+
+import argparse
+import math
+import os
+import sqlite3
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from sesion_completa import planificar_segmentos
+
+# Tarifa usada en las estimaciones (USD por minuto de audio); TRANSCRIPTOR_PRECIO_MINUTO la sustituye
+PRECIO_MINUTO_USD = 0.01
+
+EXTENSIONES_AUDIO = (".wav", ".flac", ".mp3", ".m4a", ".mp4", ".aac", ".aiff", ".aif")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS sondeos (
+    ruta TEXT PRIMARY KEY,
+    tamano INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    formato TEXT,
+    duracion REAL,
+    frecuencia INTEGER,
+    canales INTEGER
+);
+"""
+
+# Bitrates MP3 en kbps por (MPEG-1, capa) y (MPEG-2/2.5, capa); índice 0 = libre, 15 = inválido
+_BITRATES_MP3 = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_FRECUENCIAS_MP3 = {1: (44100, 48000, 32000), 2: (22050, 24000, 16000), 25: (11025, 12000, 8000)}
+
+# Átomos MP4 que se recorren hasta llegar a las cabeceras de la pista de audio
+_CONTENEDORES_MP4 = {b"moov", b"trak", b"edts", b"mdia", b"minf", b"stbl"}
+
+
+def _resultado(formato, duracion, frecuencia, canales):
+    return {"formato": formato, "duracion": duracion, "frecuencia": frecuencia, "canales": canales}
+
+
+def _sondear_wav(f, tamano_archivo):
+    """
+    Recorre los chunks RIFF hasta 'data' saltando el resto (LIST, bext...) con seek
+    """
+    cabecera = f.read(12)
+    rf64 = cabecera[:4] == b"RF64"
+    formato = canales = frecuencia = bytes_segundo = bloque = None
+    muestras_fact = None
+    tamano_ds64 = None
+    posicion = 12
+
+    while posicion + 8 <= tamano_archivo:
+        f.seek(posicion)
+        id_chunk, tamano = struct.unpack("<4sI", f.read(8))
+        if id_chunk == b"fmt ":
+            formato, canales, frecuencia, bytes_segundo, bloque = struct.unpack("<HHIIH", f.read(14))
+        elif id_chunk == b"ds64":
+            _, tamano_ds64, muestras_fact = struct.unpack("<QQQ", f.read(24))
+        elif id_chunk == b"fact" and muestras_fact is None:
+            (muestras_fact,) = struct.unpack("<I", f.read(4))
+        elif id_chunk == b"data":
+            restante = tamano_archivo - posicion - 8
+            if rf64 and tamano == 0xFFFFFFFF:
+                tamano = tamano_ds64
+            elif tamano == 0 or tamano_archivo > 0xFFFFFFFF:
+                # Escrito en streaming (tamaño 0) o WAV de más de 4 GB con el campo de 32 bits saturado
+                tamano = restante
+            # Grabaciones cortadas: el tamaño declarado no cabe en el archivo
+            tamano = min(tamano, restante)
+            if not frecuencia:
+                return None
+            if formato in (1, 3, 0xFFFE) and bloque:
+                duracion = tamano // bloque / frecuencia
+            elif muestras_fact:
+                duracion = muestras_fact / frecuencia
+            else:
+                duracion = tamano / bytes_segundo if bytes_segundo else None
+            return _resultado("wav", duracion, frecuencia, canales)
+        posicion += 8 + tamano + (tamano & 1)
+
+    return None
+
+
+def _sondear_aiff(f):
+    """
+    Chunk COMM de AIFF/AIFC; la frecuencia es un float de 80 bits
+    """
+    f.seek(12)
+    while True:
+        cabecera = f.read(8)
+        if len(cabecera) < 8:
+            return None
+        id_chunk, tamano = struct.unpack(">4sI", cabecera)
+        if id_chunk == b"COMM":
+            canales, tramas, _, exponente, mantisa = struct.unpack(">hIhHQ", f.read(18))
+            frecuencia = mantisa * 2.0 ** ((exponente & 0x7FFF) - 16383 - 63)
+            if not frecuencia:
+                return None
+            return _resultado("aiff", tramas / frecuencia, int(round(frecuencia)), canales)
+        f.seek(tamano + (tamano & 1), os.SEEK_CUR)
+
+
+def _tamano_id3(datos):
+    """
+    Bytes de la etiqueta ID3v2 al inicio de `datos` (0 si no hay)
+    """
+    if datos[:3] != b"ID3" or len(datos) < 10:
+        return 0
+    tamano = (datos[6] & 0x7F) << 21 | (datos[7] & 0x7F) << 14 | (datos[8] & 0x7F) << 7 | (datos[9] & 0x7F)
+    return 10 + tamano + (10 if datos[5] & 0x10 else 0)
+
+
+def _sondear_flac(f, inicio):
+    """
+    Bloque STREAMINFO: frecuencia, canales y muestras totales en 18 bytes
+    """
+    f.seek(inicio)
+    datos = f.read(42)
+    if datos[:4] != b"fLaC" or len(datos) < 26 or datos[4] & 0x7F != 0:
+        return None
+    (campos,) = struct.unpack(">Q", datos[18:26])
+    frecuencia = campos >> 44
+    canales = ((campos >> 41) & 0x7) + 1
+    muestras = campos & 0xFFFFFFFFF
+    if not frecuencia:
+        return None
+    # 0 muestras: el codificador no conocía la longitud (stream)
+    return _resultado("flac", muestras / frecuencia if muestras else None, frecuencia, canales)
+
+
+def _trama_mp3(datos, i):
+    """
+    (frecuencia, canales, muestras por trama, kbps, bytes de la trama, versión)
+    de la cabecera MPEG en datos[i:], o None si no es una cabecera válida
+    """
+    if i + 4 > len(datos) or datos[i] != 0xFF or datos[i + 1] & 0xE0 != 0xE0:
+        return None
+    version = {3: 1, 2: 2, 0: 25}.get((datos[i + 1] >> 3) & 0x3)
+    capa = 4 - ((datos[i + 1] >> 1) & 0x3)
+    indice_bitrate = datos[i + 2] >> 4
+    indice_frecuencia = (datos[i + 2] >> 2) & 0x3
+    if version is None or capa == 4 or indice_bitrate in (0, 15) or indice_frecuencia == 3:
+        return None
+
+    kbps = _BITRATES_MP3[(1 if version == 1 else 2, capa)][indice_bitrate]
+    frecuencia = _FRECUENCIAS_MP3[version][indice_frecuencia]
+    relleno = (datos[i + 2] >> 1) & 0x1
+    canales = 1 if datos[i + 3] >> 6 == 3 else 2
+
+    if capa == 1:
+        muestras = 384
+        bytes_trama = (12 * kbps * 1000 // frecuencia + relleno) * 4
+    else:
+        muestras = 576 if capa == 3 and version != 1 else 1152
+        bytes_trama = muestras // 8 * kbps * 1000 // frecuencia + relleno
+    return frecuencia, canales, muestras, kbps, bytes_trama, version
+
+
+def _sondear_mp3(f, inicio, tamano_archivo):
+    """
+    Primera trama válida tras el ID3v2; duración de la cabecera Xing/Info o
+    VBRI si la hay (VBR) o, si no, del tamaño y el bitrate (CBR)
+    """
+    f.seek(inicio)
+    datos = f.read(65536)
+
+    i = datos.find(b"\xff")
+    while i != -1:
+        trama = _trama_mp3(datos, i)
+        # Una sincronización falsa casi nunca va seguida de otra cabecera válida
+        if trama is not None and (i + trama[4] + 4 > len(datos) or _trama_mp3(datos, i + trama[4])):
+            break
+        i = datos.find(b"\xff", i + 1)
+    else:
+        return None
+
+    frecuencia, canales, muestras, kbps, _, version = trama
+    if version == 1:
+        lado = 17 if canales == 1 else 32
+    else:
+        lado = 9 if canales == 1 else 17
+
+    xing = i + 4 + lado
+    if datos[xing:xing + 4] in (b"Xing", b"Info"):
+        (flags,) = struct.unpack(">I", datos[xing + 4:xing + 8])
+        if flags & 0x1:
+            (tramas,) = struct.unpack(">I", datos[xing + 8:xing + 12])
+            # Etiqueta LAME (o la de libavcodec, con el mismo formato) tras los campos opcionales:
+            # retardo y relleno del codificador, que el decodificador descarta
+            lame = xing + 12 + (4 if flags & 0x2 else 0) + (100 if flags & 0x4 else 0) + (4 if flags & 0x8 else 0)
+            recorte = 0
+            if datos[lame:lame + 4] in (b"LAME", b"Lavc", b"Lavf") and len(datos) >= lame + 24:
+                retardo_relleno = int.from_bytes(datos[lame + 21:lame + 24], "big")
+                recorte = (retardo_relleno >> 12) + (retardo_relleno & 0xFFF)
+            return _resultado("mp3", (tramas * muestras - recorte) / frecuencia, frecuencia, canales)
+
+    vbri = i + 4 + 32
+    if datos[vbri:vbri + 4] == b"VBRI":
+        (tramas,) = struct.unpack(">I", datos[vbri + 14:vbri + 18])
+        return _resultado("mp3", tramas * muestras / frecuencia, frecuencia, canales)
+
+    audio = tamano_archivo - inicio - i
+    f.seek(max(0, tamano_archivo - 128))
+    if f.read(3) == b"TAG":
+        audio -= 128
+    return _resultado("mp3", audio * 8 / (kbps * 1000), frecuencia, canales)
+
+
+def _atomos_mp4(f, inicio, fin):
+    """
+    (tipo, inicio de los datos, fin) de cada átomo entre `inicio` y `fin`
+    """
+    posicion = inicio
+    while posicion + 8 <= fin:
+        f.seek(posicion)
+        tamano, tipo = struct.unpack(">I4s", f.read(8))
+        datos = posicion + 8
+        if tamano == 1:
+            (tamano,) = struct.unpack(">Q", f.read(8))
+            datos += 8
+        elif tamano == 0:
+            tamano = fin - posicion
+        if tamano < datos - posicion:
+            return
+        yield tipo, datos, posicion + tamano
+        posicion += tamano
+
+
+def _sondear_mp4(f, tamano_archivo):
+    """
+    Duración de la pista de audio: su lista de edición (elst, que descuenta
+    el priming del códec), su mdhd o, si no hay pista, el mvhd; y frecuencia
+    y canales de su entrada de muestra (mp4a, alac...). Solo se leen las
+    cabeceras: las tablas de muestras (stbl) se saltan con seek.
+    """
+    pista = {}
+    pelicula = None
+    escala_pelicula = None
+    pistas_audio = []
+
+    def recorrer(inicio, fin):
+        nonlocal pista, pelicula, escala_pelicula
+        for tipo, datos, final in _atomos_mp4(f, inicio, fin):
+            if tipo == b"trak":
+                pista = {}
+                recorrer(datos, final)
+                if pista.get("audio"):
+                    pistas_audio.append(pista)
+            elif tipo in _CONTENEDORES_MP4:
+                recorrer(datos, final)
+            elif tipo in (b"mvhd", b"mdhd"):
+                f.seek(datos)
+                version = f.read(1)[0]
+                if version == 1:
+                    f.seek(datos + 20)
+                    escala, duracion = struct.unpack(">IQ", f.read(12))
+                else:
+                    f.seek(datos + 12)
+                    escala, duracion = struct.unpack(">II", f.read(8))
+                if tipo == b"mvhd":
+                    escala_pelicula = escala
+                    pelicula = duracion / escala if escala else None
+                else:
+                    pista["duracion"] = duracion / escala if escala else None
+            elif tipo == b"elst" and escala_pelicula:
+                f.seek(datos)
+                version = f.read(1)[0]
+                f.seek(datos + 4)
+                (entradas,) = struct.unpack(">I", f.read(4))
+                formato = ">Qq" if version == 1 else ">Ii"
+                presentada = 0
+                for _ in range(min(entradas, 64)):
+                    # Duración en la escala de la película; media_time -1 es un hueco vacío
+                    duracion, tiempo_media = struct.unpack(formato, f.read(struct.calcsize(formato)))
+                    f.seek(4, os.SEEK_CUR)
+                    if tiempo_media != -1:
+                        presentada += duracion
+                if presentada:
+                    pista["editada"] = presentada / escala_pelicula
+            elif tipo == b"hdlr":
+                f.seek(datos + 8)
+                pista["audio"] = f.read(4) == b"soun"
+            elif tipo == b"stsd":
+                # Cabecera de stsd (8) + tamaño y tipo de la entrada (8) + 16 bytes hasta los canales
+                f.seek(datos + 8 + 8 + 16)
+                canales, _, _, _, frecuencia = struct.unpack(">HHHHI", f.read(12))
+                pista["canales"] = canales
+                pista["frecuencia"] = frecuencia >> 16
+
+    recorrer(0, tamano_archivo)
+
+    if pistas_audio:
+        audio = pistas_audio[0]
+        duracion = audio.get("editada") or audio.get("duracion") or pelicula
+        return _resultado("m4a", duracion, audio.get("frecuencia"), audio.get("canales"))
+    if pelicula is not None:
+        return _resultado("m4a", pelicula, None, None)
+    return None
+
+
+def sondear(ruta):
+    """
+    {"formato", "duracion", "frecuencia", "canales"} leyendo solo la cabecera,
+    o None si el formato no se reconoce o la cabecera está dañada. El formato
+    se decide por el contenido, no por la extensión.
+    """
+    try:
+        tamano = os.path.getsize(ruta)
+        with open(ruta, "rb") as f:
+            inicio = f.read(12)
+            if inicio[:4] in (b"RIFF", b"RF64") and inicio[8:12] == b"WAVE":
+                f.seek(0)
+                return _sondear_wav(f, tamano)
+            if inicio[:4] == b"FORM" and inicio[8:12] in (b"AIFF", b"AIFC"):
+                return _sondear_aiff(f)
+            if inicio[4:8] == b"ftyp":
+                return _sondear_mp4(f, tamano)
+
+            # FLAC y MP3 pueden llevar una etiqueta ID3v2 delante
+            f.seek(0)
+            desplazamiento = _tamano_id3(f.read(10))
+            f.seek(desplazamiento)
+            if f.read(4) == b"fLaC":
+                return _sondear_flac(f, desplazamiento)
+            return _sondear_mp3(f, desplazamiento, tamano)
+    except (OSError, struct.error, IndexError, TypeError, ZeroDivisionError):
+        return None
+
+
+def segundos_facturables(duracion, duracion_segmento=None, segmento_sesion=300, solape_segundos=10):
+    """
+    Segundos facturados al transcribir una grabación de `duracion`: como
+    mucho `duracion_segmento` (transcribir_optimizado) o, sin él, la suma
+    de los segmentos de la sesión completa, que suben cada solape dos veces
+    """
+    if duracion_segmento:
+        return min(duracion, duracion_segmento)
+    plan = planificar_segmentos(math.ceil(duracion), segmento_sesion, solape_segundos)
+    return sum(min(inicio + tramo, duracion) - inicio for inicio, tramo in plan)
+
+
+def estimar_costo(sondeos, precio_minuto=PRECIO_MINUTO_USD, duracion_segmento=None):
+    """
+    Totales de un lote a partir de los sondeos: archivos, audio, MB y coste
+    estimado. Con `duracion_segmento` cada archivo factura como mucho ese
+    tramo (transcribir_optimizado); sin él, la sesión completa con sus solapes.
+    Los archivos sin duración conocida se cuentan aparte y no suman coste.
+    """
+    total = {"archivos": 0, "sin_duracion": 0, "audio_segundos": 0.0, "facturable_segundos": 0.0, "megabytes": 0.0}
+    for sondeo in sondeos:
+        total["archivos"] += 1
+        total["megabytes"] += sondeo.get("bytes", 0) / (1024 * 1024)
+        duracion = sondeo.get("duracion")
+        if duracion is None:
+            total["sin_duracion"] += 1
+            continue
+        total["audio_segundos"] += duracion
+        total["facturable_segundos"] += segundos_facturables(duracion, duracion_segmento)
+
+    total["costo_usd"] = total["facturable_segundos"] / 60 * precio_minuto
+    return total
+
+
+def formato_duracion(segundos):
+    """
+    h:mm:ss o m:ss
+    """
+    if segundos is None:
+        return "?"
+    minutos, segundos = divmod(int(round(segundos)), 60)
+    horas, minutos = divmod(minutos, 60)
+    return f"{horas}:{minutos:02d}:{segundos:02d}" if horas else f"{minutos}:{segundos:02d}"
+
+
+class SondeoAudio:
+    """
+    Sondeo de cabeceras con caché persistente. Una entrada vale mientras la
+    ruta conserve el mismo tamaño y mtime; los archivos ilegibles también se
+    guardan (sin formato) para no volver a leerlos en cada listado.
+    """
+
+    def __init__(self, ruta=None, workers=16):
+        self.ruta = ruta or os.path.expanduser("~/.cache/transcriptor_medico/sondeos.db")
+        self.workers = workers
+        directorio = os.path.dirname(self.ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        self.aciertos = 0
+        self.sondeados = 0
+
+        self._lock = threading.Lock()
+        with self._conectar() as conexion:
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.executescript(ESQUEMA)
+
+    @contextmanager
+    def _conectar(self):
+        """
+        Conexión de corta duración: confirma al salir del bloque y se cierra
+        """
+        conexion = sqlite3.connect(self.ruta, timeout=30)
+        try:
+            with conexion:
+                yield conexion
+        finally:
+            conexion.close()
+
+    def sondear(self, ruta):
+        """
+        Sondeo de un archivo (ver sondear_lote)
+        """
+        return self.sondear_lote([ruta])[0]
+
+    def sondear_lote(self, rutas):
+        """
+        Un sondeo por ruta, en el mismo orden: el resultado de sondear() más
+        "ruta" y "bytes". Las rutas que no existen dan duracion None.
+        """
+        rutas = [os.path.abspath(ruta) for ruta in rutas]
+        guardados = self._leer_cache(rutas)
+
+        def resolver(ruta):
+            try:
+                info = os.stat(ruta)
+            except OSError:
+                return {"ruta": ruta, "bytes": 0, **_resultado(None, None, None, None)}, None, False
+
+            previo = guardados.get(ruta)
+            if previo and previo[0] == info.st_size and previo[1] == info.st_mtime_ns:
+                return {"ruta": ruta, "bytes": info.st_size, **_resultado(*previo[2:])}, None, True
+
+            resultado = sondear(ruta) or _resultado(None, None, None, None)
+            fila = (ruta, info.st_size, info.st_mtime_ns, resultado["formato"], resultado["duracion"],
+                    resultado["frecuencia"], resultado["canales"])
+            return {"ruta": ruta, "bytes": info.st_size, **resultado}, fila, False
+
+        if len(rutas) == 1:
+            pares = [resolver(rutas[0])]
+        else:
+            # Hilos: el trabajo es stat + lecturas pequeñas, casi todo espera de E/S sin el GIL
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="sondeo") as pool:
+                pares = list(pool.map(resolver, rutas))
+
+        nuevas = [fila for _, fila, _ in pares if fila is not None]
+        if nuevas:
+            with self._lock, self._conectar() as conexion:
+                conexion.executemany("INSERT OR REPLACE INTO sondeos VALUES (?, ?, ?, ?, ?, ?, ?)", nuevas)
+
+        with self._lock:
+            self.sondeados += len(nuevas)
+            self.aciertos += sum(acierto for _, _, acierto in pares)
+        return [sondeo for sondeo, _, _ in pares]
+
+    def _leer_cache(self, rutas):
+        """
+        ruta -> (tamaño, mtime_ns, formato, duración, frecuencia, canales) de las rutas ya sondeadas
+        """
+        guardados = {}
+        with self._conectar() as conexion:
+            # Por tandas: SQLite limita el número de parámetros de una consulta
+            for i in range(0, len(rutas), 500):
+                tanda = rutas[i:i + 500]
+                marcas = ",".join("?" * len(tanda))
+                for fila in conexion.execute(f"SELECT * FROM sondeos WHERE ruta IN ({marcas})", tanda):
+                    guardados[fila[0]] = fila[1:]
+        return guardados
+
+    def estadisticas(self):
+        with self._lock:
+            return {"aciertos": self.aciertos, "sondeados": self.sondeados}
+
+
+def buscar_audios(entradas, recursivo=False):
+    """
+    Archivos de audio (por extensión) de las rutas y carpetas indicadas
+    """
+    archivos = []
+    for entrada in entradas:
+        if os.path.isfile(entrada):
+            archivos.append(entrada)
+            continue
+        if not os.path.isdir(entrada):
+            continue
+        pendientes = [entrada]
+        while pendientes:
+            with os.scandir(pendientes.pop()) as contenido:
+                for elemento in contenido:
+                    if elemento.is_dir(follow_symlinks=False):
+                        if recursivo:
+                            pendientes.append(elemento.path)
+                    elif elemento.name.lower().endswith(EXTENSIONES_AUDIO):
+                        archivos.append(elemento.path)
+    return sorted(archivos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Duración y coste estimado de un lote de grabaciones")
+    parser.add_argument("entradas", nargs="+", help="Archivos o carpetas")
+    parser.add_argument("--recursivo", action="store_true", help="Incluir subcarpetas")
+    parser.add_argument("--segmento", type=int, help="Segundos por archivo (por defecto la sesión completa)")
+    parser.add_argument("--precio-minuto", type=float,
+                        default=float(os.getenv("TRANSCRIPTOR_PRECIO_MINUTO", PRECIO_MINUTO_USD)))
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--cache", help="Ruta de la base de datos de sondeos")
+    parser.add_argument("--detalle", action="store_true", help="Mostrar cada archivo")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    archivos = buscar_audios(args.entradas, args.recursivo)
+    if not archivos:
+        print("📁 No se encontraron archivos de audio")
+        sys.exit(1)
+
+    sondeo = SondeoAudio(args.cache, args.workers)
+    sondeos = sondeo.sondear_lote(archivos)
+    transcurrido = time.perf_counter() - inicio
+
+    if args.detalle:
+        for s in sondeos:
+            canales = {1: "mono", 2: "estéreo"}.get(s["canales"], f"{s['canales']} canales" if s["canales"] else "?")
+            print(f"{formato_duracion(s['duracion']):>9}  {s['formato'] or '?':<5} {s['frecuencia'] or '?':>6} Hz "
+                  f"{canales:<8} {s['bytes'] / (1024 * 1024):>8.1f} MB  {s['ruta']}")
+        print()
+
+    total = estimar_costo(sondeos, args.precio_minuto, args.segmento)
+    stats = sondeo.estadisticas()
+    print(f"🎵 {total['archivos']} archivos, {total['megabytes']:.0f} MB, {formato_duracion(total['audio_segundos'])} de audio")
+    if total["sin_duracion"]:
+        print(f"⚠️ {total['sin_duracion']} archivos sin duración legible (no suman al coste)")
+    tramo = f"{args.segmento}s por archivo" if args.segmento else "sesión completa"
+    print(f"💰 Coste estimado ({tramo}, ${args.precio_minuto}/min): ${total['costo_usd']:.2f}")
+    print(f"⚡ {transcurrido:.2f}s ({stats['sondeados']} sondeados, {stats['aciertos']} desde caché)")
+
+
+if __name__ == "__main__":
+    main()
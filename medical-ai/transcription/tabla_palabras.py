@@ -0,0 +1,61 @@
+import numpy as np
+
+
+class TablaPalabras:
+    """
+    Lista de words de Deepgram convertida una sola vez a columnas NumPy
+    (inicio, fin, confianza, speaker e índice de token), para calcular
+    estadísticas con operaciones vectorizadas en vez de recorrer diccionarios
+    """
+
+    def __init__(self, words):
+        n = len(words)
+        self.inicio = np.fromiter((w.get("start", 0.0) for w in words), dtype=np.float64, count=n)
+        self.fin = np.fromiter((w.get("end", 0.0) for w in words), dtype=np.float64, count=n)
+        self.confianza = np.fromiter((w.get("confidence", 0.0) for w in words), dtype=np.float64, count=n)
+        self.speaker = np.fromiter((w.get("speaker", 0) for w in words), dtype=np.int32, count=n)
+        self.indice = np.arange(n, dtype=np.int32)
+
+        # El texto queda fuera de las columnas numéricas; se consulta por índice
+        self._words = words
+
+    def __len__(self):
+        return len(self.indice)
+
+    def texto(self, indices):
+        return " ".join(self._words[i].get("word", "") for i in indices)
+
+    def estadisticas_speakers(self, muestra_palabras=100):
+        """
+        Palabras, confianza y tiempo de habla por speaker mediante group-bys
+        vectorizados, en el orden en que cada speaker aparece por primera vez
+        """
+        if len(self) == 0:
+            return None
+
+        ids, primera_aparicion, grupo = np.unique(self.speaker, return_index=True, return_inverse=True)
+
+        palabras = np.bincount(grupo)
+        confianza_total = np.bincount(grupo, weights=self.confianza)
+        tiempo_habla = np.bincount(grupo, weights=np.maximum(self.fin - self.inicio, 0.0))
+
+        total_palabras = palabras.sum()
+        total_tiempo = tiempo_habla.sum()
+
+        speakers_info = {}
+        for g in np.argsort(primera_aparicion):
+            speaker_id = int(ids[g])
+            muestra = self.indice[grupo == g][:muestra_palabras]
+
+            speakers_info[speaker_id] = {
+                "palabras": int(palabras[g]),
+                "confianza_total": float(confianza_total[g]),
+                "confianza_promedio": float(confianza_total[g] / palabras[g]),
+                "texto": self.texto(muestra),
+                "rol_estimado": "👨‍⚕️ MÉDICO/PROFESIONAL" if speaker_id == 0 else f"🧑‍🤝‍🧑 PACIENTE/CLIENTE",
+                "participacion_porcentaje": float(palabras[g] / total_palabras * 100),
+                "tiempo_habla_segundos": float(tiempo_habla[g]),
+                "tiempo_habla_porcentaje": float(tiempo_habla[g] / total_tiempo * 100) if total_tiempo > 0 else 0.0
+            }
+
+        return speakers_info
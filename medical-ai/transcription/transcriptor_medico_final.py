@@ -2,31 +2,134 @@ import asyncio
 import os
 import subprocess
 import glob
+import math
+import time
+import wave
 from datetime import datetime
-from dotenv import load_dotenv
-from deepgram import Deepgram
 
-# Cargar variables de entorno
-load_dotenv('../../.env')
-DEEPGRAM_API_KEY = os.getenv('DEEPGRAM_API_KEY')
+# Módulos ligeros: aiohttp, dotenv y numpy se importan al usarse,
+# para que importar este módulo (p. ej. en workers de un pool) sea rápido y sin efectos
+from almacen_segmentos import AlmacenSegmentos
+from analisis_texto import BuscadorTerminos
+from turnos import construir_turnos
+from cache_respuestas import CacheRespuestas
+from cliente_http import ClienteDeepgram, cerrar_clientes
+from control_concurrencia import ControlConcurrencia, ErrorApi
+from indice_transcripciones import IndiceTranscripciones
+from metricas import Metricas
+from salidas import SalidaTranscripcion
+from pipeline_lote import PipelineLote
+from sesion_completa import ampliar_solapes, planificar_segmentos, unir_segmentos, respuesta_unificada
+from sondeo_audio import SondeoAudio, PRECIO_MINUTO_USD, estimar_costo, formato_duracion, segundos_facturables
 
-# Verificar API key
-if not DEEPGRAM_API_KEY:
-    print("❌ ERROR: DEEPGRAM_API_KEY no encontrada en archivo .env")
-    print("💡 Asegúrate de tener DEEPGRAM_API_KEY=tu_clave en el archivo .env")
-    exit(1)
+# .env de la raíz del repositorio, resuelto respecto a este archivo y no al directorio actual
+RUTA_ENV = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '.env')
 
-print(f"✅ API Key cargada: ***{DEEPGRAM_API_KEY[-4:]}")
+
+# Codificaciones de subida: codec y contenedor de ffmpeg, extensión y mimetype
+CODIFICACIONES = {
+    "wav": ("pcm_s16le", "wav", "wav", "audio/wav"),
+    "flac": ("flac", "flac", "flac", "audio/flac"),   # Sin pérdida; cuánto reduce depende del ruido de fondo
+    "opus": ("libopus", "ogg", "ogg", "audio/ogg"),   # Con pérdida: ~0.9 MB cada 5 min a 24 kbps
+}
+
+MIMETYPES_AUDIO = {
+    ".wav": "audio/wav", ".flac": "audio/flac", ".ogg": "audio/ogg", ".opus": "audio/ogg",
+    ".mp3": "audio/mpeg", ".m4a": "audio/mp4", ".aiff": "audio/aiff"
+}
+
+
+def mimetype_audio(ruta):
+    """
+    Mimetype de subida según la extensión del archivo
+    """
+    return MIMETYPES_AUDIO.get(os.path.splitext(ruta)[1].lower(), "audio/wav")
+
+def cargar_api_key():
+    """
+    API key de Deepgram desde el entorno o, si no está, desde el archivo .env
+    """
+    api_key = os.getenv('DEEPGRAM_API_KEY')
+    if api_key:
+        return api_key
+    
+    from dotenv import load_dotenv
+    for ruta in (RUTA_ENV, '../../.env'):
+        if os.path.exists(ruta):
+            load_dotenv(ruta)
+            break
+    
+    return os.getenv('DEEPGRAM_API_KEY')
 
 class TranscriptorMedico:
     """
     Transcriptor médico optimizado usando nova-2
     """
     
-    def __init__(self):
-        self.dg = Deepgram(DEEPGRAM_API_KEY)
+    def __init__(self, api_key=None, api_url=None, usar_cache=True, directorio_cache=None, max_cache_mb=1024,
+                 reutilizar_segmentos=True, directorio_segmentos=None, max_segmentos_mb=2048,
+                 metricas=None, silencioso=False, formatos_salida=("txt",), directorio_salida=".",
+                 indexar=True, ruta_indice=None, control_concurrencia=None, opciones_http=None,
+                 codificacion="wav", bitrate_opus="24k", eliminar_silencios=False, opciones_vad=None,
+                 decodificacion="ffmpeg", ruta_sondeos=None, precio_minuto=PRECIO_MINUTO_USD):
+        # La API key y el cliente se resuelven en la primera llamada a la API
+        self.api_key = api_key
+        
+        # URL base alternativa (p. ej. el servidor mock de benchmarks/), o DEEPGRAM_API_URL
+        self.api_url = api_url or os.getenv('DEEPGRAM_API_URL')
+        self._dg = None
+        
+        # Límites del pool de conexiones y timeouts (conexión, subida, lectura) del cliente compartido
+        self.opciones_http = opciones_http or {}
         self.session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
         
+        # Caché de respuestas: re-analizar el mismo audio no vuelve a llamar a la API
+        self.cache = CacheRespuestas(directorio_cache, max_cache_mb) if usar_cache else None
+        
+        # Segmentos preprocesados en un spool: repetir sobre las mismas grabaciones no re-ejecuta ffmpeg
+        self.almacen = AlmacenSegmentos(directorio_segmentos, max_segmentos_mb) if reutilizar_segmentos else None
+        
+        # Tiempos por etapa, bytes subidos y factor de tiempo real (exportables a JSONL / Prometheus)
+        self.metricas = metricas or Metricas()
+        
+        # Sin volcar la transcripción completa por pantalla (costoso en sesiones largas)
+        self.silencioso = silencioso
+        
+        # Reporte de texto y, opcionalmente, JSONL y subtítulos SRT/VTT del mismo resultado
+        self.salida = SalidaTranscripcion(formatos_salida, directorio_salida)
+        
+        # Índice de texto completo del archivo, actualizado con cada resultado guardado
+        self.indice = IndiceTranscripciones(ruta_indice) if indexar else None
+        
+        # Llamadas en vuelo y por segundo adaptativas (429/5xx/latencia); compartible entre instancias
+        self.control = control_concurrencia or ControlConcurrencia(metricas=self.metricas)
+        
+        # Formato de los segmentos que se suben: wav, flac (sin pérdida) u opus (bitrate_opus)
+        if codificacion not in CODIFICACIONES:
+            raise ValueError(f"Codificación desconocida: {codificacion} (opciones: {', '.join(CODIFICACIONES)})")
+        self.codificacion = codificacion
+        self.bitrate_opus = bitrate_opus
+        
+        # Detección de voz antes de subir: los silencios largos no se filtran, suben ni facturan.
+        # opciones_vad: parámetros de vad.detectar_voz y silencio_conservado entre tramos
+        self.eliminar_silencios = eliminar_silencios
+        self.opciones_vad = opciones_vad or {}
+        
+        # Preprocesado de los lotes: "ffmpeg" (un proceso y un archivo por segmento) o "interna"
+        # (PyAV/soundfile + SciPy en este proceso, WAV en un buffer reutilizable; ver procesado_audio.py)
+        if decodificacion not in ("ffmpeg", "interna"):
+            raise ValueError(f"Decodificación desconocida: {decodificacion} (opciones: ffmpeg, interna)")
+        if decodificacion == "interna" and (codificacion != "wav" or eliminar_silencios):
+            raise ValueError("La decodificación interna sube WAV completo: usa codificacion='wav' sin eliminar_silencios")
+        self.decodificacion = decodificacion
+        self._procesador = None
+        
+        # Duración, frecuencia y canales desde la cabecera (sin ffprobe), en caché por ruta+mtime;
+        # con ellos se estima el coste antes de subir (precio_minuto en USD)
+        self.ruta_sondeos = ruta_sondeos
+        self.precio_minuto = precio_minuto
+        self._sondeo = None
+        
         # Configuración óptima basada en tests
         self.config_optima = {
             "language": "es",
@@ -51,8 +154,90 @@ class TranscriptorMedico:
             "TEMPORALES": ["semana", "mes", "año", "día", "mañana", "noche", "ayer", "hoy"],
             "FRECUENCIA": ["siempre", "nunca", "frecuente", "ocasional", "diario", "semanal"]
         }
+        
+        # Palabras para el análisis de sentimiento básico
+        self.palabras_positivas = ["bien", "mejor", "bueno", "tranquilo", "calmado", "relajado"]
+        self.palabras_negativas = ["mal", "peor", "terrible", "horrible", "intenso", "fuerte"]
+        
+        self._buscador = None
+        self._huella_vocabulario = None
 
-    def crear_segmento_optimizado(self, archivo_original, duracion_segundos=300):
+    @property
+    def dg(self):
+        """
+        Cliente de Deepgram compartido por todo el proceso (mismas conexiones
+        keep-alive para todos los transcriptores), resuelto en el primer uso
+        """
+        if self._dg is None:
+            if not self.api_key:
+                self.api_key = cargar_api_key()
+            if not self.api_key:
+                raise RuntimeError("DEEPGRAM_API_KEY no encontrada en el entorno ni en el archivo .env")
+            
+            self._dg = ClienteDeepgram.compartido(self.api_key, self.api_url, **self.opciones_http)
+            print(f"✅ API Key cargada: ***{self.api_key[-4:]}")
+        
+        return self._dg
+
+    @dg.setter
+    def dg(self, cliente):
+        self._dg = cliente
+
+    @property
+    def procesador(self):
+        """
+        Procesador de audio en proceso, creado en el primer uso (importa NumPy/SciPy)
+        """
+        if self._procesador is None:
+            from procesado_audio import ProcesadorAudio
+            self._procesador = ProcesadorAudio()
+        return self._procesador
+
+    @property
+    def sondeo(self):
+        """
+        Sondeo de cabeceras, creado en el primer uso (abre su caché SQLite)
+        """
+        if self._sondeo is None:
+            self._sondeo = SondeoAudio(self.ruta_sondeos)
+        return self._sondeo
+
+    def _comando_ffmpeg(self, archivo_original, duracion_segundos, destino, inicio_segundos=0, codificacion=None):
+        """
+        Comando ffmpeg optimizado para audio médico; destino puede ser un
+        archivo o 'pipe:1' para escribir el audio por stdout. Filtrado y
+        codificación de subida van en la misma pasada. codificacion="pcm"
+        produce PCM crudo (s16le) para procesarlo en Python.
+        """
+        codec, opciones_codec, contenedor = self._codificacion_ffmpeg(codificacion or self.codificacion)
+        
+        return [
+            'ffmpeg', 
+            '-ss', str(inicio_segundos),                 # Antes de -i: búsqueda rápida
+            '-i', archivo_original,
+            '-t', str(duracion_segundos),
+            '-acodec', codec,
+            '-ar', '16000',                              # 16kHz sample rate
+            '-ac', '1',                                  # Mono
+            '-af', 'highpass=f=100,lowpass=f=8000,volume=1.2',  # Filtros para voz + amplificación
+            *opciones_codec,
+            '-f', contenedor,
+            '-y',
+            destino
+        ]
+
+    def _codificacion_ffmpeg(self, codificacion):
+        """
+        (codec, opciones del codec, contenedor) de ffmpeg para una codificación
+        """
+        if codificacion == "pcm":
+            return 'pcm_s16le', [], 's16le'
+        codec, contenedor, _, _ = CODIFICACIONES[codificacion]
+        if codificacion == "opus":
+            return codec, ['-b:a', self.bitrate_opus, '-application', 'voip'], contenedor
+        return codec, [], contenedor
+
+    def crear_segmento_optimizado(self, archivo_original, duracion_segundos=300, inicio_segundos=0):
         """
         Crear segmento con filtros de audio optimizados para voz médica
         """
@@ -60,39 +245,66 @@ class TranscriptorMedico:
             print(f"❌ Archivo {archivo_original} no encontrado")
             return None
         
-        nombre_base = archivo_original.replace('.wav', '')
-        archivo_segmento = f"{nombre_base}_optimizado_{duracion_segundos}s.wav"
+        clave = None
+        extension = CODIFICACIONES[self.codificacion][2]
+        if self.almacen:
+            parametros = " ".join(self._comando_ffmpeg('-', duracion_segundos, '-', inicio_segundos))
+            if self.eliminar_silencios:
+                parametros += f" vad={sorted(self.opciones_vad.items())}"
+            clave = self.almacen.clave(archivo_original, parametros)
+            existente = self.almacen.obtener(clave, extension)
+            # Sin su mapa de tiempos un segmento sin silencios no sirve: se rehace
+            if existente and (not self.eliminar_silencios or os.path.exists(f"{existente}.mapa.json")):
+                self.metricas.contar("segmentos_reutilizados")
+                print(f"♻️ Segmento reutilizado: {existente}")
+                return existente
+            archivo_segmento = self.almacen.ruta_temporal(clave, extension)
+        else:
+            nombre_base = os.path.splitext(archivo_original)[0]
+            if self.eliminar_silencios:
+                nombre_base += "_voz"
+            if inicio_segundos:
+                archivo_segmento = f"{nombre_base}_optimizado_{inicio_segundos}s_{duracion_segundos}s.{extension}"
+            else:
+                archivo_segmento = f"{nombre_base}_optimizado_{duracion_segundos}s.{extension}"
         
         print(f"✂️ Creando segmento optimizado de {duracion_segundos//60}:{duracion_segundos%60:02d} minutos...")
         
         try:
             # Comando ffmpeg optimizado para audio médico
-            cmd = [
-                'ffmpeg', 
-                '-i', archivo_original,
-                '-t', str(duracion_segundos),
-                '-acodec', 'pcm_s16le',
-                '-ar', '16000',                              # 16kHz sample rate
-                '-ac', '1',                                  # Mono
-                '-af', 'highpass=f=100,lowpass=f=8000,volume=1.2',  # Filtros para voz + amplificación
-                '-y',
-                archivo_segmento
-            ]
+            cmd = self._comando_ffmpeg(archivo_original, duracion_segundos, archivo_segmento, inicio_segundos)
+            mapa = None
             
-            resultado = subprocess.run(cmd, capture_output=True, text=True)
+            with self.metricas.span("segmento", archivo=archivo_original, duracion=duracion_segundos):
+                if self.eliminar_silencios:
+                    resultado, mapa = self._segmento_sin_silencios(
+                        archivo_original, duracion_segundos, archivo_segmento, inicio_segundos
+                    )
+                else:
+                    resultado = subprocess.run(cmd, capture_output=True, text=True)
             
             if resultado.returncode == 0:
+                if mapa:
+                    from vad import guardar_mapa
+                    # El mapa se publica antes que el segmento: quien encuentre el segmento encuentra su mapa
+                    guardar_mapa(mapa, self.almacen.ruta(clave, extension) if clave else archivo_segmento)
+                if clave:
+                    archivo_segmento = self.almacen.registrar(clave, archivo_segmento, extension)
+                
                 tamaño_original = os.path.getsize(archivo_original) / (1024 * 1024)
                 tamaño_segmento = os.path.getsize(archivo_segmento) / (1024 * 1024)
                 
                 print(f"✅ Segmento optimizado creado")
                 print(f"📊 Tamaño original: {tamaño_original:.1f} MB")
                 print(f"📊 Tamaño segmento: {tamaño_segmento:.1f} MB")
-                print(f"🎛️ Filtros aplicados: highpass + lowpass + amplificación")
+                print(f"🎛️ Filtros aplicados: highpass + lowpass + amplificación ({self.codificacion})")
                 
                 return archivo_segmento
             else:
+                self.metricas.contar("errores_ffmpeg")
                 print(f"❌ Error con ffmpeg: {resultado.stderr}")
+                if clave and os.path.exists(archivo_segmento):
+                    os.remove(archivo_segmento)
                 return None
                 
         except FileNotFoundError:
@@ -102,10 +314,68 @@ class TranscriptorMedico:
             print(f"❌ Error creando segmento: {e}")
             return None
 
+    def _segmento_sin_silencios(self, archivo_original, duracion_segundos, destino, inicio_segundos=0):
+        """
+        Filtrar el tramo a PCM, quitar los silencios largos y codificar solo
+        la voz en `destino`; devuelve (resultado de ffmpeg, MapaTiempos)
+        """
+        import numpy as np
+        from vad import detectar_voz, eliminar_silencios
+        
+        cmd = self._comando_ffmpeg(archivo_original, duracion_segundos, 'pipe:1', inicio_segundos, codificacion="pcm")
+        decodificado = subprocess.run(cmd, capture_output=True)
+        if decodificado.returncode != 0:
+            error = decodificado.stderr.decode(errors="replace")
+            return subprocess.CompletedProcess(cmd, decodificado.returncode, stderr=error), None
+        
+        opciones = dict(self.opciones_vad)
+        silencio_conservado = opciones.pop("silencio_conservado", 0.3)
+        muestras = np.frombuffer(decodificado.stdout, dtype="<i2")
+        tramos = detectar_voz(muestras, 16000, **opciones) or [(0.0, len(muestras) / 16000)]
+        audio, mapa = eliminar_silencios(muestras, tramos, 16000, silencio_conservado)
+        
+        codec, opciones_codec, contenedor = self._codificacion_ffmpeg(self.codificacion)
+        cmd = [
+            'ffmpeg', '-f', 's16le', '-ar', '16000', '-ac', '1', '-i', 'pipe:0',
+            '-acodec', codec, *opciones_codec, '-f', contenedor, '-y', destino
+        ]
+        codificado = subprocess.run(cmd, input=audio.tobytes(), capture_output=True)
+        
+        eliminados = mapa.duracion_original - mapa.duracion_comprimida
+        self.metricas.contar("segundos_silencio_eliminados", eliminados)
+        if mapa.duracion_original:
+            print(f"🔇 Silencios eliminados: {eliminados:.1f}s de {mapa.duracion_original:.1f}s "
+                  f"({eliminados / mapa.duracion_original:.0%}) en {len(tramos)} tramos de voz")
+        
+        error = codificado.stderr.decode(errors="replace")
+        return subprocess.CompletedProcess(cmd, codificado.returncode, stderr=error), mapa
+
+    def _traducir_tiempos(self, response, segmento):
+        """
+        Timestamps de la respuesta en tiempo de la grabación original si el
+        segmento se creó sin silencios
+        """
+        if not self.eliminar_silencios or not response or "results" not in response:
+            return response
+        from vad import leer_mapa
+        mapa = leer_mapa(segmento)
+        return mapa.traducir_respuesta(response) if mapa else response
+
+    def _borrar_segmento(self, segmento):
+        """
+        Borrar un segmento ya subido y su mapa de tiempos (salvo los del almacén, que se reutilizan)
+        """
+        if self.almacen:
+            return
+        for ruta in (segmento, f"{segmento}.mapa.json"):
+            if os.path.exists(ruta):
+                os.remove(ruta)
+
     async def transcribir_optimizado(self, archivo_audio, incluir_timestamps=True):
         """
         Transcripción médica con nova-2 y análisis completo
         """
+        inicio = time.perf_counter()
         try:
             print(f"\n🎵 TRANSCRIPCIÓN MÉDICA OPTIMIZADA")
             print(f"📁 Archivo: {archivo_audio}")
@@ -123,14 +393,16 @@ class TranscriptorMedico:
             with open(archivo_audio, "rb") as audio:
                 source = {
                     "buffer": audio,
-                    "mimetype": "audio/wav"
+                    "mimetype": mimetype_audio(archivo_audio)
                 }
                 
                 # Usar configuración óptima
-                response = await self.dg.transcription.prerecorded(source, self.config_optima)
+                response = self._traducir_tiempos(await self._llamar_api(source), archivo_audio)
                 
                 if response and "results" in response:
-                    return await self._procesar_respuesta_completa(response, archivo_audio, incluir_timestamps)
+                    resultado = await self._procesar_respuesta_completa(response, archivo_audio, incluir_timestamps)
+                    self._registrar_transcripcion(resultado, inicio)
+                    return resultado
                 else:
                     print("❌ No se recibió respuesta válida de Deepgram")
                     return None
@@ -141,81 +413,588 @@ class TranscriptorMedico:
             traceback.print_exc()
             return None
 
-    async def _procesar_respuesta_completa(self, response, archivo_audio, incluir_timestamps):
+    def preparar_en_memoria(self, archivo_original, duracion_segundos=300, inicio_segundos=0):
         """
-        Procesamiento completo de la respuesta con análisis médico
+        Segmento filtrado como WAV en memoria, sin ffmpeg ni archivo temporal;
+        None si no se pudo decodificar. Liberar con audio.liberar() tras subirlo.
         """
+        if not os.path.exists(archivo_original):
+            print(f"❌ Archivo no encontrado: {archivo_original}")
+            return None
+        
         try:
-            channels = response["results"]["channels"]
-            if not channels or len(channels) == 0:
-                print("❌ No se encontraron canales de audio")
+            with self.metricas.span("segmento", archivo=archivo_original, duracion=duracion_segundos):
+                audio = self.procesador.procesar(archivo_original, duracion_segundos, inicio_segundos)
+        except Exception as e:
+            print(f"❌ Error decodificando {archivo_original}: {e}")
+            return None
+        
+        print(f"✅ Segmento en memoria: {audio.segundos:.1f}s, {audio.bytes / (1024 * 1024):.1f} MB")
+        return audio
+
+    async def transcribir_en_memoria(self, archivo_original, duracion_segundos=300, incluir_timestamps=True,
+                                     audio=None):
+        """
+        Transcripción con decodificación interna: el WAV filtrado se sube
+        directamente desde el buffer (memoryview), sin archivo intermedio.
+        `audio` permite pasar un segmento ya preparado (p. ej. desde el pipeline de lotes).
+        """
+        inicio = time.perf_counter()
+        if audio is None:
+            audio = await asyncio.to_thread(self.preparar_en_memoria, archivo_original, duracion_segundos)
+            if audio is None:
                 return None
+        
+        try:
+            print("🔄 Enviando a Deepgram desde memoria (sin archivo intermedio)...")
+            response = await self._llamar_api({"buffer": audio.vista, "mimetype": "audio/wav"})
+        except Exception as e:
+            print(f"❌ Error durante transcripción: {e}")
+            return None
+        finally:
+            audio.liberar()
+        
+        if response and "results" in response:
+            resultado = await self._procesar_respuesta_completa(response, archivo_original, incluir_timestamps)
+            self._registrar_transcripcion(resultado, inicio)
+            return resultado
+        
+        print("❌ No se recibió respuesta válida de Deepgram")
+        return None
+
+    async def transcribir_streaming(self, archivo_original, duracion_segundos=300, incluir_timestamps=True,
+                                    tamano_bloque=64 * 1024):
+        """
+        Transcripción sin archivo intermedio: ffmpeg escribe el WAV filtrado
+        por stdout y los bloques se suben a Deepgram a medida que se producen
+        """
+        inicio = time.perf_counter()
+        try:
+            print(f"\n🎵 TRANSCRIPCIÓN MÉDICA EN STREAMING")
+            print(f"📁 Archivo: {archivo_original}")
             
-            alternatives = channels[0]["alternatives"]
-            if not alternatives or len(alternatives) == 0:
-                print("❌ No se encontraron alternativas de transcripción")
+            if not os.path.exists(archivo_original):
+                print(f"❌ Archivo no encontrado: {archivo_original}")
                 return None
             
-            # Datos principales
-            transcript = alternatives[0]["transcript"]
-            confidence = alternatives[0].get("confidence", 0)
-            words = alternatives[0].get("words", [])
+            cmd = self._comando_ffmpeg(archivo_original, duracion_segundos, 'pipe:1')
+            cmd[1:1] = ['-loglevel', 'error']
             
-            print(f"\n📄 TRANSCRIPCIÓN COMPLETA:")
-            print("=" * 70)
-            print(transcript)
-            print(f"\n📊 Confianza general: {confidence:.2%}")
+            # Sin archivo intermedio la clave sale de la identidad del original (ruta, tamaño, mtime)
+            # más la cadena de filtros: ffmpeg solo lee el tramo pedido, no hace falta hashear todo
+            clave = None
+            if self._cache_activa():
+                filtros = " ".join(self._comando_ffmpeg('-', duracion_segundos, 'pipe:1'))
+                clave = self.cache.clave_archivo(archivo_original, self.config_optima, filtros)
+                response = await self._consultar_cache(clave)
+                if response is not None:
+                    resultado = await self._procesar_respuesta_completa(response, archivo_original, incluir_timestamps)
+                    self._registrar_transcripcion(resultado, inicio)
+                    return resultado
+            
+            try:
+                proceso = await asyncio.create_subprocess_exec(
+                    *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+                )
+            except FileNotFoundError:
+                print("❌ ffmpeg no encontrado. Instala con: brew install ffmpeg")
+                return None
+            
+            enviados = 0
+            
+            async def bloques_audio():
+                nonlocal enviados
+                while True:
+                    bloque = await proceso.stdout.read(tamano_bloque)
+                    if not bloque:
+                        break
+                    enviados += len(bloque)
+                    yield bloque
+                
+                # Si ffmpeg falla a mitad, abortar la subida en lugar de enviar audio truncado
+                if await proceso.wait() != 0:
+                    error = (await proceso.stderr.read()).decode(errors="replace")
+                    raise RuntimeError(f"ffmpeg terminó con código {proceso.returncode}: {error.strip()}")
             
-            # Crear resultado estructurado
-            resultado = {
-                "transcript": transcript,
-                "confidence": confidence,
-                "archivo": archivo_audio,
-                "timestamp": datetime.now().isoformat(),
-                "modelo": "nova-2",
-                "analisis": await self._analizar_contenido_medico(transcript, words),
-                "speakers": self._analizar_speakers(words) if words else None
+            print("🔄 Enviando a Deepgram en streaming (sin archivo intermedio)...")
+            
+            source = {
+                "buffer": bloques_audio(),
+                "mimetype": CODIFICACIONES[self.codificacion][3]
             }
             
-            # Guardar archivo completo
-            output_file = await self._guardar_transcripcion_completa(resultado, incluir_timestamps)
-            resultado["output_file"] = output_file
+            try:
+                response = await self._llamar_api(source)
+            finally:
+                if proceso.returncode is None:
+                    proceso.kill()
+                    await proceso.wait()
+            
+            print(f"📊 Enviados: {enviados / (1024 * 1024):.2f} MB")
+            self.metricas.contar("bytes_subidos", enviados)
+            await self._guardar_en_cache(clave, response)
+            
+            if response and "results" in response:
+                resultado = await self._procesar_respuesta_completa(response, archivo_original, incluir_timestamps)
+                self._registrar_transcripcion(resultado, inicio)
+                return resultado
+            else:
+                print("❌ No se recibió respuesta válida de Deepgram")
+                return None
+                
+        except Exception as e:
+            print(f"❌ Error durante transcripción en streaming: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
+
+    async def _llamar_api(self, source):
+        """
+        Llamada prerecorded a Deepgram con la configuración óptima; si el
+        audio es un archivo o está en memoria se consulta antes la caché de respuestas
+        """
+        clave = None
+        if self._cache_activa() and (hasattr(source["buffer"], "seek") or
+                                     isinstance(source["buffer"], (bytes, bytearray, memoryview))):
+            clave = await asyncio.to_thread(self.cache.clave, source["buffer"], self.config_optima)
+            response = await self._consultar_cache(clave)
+            if response is not None:
+                return response
+        
+        # En streaming el tamaño no se conoce antes: lo cuenta transcribir_streaming
+        buffer = source["buffer"]
+        bytes_subidos = self._tamano_fuente(buffer)
+        envio = dict(source)
+        reabiertos = []
+        
+        def rebobinar():
+            # aiohttp cierra el archivo al terminar de enviarlo: reintentar exige reabrirlo
+            audio = open(buffer.name, "rb")
+            audio.seek(posicion)
+            reabiertos.append(audio)
+            envio["buffer"] = audio
+        
+        async def llamada():
+            with self.metricas.span("api", bytes=bytes_subidos):
+                response = await self.dg.transcription.prerecorded(envio, self.config_optima)
+            if response is None:
+                raise ErrorApi("Deepgram devolvió una respuesta vacía")
+            return response
+        
+        # Un generador (streaming) no se puede volver a enviar
+        en_memoria = isinstance(buffer, (bytes, bytearray, memoryview))
+        reabrible = isinstance(getattr(buffer, "name", None), str) and hasattr(buffer, "seek")
+        posicion = buffer.tell() if reabrible else None
+        
+        self.metricas.contar("llamadas_api")
+        try:
+            response = await self.control.ejecutar(
+                llamada,
+                peso=bytes_subidos / (1024 * 1024) if bytes_subidos else None,
+                reintentable=en_memoria or reabrible,
+                antes_de_reintentar=rebobinar if reabrible else None
+            )
+        except Exception:
+            self.metricas.contar("errores_api")
+            raise
+        finally:
+            for audio in reabiertos:
+                audio.close()
+        
+        if bytes_subidos:
+            self.metricas.contar("bytes_subidos", bytes_subidos)
+        await self._guardar_en_cache(clave, response)
+        return response
+
+    def _tamano_fuente(self, buffer):
+        """
+        Bytes pendientes de subir de un buffer en memoria o archivo, o None si es un generador
+        """
+        if isinstance(buffer, (bytes, bytearray, memoryview)):
+            return len(buffer)
+        if hasattr(buffer, "fileno"):
+            return os.fstat(buffer.fileno()).st_size - buffer.tell()
+        return None
+
+    def _registrar_transcripcion(self, resultado, inicio):
+        """
+        Segundos de audio transcritos y factor de tiempo real de una transcripción completa
+        """
+        if not resultado:
+            self.metricas.contar("transcripciones_fallidas")
+            return
+        
+        transcurrido = time.perf_counter() - inicio
+        self.metricas.contar("transcripciones")
+        self.metricas.contar("audio_segundos", resultado["audio_segundos"])
+        if transcurrido > 0:
+            self.metricas.observar("factor_tiempo_real", resultado["audio_segundos"] / transcurrido,
+                                   archivo=resultado["archivo"])
+
+    def _cache_activa(self):
+        return self.cache is not None and not self.cache.omitir
+
+    async def _consultar_cache(self, clave):
+        """
+        Respuesta cacheada para la clave, o None
+        """
+        response = await asyncio.to_thread(self.cache.obtener, clave)
+        if response is not None:
+            self.metricas.contar("cache_aciertos")
+            print("💾 Respuesta recuperada de caché (sin llamada a la API)")
+        return response
+
+    async def _guardar_en_cache(self, clave, response):
+        """
+        Guardar solo respuestas válidas
+        """
+        if clave and response and "results" in response:
+            await asyncio.to_thread(self.cache.guardar, clave, response)
+
+    async def transcribir_sesion_completa(self, archivo_original, duracion_segmento=300, solape_segundos=10,
+                                          max_concurrencia=8, incluir_timestamps=True):
+        """
+        Transcribir la grabación completa: cortarla en segmentos solapados,
+        transcribirlos en paralelo y unir las palabras por timestamps
+        """
+        inicio_sesion = time.perf_counter()
+        try:
+            print(f"\n🎵 TRANSCRIPCIÓN DE SESIÓN COMPLETA")
+            print(f"📁 Archivo: {archivo_original}")
+            
+            if not os.path.exists(archivo_original):
+                print(f"❌ Archivo no encontrado: {archivo_original}")
+                return None
             
-            # Mostrar resumen
-            self._mostrar_resumen(resultado)
+            response = await self._respuesta_sesion_completa(
+                archivo_original, duracion_segmento, solape_segundos, max_concurrencia
+            )
+            if response is None:
+                return None
             
+            resultado = await self._procesar_respuesta_completa(response, archivo_original, incluir_timestamps)
+            self._registrar_transcripcion(resultado, inicio_sesion)
             return resultado
             
+        except Exception as e:
+            print(f"❌ Error durante transcripción de sesión completa: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
+
+    async def _respuesta_sesion_completa(self, archivo_original, duracion_segmento=300, solape_segundos=10,
+                                         max_concurrencia=8):
+        """
+        Respuesta unificada de toda la grabación a partir de segmentos
+        solapados transcritos en paralelo; None si no se conoce la duración
+        """
+        duracion_total = self._duracion_total(archivo_original)
+        if not duracion_total:
+            print("❌ No se pudo determinar la duración de la grabación")
+            return None
+        
+        plan = planificar_segmentos(math.ceil(duracion_total), duracion_segmento, solape_segundos)
+        print(f"⏱️ Duración: {duracion_total / 60:.1f} min → {len(plan)} segmentos "
+              f"de {duracion_segmento}s con {solape_segundos}s de solape")
+        
+        semaforo = asyncio.Semaphore(max_concurrencia)
+        
+        async def transcribir_en_memoria(inicio, duracion):
+            # Sin eliminación de silencios (incompatible con la decodificación interna): no hay tiempos que traducir
+            audio = await asyncio.to_thread(self.preparar_en_memoria, archivo_original, duracion, inicio)
+            if audio is None:
+                raise RuntimeError(f"No se pudo decodificar el segmento en {inicio}s")
+            try:
+                response = await self._llamar_api({"buffer": audio.vista, "mimetype": "audio/wav"})
+            finally:
+                audio.liberar()
+            if not response or "results" not in response:
+                raise RuntimeError(f"Respuesta inválida para el segmento en {inicio}s")
+            return response["results"]["channels"][0]["alternatives"][0].get("words", [])
+        
+        async def transcribir_segmento(inicio, duracion):
+            async with semaforo:
+                if self.decodificacion == "interna":
+                    return inicio, duracion, await transcribir_en_memoria(inicio, duracion)
+                
+                segmento = await asyncio.to_thread(
+                    self.crear_segmento_optimizado, archivo_original, duracion, inicio
+                )
+                if not segmento:
+                    raise RuntimeError(f"No se pudo crear el segmento en {inicio}s")
+                
+                try:
+                    with open(segmento, "rb") as audio:
+                        response = await self._llamar_api({"buffer": audio, "mimetype": mimetype_audio(segmento)})
+                    response = self._traducir_tiempos(response, segmento)
+                finally:
+                    self._borrar_segmento(segmento)
+                
+                if not response or "results" not in response:
+                    raise RuntimeError(f"Respuesta inválida para el segmento en {inicio}s")
+                
+                alternativa = response["results"]["channels"][0]["alternatives"][0]
+                return inicio, duracion, alternativa.get("words", [])
+        
+        async def transcribir_tramos(tramos):
+            # Al primer fallo se cancela el resto: la sesión ya no se usará y cada subida se factura
+            tareas = [asyncio.create_task(transcribir_segmento(inicio, duracion)) for inicio, duracion in tramos]
+            try:
+                terminadas, _ = await asyncio.wait(tareas, return_when=asyncio.FIRST_EXCEPTION)
+                for tarea in terminadas:
+                    if tarea.exception():
+                        raise tarea.exception()
+                return [tarea.result() for tarea in tareas]
+            finally:
+                for tarea in tareas:
+                    tarea.cancel()
+                await asyncio.wait(tareas)
+        
+        segmentos = await transcribir_tramos(plan)
+        
+        inciertos = []
+        words = unir_segmentos(segmentos, inciertos)
+        ampliados = ampliar_solapes(segmentos, inciertos)
+        if ampliados:
+            # Solape sin voz común: repetir esos segmentos empezando antes, en lugar de adivinar los speakers
+            print(f"🔁 {len(ampliados)} solape(s) sin palabras comunes: se repiten con el solape ampliado")
+            for indice, segmento in zip(ampliados, await transcribir_tramos(ampliados.values())):
+                segmentos[indice] = segmento
+            inciertos = []
+            words = unir_segmentos(segmentos, inciertos)
+        if inciertos:
+            print(f"⚠️ Speakers sin correspondencia en {len(inciertos)} solape(s): reciben etiquetas nuevas")
+        print(f"🧩 {len(segmentos)} segmentos unidos: {len(words)} palabras")
+        
+        return respuesta_unificada(words)
+
+    def _duracion_total(self, archivo):
+        """
+        Duración de la grabación original: sondeo de la cabecera o, si el
+        formato no se reconoce, ffprobe
+        """
+        duracion = self.sondeo.sondear(archivo)["duracion"]
+        if duracion:
+            return duracion
+        
+        try:
+            resultado = subprocess.run(
+                ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'csv=p=0', archivo],
+                capture_output=True, text=True
+            )
+            return float(resultado.stdout.strip()) if resultado.returncode == 0 else None
+        except (FileNotFoundError, ValueError):
+            return None
+
+    async def transcribir_lote(self, archivos, max_concurrencia=4, duracion_segundos=300, incluir_timestamps=True,
+                               workers_ffmpeg=2, tamano_cola=4):
+        """
+        Transcribir varios archivos en paralelo, con un máximo de
+        max_concurrencia subidas a la vez, entregando cada resultado en cuanto termina
+        """
+        self.pipeline_lote = PipelineLote(
+            self,
+            workers_ffmpeg=workers_ffmpeg,
+            workers_subida=max_concurrencia,
+            tamano_cola=tamano_cola
+        )
+        self.estadisticas_lote = {
+            "archivos_totales": len(archivos),
+            "completados": 0,
+            "fallidos": 0,
+            "audio_segundos": 0.0,
+            "megabytes": 0.0,
+            "tiempo_segundos": 0.0,
+            "max_concurrencia": max_concurrencia
+        }
+        
+        print(f"\n📦 LOTE: {len(archivos)} archivos (máx. {max_concurrencia} en paralelo, {workers_ffmpeg} workers ffmpeg)")
+        
+        inicio_lote = time.perf_counter()
+        
+        try:
+            async for item in self.pipeline_lote.ejecutar(archivos, duracion_segundos, incluir_timestamps):
+                if item["resultado"]:
+                    self.estadisticas_lote["completados"] += 1
+                    self.estadisticas_lote["audio_segundos"] += item["audio_segundos"]
+                    self.estadisticas_lote["megabytes"] += item["megabytes"]
+                    print(f"✅ {item['archivo']}: {item['tiempo_segundos']:.1f}s ({item['factor_tiempo_real']:.1f}x tiempo real)")
+                else:
+                    self.estadisticas_lote["fallidos"] += 1
+                    print(f"❌ {item['archivo']}: falló tras {item['tiempo_segundos']:.1f}s")
+                
+                yield item
+        finally:
+            tiempo_total = time.perf_counter() - inicio_lote
+            self.estadisticas_lote["tiempo_segundos"] = tiempo_total
+            if tiempo_total > 0:
+                self.estadisticas_lote["archivos_por_minuto"] = self.estadisticas_lote["completados"] * 60 / tiempo_total
+                self.estadisticas_lote["factor_tiempo_real"] = self.estadisticas_lote["audio_segundos"] / tiempo_total
+            self.estadisticas_lote["pipeline"] = self.pipeline_lote.estadisticas()
+            self.estadisticas_lote["api"] = self.control.estadisticas()
+            self._mostrar_resumen_lote()
+
+    async def transcribir_lote_persistente(self, archivos, ruta_cola=None, duracion_segundos=300, max_concurrencia=4,
+                                           incluir_timestamps=True):
+        """
+        Lote reanudable: los archivos pasan por la cola de trabajos SQLite, así
+        que tras una caída se continúa donde quedó cada uno y los fallos
+        transitorios se reintentan. Devuelve el resumen por estado.
+        """
+        from cola_trabajos import ColaTrabajos, TrabajadorCola
+        
+        cola = ColaTrabajos(ruta_cola)
+        for archivo in archivos:
+            cola.agregar(archivo, duracion_segundos, incluir_timestamps)
+        
+        print(f"\n📦 LOTE PERSISTENTE: {len(archivos)} archivos en {cola.ruta}")
+        await TrabajadorCola(self, cola, max_concurrencia).ejecutar()
+        return cola.resumen()
+
+    def _duracion_audio(self, archivo_wav):
+        """
+        Duración en segundos de un WAV leyendo solo la cabecera
+        """
+        try:
+            with wave.open(archivo_wav, "rb") as w:
+                return w.getnframes() / float(w.getframerate())
+        except (wave.Error, EOFError, OSError):
+            return 0.0
+
+    def _mostrar_resumen_lote(self):
+        """
+        Mostrar rendimiento agregado del último lote
+        """
+        stats = self.estadisticas_lote
+        print(f"\n📦 RESUMEN DEL LOTE:")
+        print("=" * 30)
+        print(f"✅ Completados: {stats['completados']}/{stats['archivos_totales']}")
+        if stats["fallidos"]:
+            print(f"❌ Fallidos: {stats['fallidos']}")
+        print(f"⏱️ Tiempo total: {stats['tiempo_segundos']:.1f}s")
+        print(f"🎧 Audio procesado: {stats['audio_segundos'] / 60:.1f} min")
+        if "archivos_por_minuto" in stats:
+            print(f"🚀 Rendimiento: {stats['archivos_por_minuto']:.1f} archivos/min "
+                  f"({stats['factor_tiempo_real']:.1f}x tiempo real)")
+        
+        pipeline = stats.get("pipeline")
+        if pipeline:
+            print(f"🎛️ Utilización ffmpeg: {pipeline['preprocesado']['utilizacion']:.0%} "
+                  f"| subida: {pipeline['subida']['utilizacion']:.0%}")
+            print(f"📥 Cola: máx. {pipeline['cola']['profundidad_maxima']}/{pipeline['cola']['capacidad']}, "
+                  f"promedio {pipeline['cola']['profundidad_promedio']:.1f}")
+        
+        api = stats.get("api")
+        if api:
+            print(f"🚦 API: límite {api['limite']:g} en vuelo, {api['tasa']:g} peticiones/s, "
+                  f"{api['reintentos']} reintentos ({api['limitadas_429']} por 429)")
+
+    async def _procesar_respuesta_completa(self, response, archivo_audio, incluir_timestamps):
+        """
+        Procesamiento completo de la respuesta con análisis médico
+        """
+        with self.metricas.span("procesar_respuesta", archivo=archivo_audio):
+            return await self._procesar_respuesta(response, archivo_audio, incluir_timestamps)
+
+    async def _procesar_respuesta(self, response, archivo_audio, incluir_timestamps):
+        try:
+            resultado = await self._construir_resultado(response, archivo_audio, incluir_timestamps)
+            if resultado is None:
+                return None
+            
+            return await self._guardar_resultado(resultado, incluir_timestamps)
+            
         except Exception as e:
             print(f"❌ Error procesando respuesta: {e}")
             return None
 
+    async def _construir_resultado(self, response, archivo_audio, incluir_timestamps):
+        """
+        Resultado estructurado con análisis médico, speakers y turnos, sin guardarlo
+        """
+        channels = response["results"]["channels"]
+        if not channels or len(channels) == 0:
+            print("❌ No se encontraron canales de audio")
+            return None
+        
+        alternatives = channels[0]["alternatives"]
+        if not alternatives or len(alternatives) == 0:
+            print("❌ No se encontraron alternativas de transcripción")
+            return None
+        
+        # Datos principales
+        transcript = alternatives[0]["transcript"]
+        confidence = alternatives[0].get("confidence", 0)
+        words = alternatives[0].get("words", [])
+        
+        if not self.silencioso:
+            print(f"\n📄 TRANSCRIPCIÓN COMPLETA:")
+            print("=" * 70)
+            print(transcript)
+        print(f"\n📊 Confianza general: {confidence:.2%}")
+        
+        # Duración del audio según Deepgram o, si falta, el fin de la última palabra
+        audio_segundos = response.get("metadata", {}).get("duration") or (words[-1]["end"] if words else 0.0)
+        
+        # Crear resultado estructurado
+        resultado = {
+            "transcript": transcript,
+            "confidence": confidence,
+            "archivo": archivo_audio,
+            "timestamp": datetime.now().isoformat(),
+            "modelo": "nova-2",
+            "audio_segundos": audio_segundos
+        }
+        
+        with self.metricas.span("analisis", archivo=archivo_audio, palabras=len(words)):
+            resultado["analisis"] = await self._analizar_contenido_medico(transcript, words)
+            resultado["speakers"] = self._analizar_speakers(words) if words else None
+            
+            # Turnos de palabra y dinámica de la conversación
+            if words:
+                turnos, dinamica = construir_turnos(words)
+                resultado["dinamica"] = dinamica
+                resultado["turnos"] = turnos if incluir_timestamps else None
+            else:
+                resultado["dinamica"] = None
+                resultado["turnos"] = None
+        
+        # Timestamps por palabra para los subtítulos
+        resultado["palabras"] = words if incluir_timestamps else None
+        
+        return resultado
+
+    async def _guardar_resultado(self, resultado, incluir_timestamps):
+        """
+        Escribir las salidas de un resultado ya analizado y mostrar el resumen
+        """
+        # Guardar en todos los formatos configurados
+        with self.metricas.span("guardar", archivo=resultado["archivo"]):
+            salidas = await self._guardar_transcripcion_completa(resultado, incluir_timestamps)
+        resultado["salidas"] = salidas
+        resultado["output_file"] = salidas.get("txt") or next(iter(salidas.values()))
+        
+        # Mostrar resumen
+        self._mostrar_resumen(resultado)
+        
+        return resultado
+
     async def _analizar_contenido_medico(self, transcript, words):
         """
         Análisis específico del contenido médico
         """
-        texto_lower = transcript.lower()
         analisis = {}
         
+        # Una sola pasada sobre el texto para vocabulario médico y sentimiento
+        conteos = self._buscador_terminos().contar(transcript)
+        
         # Contar palabras por categoría
-        for categoria, palabras_lista in self.vocabulario_medico.items():
-            encontradas = {}
-            for palabra in palabras_lista:
-                count = texto_lower.count(palabra)
-                if count > 0:
-                    encontradas[palabra] = count
-            if encontradas:
-                analisis[categoria] = encontradas
+        for categoria in self.vocabulario_medico:
+            if categoria in conteos:
+                analisis[categoria] = conteos[categoria]
         
         # Análisis de sentimiento básico
-        palabras_positivas = ["bien", "mejor", "bueno", "tranquilo", "calmado", "relajado"]
-        palabras_negativas = ["mal", "peor", "terrible", "horrible", "intenso", "fuerte"]
-        
-        sentiment_score = 0
-        for palabra in palabras_positivas:
-            sentiment_score += texto_lower.count(palabra)
-        for palabra in palabras_negativas:
-            sentiment_score -= texto_lower.count(palabra)
+        sentiment_score = sum(conteos.get("_POSITIVAS", {}).values()) - sum(conteos.get("_NEGATIVAS", {}).values())
         
         analisis["SENTIMENT"] = {
             "score": sentiment_score,
@@ -231,6 +1010,21 @@ class TranscriptorMedico:
         
         return analisis
 
+    def _buscador_terminos(self):
+        """
+        Buscador compilado del vocabulario; solo se reconstruye si el vocabulario cambia
+        """
+        categorias = dict(self.vocabulario_medico)
+        categorias["_POSITIVAS"] = self.palabras_positivas
+        categorias["_NEGATIVAS"] = self.palabras_negativas
+        
+        huella = tuple((categoria, tuple(terminos)) for categoria, terminos in categorias.items())
+        if huella != self._huella_vocabulario:
+            self._buscador = BuscadorTerminos(categorias)
+            self._huella_vocabulario = huella
+        
+        return self._buscador
+
     def _analizar_speakers(self, words):
         """
         Análisis detallado de speakers
@@ -238,104 +1032,21 @@ class TranscriptorMedico:
         if not words:
             return None
         
-        speakers_info = {}
-        
-        for word in words:
-            speaker = word.get("speaker", 0)
-            if speaker not in speakers_info:
-                speakers_info[speaker] = {
-                    "palabras": 0,
-                    "confianza_total": 0,
-                    "texto_completo": []
-                }
-            
-            speakers_info[speaker]["palabras"] += 1
-            speakers_info[speaker]["confianza_total"] += word.get("confidence", 0)
-            speakers_info[speaker]["texto_completo"].append(word.get("word", ""))
-        
-        # Calcular promedios y roles
-        for speaker_id, info in speakers_info.items():
-            info["confianza_promedio"] = info["confianza_total"] / info["palabras"]
-            info["texto"] = " ".join(info["texto_completo"][:100])  # Primeras 100 palabras
-            info["rol_estimado"] = "👨‍⚕️ MÉDICO/PROFESIONAL" if speaker_id == 0 else f"🧑‍🤝‍🧑 PACIENTE/CLIENTE"
-            
-            # Porcentaje de participación
-            total_palabras = sum(s["palabras"] for s in speakers_info.values())
-            info["participacion_porcentaje"] = (info["palabras"] / total_palabras) * 100
+        from tabla_palabras import TablaPalabras
         
-        return speakers_info
+        return TablaPalabras(words).estadisticas_speakers()
 
     async def _guardar_transcripcion_completa(self, resultado, incluir_timestamps):
         """
-        Guardar transcripción con análisis completo
+        Guardar transcripción con análisis completo en cada formato de salida
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_file = f"transcripcion_medica_optimizada_{timestamp}.txt"
+        salidas = await self.salida.guardar(resultado, incluir_timestamps, self.session_id)
         
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write("TRANSCRIPCIÓN MÉDICA OPTIMIZADA - NOVA-2\n")
-            f.write("=" * 60 + "\n\n")
-            
-            # Información del archivo
-            f.write("INFORMACIÓN DE LA SESIÓN:\n")
-            f.write("-" * 30 + "\n")
-            f.write(f"Archivo: {resultado['archivo']}\n")
-            f.write(f"Timestamp: {resultado['timestamp']}\n")
-            f.write(f"Modelo: {resultado['modelo']}\n")
-            f.write(f"Confianza: {resultado['confidence']:.2%}\n")
-            f.write(f"Sesión ID: {self.session_id}\n\n")
-            
-            # Transcripción principal
-            f.write("TRANSCRIPCIÓN COMPLETA:\n")
-            f.write("-" * 25 + "\n")
-            f.write(resultado['transcript'])
-            f.write("\n\n")
-            
-            # Análisis médico
-            if resultado['analisis']:
-                f.write("ANÁLISIS DE CONTENIDO MÉDICO:\n")
-                f.write("-" * 35 + "\n")
-                
-                for categoria, contenido in resultado['analisis'].items():
-                    if categoria == "ESTADISTICAS":
-                        f.write(f"\n{categoria}:\n")
-                        for key, value in contenido.items():
-                            f.write(f"  • {key}: {value}\n")
-                    elif categoria == "SENTIMENT":
-                        f.write(f"\n{categoria}:\n")
-                        f.write(f"  • Score: {contenido['score']}\n")
-                        f.write(f"  • Interpretación: {contenido['interpretacion']}\n")
-                    else:
-                        f.write(f"\n{categoria}:\n")
-                        for palabra, count in contenido.items():
-                            f.write(f"  • {palabra}: {count} vez(es)\n")
-            
-            # Análisis de speakers
-            if resultado['speakers']:
-                f.write("\n\nANÁLISIS POR SPEAKERS:\n")
-                f.write("-" * 25 + "\n")
-                
-                for speaker_id, info in resultado['speakers'].items():
-                    f.write(f"\n{info['rol_estimado']} (Speaker {speaker_id}):\n")
-                    f.write(f"  • Palabras: {info['palabras']}\n")
-                    f.write(f"  • Participación: {info['participacion_porcentaje']:.1f}%\n")
-                    f.write(f"  • Confianza promedio: {info['confianza_promedio']:.2%}\n")
-                    f.write(f"  • Muestra de texto: {info['texto'][:200]}...\n")
-            
-            # Recomendaciones
-            f.write("\n\nRECOMENDACIONES PARA MEJORA:\n")
-            f.write("-" * 35 + "\n")
-            if resultado['confidence'] >= 0.95:
-                f.write("✅ Excelente calidad de audio - mantener configuración\n")
-            elif resultado['confidence'] >= 0.90:
-                f.write("✅ Buena calidad - considerar mejores micrófonos\n")
-            else:
-                f.write("⚠️ Calidad mejorable - revisar audio fuente\n")
-            
-            f.write("💡 Usar siempre modelo nova-2 para máxima precisión\n")
-            f.write("💡 Mantener segmentos de 2-5 minutos para mejor costo/beneficio\n")
+        if self.indice:
+            ruta = salidas.get("txt") or next(iter(salidas.values()))
+            await asyncio.to_thread(self.indice.agregar, resultado, ruta, self.session_id)
         
-        return output_file
+        return salidas
 
     def _mostrar_resumen(self, resultado):
         """
@@ -356,7 +1067,14 @@ class TranscriptorMedico:
         if resultado['speakers']:
             print(f"👥 Speakers detectados: {len(resultado['speakers'])}")
             for speaker_id, info in resultado['speakers'].items():
-                print(f"   {info['rol_estimado']}: {info['participacion_porcentaje']:.1f}% participación")
+                print(f"   {info['rol_estimado']}: {info['participacion_porcentaje']:.1f}% participación, "
+                      f"{info['tiempo_habla_segundos'] / 60:.1f} min de habla")
+        
+        if resultado.get('dinamica'):
+            dinamica = resultado['dinamica']
+            print(f"🔁 Turnos: {dinamica['turnos']} ({dinamica['interrupciones']} interrupciones)")
+            if dinamica['latencia_respuesta_paciente'] is not None:
+                print(f"⏳ Latencia de respuesta del paciente: {dinamica['latencia_respuesta_paciente']:.2f}s")
         
         # Sentiment
         if "SENTIMENT" in resultado['analisis']:
@@ -364,6 +1082,9 @@ class TranscriptorMedico:
             print(f"😊 Sentimiento general: {sentiment['interpretacion']}")
         
         print(f"\n💾 Archivo guardado: {resultado['output_file']}")
+        for formato, ruta in resultado['salidas'].items():
+            if ruta != resultado['output_file']:
+                print(f"💾 {formato.upper()}: {ruta}")
 
     def seleccionar_archivo(self):
         """
@@ -380,12 +1101,32 @@ class TranscriptorMedico:
             print("📁 No se encontraron archivos de audio en esta carpeta")
             return None
         
+        # Duraciones de todas las cabeceras en paralelo (y en caché), sin lanzar ffprobe
+        sondeos = self.sondeo.sondear_lote(archivos_audio)
+        
         print("\n🎵 ARCHIVOS DE AUDIO DISPONIBLES:")
         print("=" * 40)
         
-        for i, archivo in enumerate(archivos_audio, 1):
-            tamaño = os.path.getsize(archivo) / (1024 * 1024)  # MB
-            print(f"{i}. {archivo} ({tamaño:.1f} MB)")
+        for i, (archivo, sondeo) in enumerate(zip(archivos_audio, sondeos), 1):
+            tamaño = sondeo["bytes"] / (1024 * 1024)  # MB
+            if sondeo["duracion"] is None:
+                print(f"{i}. {archivo} ({tamaño:.1f} MB, duración desconocida)")
+                continue
+            # Frecuencia y canales solo si la cabecera los trae (p. ej. no en un m4a sin pista de audio)
+            formato_audio = []
+            if sondeo["frecuencia"]:
+                formato_audio.append(f"{sondeo['frecuencia']} Hz")
+            if sondeo["canales"]:
+                formato_audio.append({1: "mono", 2: "estéreo"}.get(sondeo["canales"], f"{sondeo['canales']} canales"))
+            detalles = [f"{tamaño:.1f} MB", formato_duracion(sondeo["duracion"])]
+            if formato_audio:
+                detalles.append(" ".join(formato_audio))
+            costo = segundos_facturables(sondeo["duracion"]) / 60 * self.precio_minuto
+            print(f"{i}. {archivo} ({', '.join(detalles)}, ~${costo:.2f})")
+        
+        total = estimar_costo(sondeos, self.precio_minuto)
+        print(f"\n📊 Total: {total['archivos']} archivos, {formato_duracion(total['audio_segundos'])} de audio, "
+              f"~${total['costo_usd']:.2f} transcribiendo todo (${self.precio_minuto}/min)")
         
         try:
             seleccion = int(input(f"\n🎯 Selecciona archivo (1-{len(archivos_audio)}): "))
@@ -409,7 +1150,38 @@ async def main():
     print("🤖 Configuración: nova-2 + keywords médicas + análisis completo")
     print("🎯 Optimizado para: Consultas médicas, entrevistas clínicas\n")
     
-    transcriptor = TranscriptorMedico()
+    # TRANSCRIPTOR_METRICAS_JSONL: eventos por etapa; TRANSCRIPTOR_METRICAS_PROM: agregado para Prometheus
+    metricas = Metricas(os.getenv('TRANSCRIPTOR_METRICAS_JSONL'))
+    transcriptor = TranscriptorMedico(
+        metricas=metricas,
+        silencioso=bool(os.getenv('TRANSCRIPTOR_SILENCIOSO')),
+        formatos_salida=[f.strip() for f in os.getenv('TRANSCRIPTOR_FORMATOS', 'txt').split(',') if f.strip()],
+        codificacion=os.getenv('TRANSCRIPTOR_CODIFICACION', 'wav'),
+        eliminar_silencios=bool(os.getenv('TRANSCRIPTOR_ELIMINAR_SILENCIOS')),
+        decodificacion=os.getenv('TRANSCRIPTOR_DECODIFICACION', 'ffmpeg'),
+        precio_minuto=float(os.getenv('TRANSCRIPTOR_PRECIO_MINUTO', PRECIO_MINUTO_USD))
+    )
+    
+    try:
+        await transcriptor_interactivo(transcriptor)
+    finally:
+        await cerrar_clientes()
+        metricas.mostrar_resumen()
+        if os.getenv('TRANSCRIPTOR_METRICAS_PROM'):
+            metricas.exportar_prometheus(os.getenv('TRANSCRIPTOR_METRICAS_PROM'))
+        metricas.cerrar()
+
+async def transcriptor_interactivo(transcriptor):
+    """
+    Selección de archivo y duración, y transcripción
+    """
+    # Verificar API key antes de pedir nada al usuario
+    try:
+        transcriptor.dg
+    except RuntimeError:
+        print("❌ ERROR: DEEPGRAM_API_KEY no encontrada en archivo .env")
+        print("💡 Asegúrate de tener DEEPGRAM_API_KEY=tu_clave en el archivo .env")
+        exit(1)
     
     # Seleccionar archivo
     archivo_seleccionado = transcriptor.seleccionar_archivo()
@@ -418,12 +1190,23 @@ async def main():
         print("❌ No se seleccionó archivo")
         return
     
-    # Menú de duración
-    print(f"\n⏱️ DURACIÓN DEL SEGMENTO:")
-    print("1. 📊 2 minutos (rápido, $0.02)")
-    print("2. 📊 5 minutos (balance, $0.05)")
-    print("3. 📊 10 minutos (completo, $0.10)")
+    # Menú de duración, con el coste según la duración real de la grabación
+    sondeo = transcriptor.sondeo.sondear(archivo_seleccionado)
+    
+    def costo(segundos):
+        # Sin duración conocida se supone que la grabación cubre todo el tramo
+        duracion = sondeo["duracion"] or segundos or 0
+        return segundos_facturables(duracion, segundos) / 60 * transcriptor.precio_minuto
+    
+    print(f"\n⏱️ DURACIÓN DEL SEGMENTO (grabación de {formato_duracion(sondeo['duracion'])}):")
+    print(f"1. 📊 2 minutos (rápido, ${costo(120):.2f})")
+    print(f"2. 📊 5 minutos (balance, ${costo(300):.2f})")
+    print(f"3. 📊 10 minutos (completo, ${costo(600):.2f})")
     print("4. 📊 Personalizado")
+    if sondeo["duracion"]:
+        print(f"5. 📊 Sesión completa (segmentos en paralelo, ${costo(None):.2f})")
+    else:
+        print("5. 📊 Sesión completa (segmentos en paralelo)")
     
     try:
         opcion_duracion = int(input("\n🎯 Selecciona duración: "))
@@ -434,6 +1217,8 @@ async def main():
             duracion = duraciones[opcion_duracion]
         elif opcion_duracion == 4:
             duracion = int(input("⏱️ Duración en segundos: "))
+        elif opcion_duracion == 5:
+            duracion = None
         else:
             print("❌ Opción inválida")
             return
@@ -442,21 +1227,35 @@ async def main():
         print("❌ Entrada inválida")
         return
     
-    # Crear segmento optimizado
-    archivo_segmento = transcriptor.crear_segmento_optimizado(archivo_seleccionado, duracion)
-    
-    if archivo_segmento:
-        # Transcribir con análisis completo
-        resultado = await transcriptor.transcribir_optimizado(archivo_segmento, incluir_timestamps=True)
+    if duracion is None:
+        resultado = await transcriptor.transcribir_sesion_completa(archivo_seleccionado, incluir_timestamps=True)
         
         if resultado:
-            print("\n🎉 ¡TRANSCRIPCIÓN COMPLETADA EXITOSAMENTE!")
+            print("\n🎉 ¡SESIÓN COMPLETA TRANSCRITA!")
             print(f"🎯 Calidad obtenida: {resultado['confidence']:.2%}")
-            print("💡 Archivo listo para análisis médico avanzado")
         else:
             print("❌ Error en la transcripción")
+        return
+    
+    if transcriptor.decodificacion == "interna":
+        # Decodificación y filtrado en este proceso: el segmento se sube desde memoria
+        resultado = await transcriptor.transcribir_en_memoria(archivo_seleccionado, duracion, incluir_timestamps=True)
+    else:
+        # Crear segmento optimizado
+        archivo_segmento = transcriptor.crear_segmento_optimizado(archivo_seleccionado, duracion)
+        if not archivo_segmento:
+            print("❌ No se pudo crear el segmento de audio")
+            return
+        
+        # Transcribir con análisis completo
+        resultado = await transcriptor.transcribir_optimizado(archivo_segmento, incluir_timestamps=True)
+    
+    if resultado:
+        print("\n🎉 ¡TRANSCRIPCIÓN COMPLETADA EXITOSAMENTE!")
+        print(f"🎯 Calidad obtenida: {resultado['confidence']:.2%}")
+        print("💡 Archivo listo para análisis médico avanzado")
     else:
-        print("❌ No se pudo crear el segmento de audio")
+        print("❌ Error en la transcripción")
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,132 @@
+class ConstructorTurnos:
+    """
+    Agrupa el flujo de words diarizadas en turnos de palabra en una sola
+    pasada. Solo guarda las palabras del turno en curso y acumula las
+    métricas sobre la marcha, así que sirve igual para sesiones muy largas
+    que para streams en vivo (agregar() palabra a palabra).
+    """
+
+    def __init__(self, speaker_medico=0, umbral_interrupcion=0.3):
+        self.speaker_medico = speaker_medico
+        self.umbral_interrupcion = umbral_interrupcion
+
+        self._actual = None
+        self._anterior = None
+
+        self.turnos = 0
+        self.turnos_por_speaker = {}
+        self._duracion_total = 0.0
+        self._palabras_total = 0
+        self.solapamientos = 0
+        self.interrupciones = 0
+        self._latencias = {"medico_a_paciente": [0, 0.0], "paciente_a_medico": [0, 0.0]}
+
+    def agregar(self, palabra):
+        """
+        Procesar una palabra; devuelve el turno que se cierra, si lo hay
+        """
+        speaker = palabra.get("speaker", 0)
+        cerrado = None
+
+        if self._actual is not None and speaker != self._actual["speaker"]:
+            cerrado = self._cerrar_turno()
+
+        if self._actual is None:
+            self._actual = {
+                "speaker": speaker,
+                "inicio": palabra.get("start", 0.0),
+                "fin": palabra.get("end", 0.0),
+                "tokens": [],
+                "confianza_total": 0.0
+            }
+
+        actual = self._actual
+        actual["fin"] = max(actual["fin"], palabra.get("end", 0.0))
+        actual["tokens"].append(palabra.get("punctuated_word", palabra.get("word", "")))
+        actual["confianza_total"] += palabra.get("confidence", 0.0)
+
+        return cerrado
+
+    def cerrar(self):
+        """
+        Cerrar el turno en curso al final de la sesión o del stream
+        """
+        return self._cerrar_turno() if self._actual is not None else None
+
+    def _cerrar_turno(self):
+        actual = self._actual
+        self._actual = None
+
+        palabras = len(actual["tokens"])
+        turno = {
+            "speaker": actual["speaker"],
+            "inicio": actual["inicio"],
+            "fin": actual["fin"],
+            "palabras": palabras,
+            "texto": " ".join(actual["tokens"]),
+            "confianza_promedio": actual["confianza_total"] / palabras if palabras else 0.0
+        }
+
+        self.turnos += 1
+        self.turnos_por_speaker[turno["speaker"]] = self.turnos_por_speaker.get(turno["speaker"], 0) + 1
+        self._duracion_total += turno["fin"] - turno["inicio"]
+        self._palabras_total += palabras
+
+        anterior = self._anterior
+        if anterior is not None:
+            pausa = turno["inicio"] - anterior["fin"]
+
+            if pausa < 0:
+                self.solapamientos += 1
+            if pausa < self.umbral_interrupcion and not anterior["texto"].endswith((".", "?", "!")):
+                # El turno anterior se corta a media frase y el otro speaker entra sin pausa
+                self.interrupciones += 1
+
+            era_medico = anterior["speaker"] == self.speaker_medico
+            es_medico = turno["speaker"] == self.speaker_medico
+            if era_medico != es_medico:
+                clave = "medico_a_paciente" if era_medico else "paciente_a_medico"
+                self._latencias[clave][0] += 1
+                self._latencias[clave][1] += max(pausa, 0.0)
+
+        # Del turno anterior solo se necesitan speaker, fin y final del texto
+        self._anterior = {"speaker": turno["speaker"], "fin": turno["fin"], "texto": turno["texto"][-2:]}
+        return turno
+
+    def metricas(self):
+        """
+        Métricas de la conversación acumuladas hasta ahora
+        """
+        def promedio(clave):
+            cantidad, suma = self._latencias[clave]
+            return suma / cantidad if cantidad else None
+
+        return {
+            "turnos": self.turnos,
+            "turnos_por_speaker": dict(self.turnos_por_speaker),
+            "duracion_media_turno": self._duracion_total / self.turnos if self.turnos else 0.0,
+            "palabras_media_turno": self._palabras_total / self.turnos if self.turnos else 0.0,
+            "solapamientos": self.solapamientos,
+            "interrupciones": self.interrupciones,
+            "latencia_respuesta_paciente": promedio("medico_a_paciente"),
+            "latencia_respuesta_medico": promedio("paciente_a_medico")
+        }
+
+
+def construir_turnos(words, speaker_medico=0):
+    """
+    Turnos y métricas de una sesión completa
+    """
+    constructor = ConstructorTurnos(speaker_medico)
+    turnos = []
+
+    for palabra in words:
+        cerrado = constructor.agregar(palabra)
+        if cerrado:
+            turnos.append(cerrado)
+
+    ultimo = constructor.cerrar()
+    if ultimo:
+        turnos.append(ultimo)
+
+    return turnos, constructor.metricas()
@@ -0,0 +1,165 @@
+import json
+import os
+
+import numpy as np
+
+ESCALA_PCM = 32768.0
+
+
+def detectar_voz(muestras, frecuencia=16000, ventana_ms=30, margen_db=12.0, min_silencio=0.8, relleno=0.2):
+    """
+    Tramos (inicio, fin) en segundos con voz, por energía en ventanas de
+    `ventana_ms`. El umbral se adapta a cada grabación: piso de ruido
+    (percentil 10 de la energía) + `margen_db`; si ninguna ventana lo supera
+    no se recorta nada. Las pausas más cortas que
+    `min_silencio` se conservan y cada tramo se extiende `relleno` segundos
+    para no recortar consonantes suaves al principio o al final.
+    """
+    tamano = max(1, frecuencia * ventana_ms // 1000)
+    tramas = len(muestras) // tamano
+    duracion = len(muestras) / frecuencia
+    if tramas < 2:
+        return [(0.0, duracion)] if len(muestras) else []
+
+    x = muestras[:tramas * tamano].astype(np.float32).reshape(tramas, tamano) / ESCALA_PCM
+    energia_db = 10 * np.log10(np.mean(x * x, axis=1) + 1e-10)
+
+    # El piso sale solo del percentil bajo: un segmento casi en silencio (voz en el 5% de las
+    # ventanas) tiene el percentil 90 también en silencio y es justo el que más se recorta
+    piso = np.percentile(energia_db, 10)
+    voz = energia_db > piso + margen_db
+    if not voz.any():
+        # Sin silencios claros (ruido de fondo alto o habla continua): no recortar nada
+        return [(0.0, duracion)]
+
+    # Extender la voz `relleno` segundos a cada lado (dilatación)
+    extension = int(round(relleno * 1000 / ventana_ms))
+    if extension:
+        voz = np.convolve(voz, np.ones(2 * extension + 1), mode="same") > 0
+
+    # Inicios y fines de cada tramo con voz
+    cambios = np.diff(np.concatenate(([0], voz.astype(np.int8), [0])))
+    inicios = np.flatnonzero(cambios == 1)
+    fines = np.flatnonzero(cambios == -1)
+    if inicios.size == 0:
+        return []
+
+    # Unir tramos separados por pausas cortas (respiraciones, pausas dentro de una frase)
+    hueco_minimo = min_silencio * 1000 / ventana_ms
+    tramos = [[inicios[0], fines[0]]]
+    for inicio, fin in zip(inicios[1:], fines[1:]):
+        if inicio - tramos[-1][1] < hueco_minimo:
+            tramos[-1][1] = fin
+        else:
+            tramos.append([inicio, fin])
+
+    segundos = ventana_ms / 1000
+    return [(float(inicio * segundos), float(min(fin * segundos, duracion))) for inicio, fin in tramos]
+
+
+def eliminar_silencios(muestras, tramos, frecuencia=16000, silencio_conservado=0.3):
+    """
+    Audio con solo los tramos de voz, separados por `silencio_conservado`
+    segundos de silencio digital (para que las frases no se peguen), y el
+    MapaTiempos para volver a los tiempos de la grabación original
+    """
+    pausa = np.zeros(int(silencio_conservado * frecuencia), dtype=muestras.dtype)
+    partes = []
+    mapa = []
+    posicion = 0
+
+    for i, (inicio, fin) in enumerate(tramos):
+        if i:
+            partes.append(pausa)
+            posicion += len(pausa)
+        desde, hasta = int(inicio * frecuencia), int(fin * frecuencia)
+        partes.append(muestras[desde:hasta])
+        mapa.append((posicion / frecuencia, desde / frecuencia, (hasta - desde) / frecuencia))
+        posicion += hasta - desde
+
+    audio = np.concatenate(partes) if partes else muestras[:0]
+    return audio, MapaTiempos(mapa, len(muestras) / frecuencia)
+
+
+class MapaTiempos:
+    """
+    Correspondencia entre el tiempo del audio sin silencios y el de la
+    grabación original: una entrada (inicio_comprimido, inicio_original,
+    duración) por tramo de voz conservado
+    """
+
+    def __init__(self, tramos, duracion_original):
+        self.tramos = [tuple(tramo) for tramo in tramos]
+        self.duracion_original = duracion_original
+
+        tabla = np.array(self.tramos, dtype=np.float64).reshape(-1, 3)
+        self._comprimido, self._original, self._duracion = tabla.T
+
+    @property
+    def duracion_comprimida(self):
+        return float(self._comprimido[-1] + self._duracion[-1]) if self.tramos else 0.0
+
+    def a_original(self, tiempos):
+        """
+        Tiempos del audio sin silencios (escalar o array) a tiempos originales;
+        un instante dentro de una pausa insertada se ajusta al final del tramo anterior
+        """
+        tiempos = np.asarray(tiempos, dtype=np.float64)
+        if not self.tramos:
+            return tiempos
+        indice = np.clip(np.searchsorted(self._comprimido, tiempos, side="right") - 1, 0, None)
+        desplazamiento = np.clip(tiempos - self._comprimido[indice], 0, self._duracion[indice])
+        return self._original[indice] + desplazamiento
+
+    def traducir_respuesta(self, response):
+        """
+        Copia de la respuesta de Deepgram con los timestamps de las palabras
+        en tiempo de la grabación original
+        """
+        traducida = {**response, "results": {**response["results"], "channels": []}}
+        for canal in response["results"]["channels"]:
+            alternativas = []
+            for alternativa in canal["alternatives"]:
+                words = alternativa.get("words", [])
+                if words:
+                    inicios = self.a_original([w["start"] for w in words])
+                    fines = self.a_original([w["end"] for w in words])
+                    words = [{**w, "start": round(float(i), 3), "end": round(float(f), 3)}
+                             for w, i, f in zip(words, inicios, fines)]
+                alternativas.append({**alternativa, "words": words})
+            traducida["results"]["channels"].append({**canal, "alternatives": alternativas})
+        return traducida
+
+    def a_dict(self):
+        return {"tramos": self.tramos, "duracion_original": self.duracion_original}
+
+    @classmethod
+    def desde_dict(cls, datos):
+        return cls(datos["tramos"], datos["duracion_original"])
+
+
+def ruta_mapa(segmento):
+    return f"{segmento}.mapa.json"
+
+
+def guardar_mapa(mapa, segmento):
+    """
+    Guardar el mapa junto al segmento (escritura atómica)
+    """
+    ruta = ruta_mapa(segmento)
+    directorio, nombre = os.path.split(ruta)
+    temporal = os.path.join(directorio, f".{nombre}.{os.getpid()}.tmp")
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(mapa.a_dict(), f)
+    os.replace(temporal, ruta)
+
+
+def leer_mapa(segmento):
+    """
+    Mapa del segmento, o None si se creó sin eliminar silencios
+    """
+    try:
+        with open(ruta_mapa(segmento), "r", encoding="utf-8") as f:
+            return MapaTiempos.desde_dict(json.load(f))
+    except FileNotFoundError:
+        return None
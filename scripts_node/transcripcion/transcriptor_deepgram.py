@@ -20,6 +20,7 @@ if len(sys.argv) < 2:
 
 input_file = sys.argv[1]
 wav_file = "audio_reconvertido_deepgram.wav"
+TAMANO_BLOQUE = 256 * 1024
 
 # Convertir automáticamente a WAV mono, 16 bits, 16kHz si no lo está
 def convertir_a_wav_si_es_necesario(origen, destino):
@@ -35,21 +36,28 @@ def convertir_a_wav_si_es_necesario(origen, destino):
         print("❌ Error al convertir el archivo de audio.")
         sys.exit(1)
 
+# Leer el WAV en bloques de tamaño fijo: la subida va por transferencia chunked
+# y la memoria no crece con la duración de la grabación
+async def leer_en_bloques(archivo):
+    while True:
+        bloque = await asyncio.to_thread(archivo.read, TAMANO_BLOQUE)
+        if not bloque:
+            break
+        yield bloque
+
 # Transcripción usando SDK v2 de Deepgram
 async def transcribir():
     convertir_a_wav_si_es_necesario(input_file, wav_file)
 
-    with open(wav_file, "rb") as f:
-        audio = f.read()
-
     deepgram = Deepgram(DEEPGRAM_API_KEY)
 
     try:
         print("🎙️ Transcribiendo con Deepgram...")
-        response = await deepgram.transcription.prerecorded(
-            {"buffer": audio, "mimetype": "audio/wav"},
-            {"punctuate": True, "language": "es"}
-        )
+        with open(wav_file, "rb") as f:
+            response = await deepgram.transcription.prerecorded(
+                {"buffer": leer_en_bloques(f), "mimetype": "audio/wav"},
+                {"punctuate": True, "language": "es"}
+            )
         texto = response["results"]["channels"][0]["alternatives"][0]["transcript"]
         print("\n🧠 TRANSCRIPCIÓN:")
         print(texto)
@@ -18,6 +18,20 @@ if not DEEPGRAM_API_KEY:
 
 print(f"✅ API Key cargada: ***{DEEPGRAM_API_KEY[-4:]}")
 
+TAMANO_BLOQUE = 256 * 1024
+
+
+async def leer_en_bloques(archivo):
+    """
+    Archivo en bloques de tamaño fijo: el SDK lo sube con transferencia
+    chunked y la memoria no crece con la duración de la grabación
+    """
+    while True:
+        bloque = await asyncio.to_thread(archivo.read, TAMANO_BLOQUE)
+        if not bloque:
+            break
+        yield bloque
+
 class TranscriptorMedico:
     """
     Transcriptor médico optimizado usando nova-2
@@ -122,7 +136,7 @@ class TranscriptorMedico:
             
             with open(archivo_audio, "rb") as audio:
                 source = {
-                    "buffer": audio,
+                    "buffer": leer_en_bloques(audio),
                     "mimetype": "audio/wav"
                 }
                 